@@ -11,12 +11,28 @@ try:
 except ImportError:
     CORS = None
 from datetime import datetime, timedelta
+from functools import lru_cache
 import uuid
+import gc
 import json
 import hmac
 import hashlib
 import base64
 import time
+import os
+import sys
+
+# Les modules partagés (common/) sont à la racine du dépôt
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.store import Database
+from common.expiring import CapacityError
+from common.intervals import IntervalIndex
+from common.pagination import PageRequest, paginate, list_response
+from common.http_cache import conditional
+from common.response_cache import ResponseCache, cached_list
+from common.changes import parse_changes_args, read_changes
+from common.events import EventBroker, event_stream_response, parse_last_event_id
+from common.fixtures import read_fixture
 
 app = Flask(__name__)
 if CORS:
@@ -27,9 +43,36 @@ CLIENT_ID = "medscheduler_client"
 SECRET_KEY = "medscheduler_secret_key_2024_very_secure"
 SIGNATURE_VALIDITY_SECONDS = 300  # 5 minutes
 
-# Base de données simulée
-appointments = []
-patients = []
+# Clé HMAC pré-calculée une seule fois (copiée à chaque requête)
+_HMAC_KEY = hmac.new(SECRET_KEY.encode('utf-8'), digestmod=hashlib.sha256)
+
+# Taille des blocs du body lus et hachés au fil de la réception
+BODY_CHUNK_SIZE = 64 * 1024
+
+# Protection anti-rejeu : paires (timestamp, signature) déjà vues sur les requêtes
+# qui modifient des données, mémorisées jusqu'à expiration de la signature
+# (registre créé avec la base de données, partagé entre workers avec SQLite)
+REPLAY_PROTECTED_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+REPLAY_CACHE_MAX_ENTRIES = 100000
+
+# Import en masse : nombre maximum d'éléments par lot
+BULK_MAX_ITEMS = 50000
+
+# Durée d'un créneau quand une grille n'en publie qu'un seul
+DEFAULT_SLOT_MINUTES = 30
+
+# Cache des listes déjà sérialisées (taille maximale en octets, éviction LRU)
+RESPONSE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+response_cache = ResponseCache(max_bytes=RESPONSE_CACHE_MAX_BYTES)
+
+# Base de données simulée (index primaire par id + index secondaires)
+# En mémoire par défaut ; fichier SQLite partagé entre workers si configuré,
+# ex: MEDSCHEDULER_DATABASE_URL=sqlite:///medscheduler.db
+db = Database(os.environ.get('MEDSCHEDULER_DATABASE_URL'))
+seen_signatures = db.registry("hmac_nonces", max_size=REPLAY_CACHE_MAX_ENTRIES)
+appointments = db.collection("appointments", key="id",
+                             indexes=("appointment_date", "patient_id", "doctor_name"))
+patients = db.collection("patients", key="id")
 
 # Données de test
 test_patients = [
@@ -77,7 +120,7 @@ test_appointments = [
 ]
 
 # Données de disponibilités
-availabilities = [
+test_availabilities = [
     {
         "id": "avail_001",
         "doctor_name": "Dr. Leblanc",
@@ -92,24 +135,121 @@ availabilities = [
     }
 ]
 
-# Initialiser avec les données de test
-patients.extend(test_patients)
-appointments.extend(test_appointments)
+# Réservations indexées par (docteur, jour) : intervalles en minutes depuis minuit
+bookings = IntervalIndex()
+
+@lru_cache(maxsize=4096)  # Au plus 1440 heures valides : index des réservations reconstruit sans re-analyser
+def parse_time_minutes(value):
+    """Convertir une heure 'HH:MM' en minutes depuis minuit (ValueError si invalide)"""
+    hours, minutes = (int(part) for part in value.split(':'))
+    if not (0 <= hours < 24 and 0 <= minutes < 60):
+        raise ValueError(f"Invalid time: {value}")
+    return hours * 60 + minutes
+
+def booking_interval(appointment):
+    """Clé (docteur, jour) et intervalle [début, fin) d'un rendez-vous"""
+    start = parse_time_minutes(appointment["appointment_time"])
+    end = start + int(appointment["duration"])
+    return (appointment["doctor_name"], appointment["appointment_date"]), start, end
+
+def index_booking(action, appointment):
+    """Maintenir l'index des réservations à chaque écriture sur les rendez-vous"""
+    if action == "delete":
+        bookings.remove(appointment["id"])
+        return
+    try:
+        key, start, end = booking_interval(appointment)
+    except (ValueError, TypeError, AttributeError):
+        bookings.remove(appointment["id"])
+        return
+    bookings.add(key, start, end, appointment["id"])
+
+appointments.subscribe(index_booking)
+
+# Données initiales : fixture binaire pré-générée si configurée (benchmarks/datasets.py
+# --format fixture), ex: MEDSCHEDULER_FIXTURE=/data/medscheduler.fixture ; données de test sinon
+FIXTURE_PATH = os.environ.get('MEDSCHEDULER_FIXTURE')
+initial_data = read_fixture(FIXTURE_PATH, "medscheduler") if FIXTURE_PATH else {
+    "patients": test_patients,
+    "appointments": test_appointments,
+    "availabilities": test_availabilities
+}
+
+# Initialiser avec les données initiales (si la base est vide)
+patients.seed(initial_data.get("patients", ()))
+appointments.seed(initial_data.get("appointments", ()))
+availabilities = db.collection("availabilities", key="id", indexes=("date", "doctor_name"))
+availabilities.seed(initial_data.get("availabilities", ()))
+del initial_data
+if FIXTURE_PATH:
+    gc.freeze()  # Données chargées exclues des passages du ramasse-miettes (et partagées après fork)
+
+# Modifications de patients et de rendez-vous poussées aux abonnés de GET /events
+event_broker = EventBroker(db, (patients, appointments))
+EVENT_STREAM_MAX_SECONDS = 300  # Durée d'un flux : le client se reconnecte avec Last-Event-ID
+
+def published_slots(doctor_name, date):
+    """Créneaux publiés (minutes) et durée d'un créneau, ou (None, None) sans grille"""
+    grids = availabilities.query(date=date, doctor_name=doctor_name)
+    if not grids:
+        return None, None
+    slots = sorted({parse_time_minutes(slot) for grid in grids for slot in grid["slots"]})
+    gaps = [later - earlier for earlier, later in zip(slots, slots[1:])]
+    return slots, min(gaps) if gaps else DEFAULT_SLOT_MINUTES
+
+def check_schedule(appointment):
+    """Vérifier qu'un rendez-vous peut être réservé -> (erreur, code HTTP) ou (None, None)
+
+    - il ne doit chevaucher aucune réservation du même docteur le même jour
+    - s'il existe une grille publiée pour ce docteur et ce jour, il doit
+      commencer sur un créneau publié
+    """
+    try:
+        key, start, end = booking_interval(appointment)
+    except (ValueError, TypeError, AttributeError):
+        return "Invalid appointment_time (HH:MM) or duration", 400
+    if end <= start:
+        return "duration must be a positive number of minutes", 400
+    
+    slots, _ = published_slots(*key)
+    if slots is not None and start not in slots:
+        return "Requested time is not a published availability slot", 400
+    
+    conflict_id = bookings.find_conflict(key, start, end, ignore=appointment["id"])
+    if conflict_id:
+        return f"Doctor already booked at this time (appointment {conflict_id})", 409
+    return None, None
+
+def _signature_hasher(method, path, timestamp):
+    """HMAC-SHA256 initialisé avec l'en-tête de la chaîne à signer (sans le body)"""
+    hasher = _HMAC_KEY.copy()
+    hasher.update(f"{method}\n{path}\n{timestamp}\n".encode('utf-8'))
+    return hasher
+
+def _read_signed_body(hasher):
+    """Lire le body par blocs en alimentant le hasher au fil de la réception
+
+    Le body assemblé est mis en cache sur la requête (comme get_data(cache=True)) :
+    get_json et get_data le relisent sans nouvelle lecture du flux.
+    """
+    chunks = []
+    while True:
+        chunk = request.stream.read(BODY_CHUNK_SIZE)
+        if not chunk:
+            break
+        hasher.update(chunk)
+        chunks.append(chunk)
+    request._cached_data = b"".join(chunks)
+    return request._cached_data
 
 def generate_signature(method, path, timestamp, body=""):
     """Générer une signature HMAC pour la requête"""
-    # Créer la chaîne à signer
-    string_to_sign = f"{method}\n{path}\n{timestamp}\n{body}"
-    
-    # Générer la signature HMAC-SHA256
-    signature = hmac.new(
-        SECRET_KEY.encode('utf-8'),
-        string_to_sign.encode('utf-8'),
-        hashlib.sha256
-    ).digest()
+    # Chaîne à signer: {METHOD}\n{PATH}\n{TIMESTAMP}\n{BODY}
+    hasher = _signature_hasher(method, path, timestamp)
+    hasher.update(body.encode('utf-8') if isinstance(body, str) else body)
     
     # Encoder en base64
-    return base64.b64encode(signature).decode('utf-8')
+    return base64.b64encode(hasher.digest()).decode('utf-8')
 
 def require_hmac_auth(f):
     """Décorateur pour vérifier l'authentification HMAC"""
@@ -142,18 +282,13 @@ def require_hmac_auth(f):
         except ValueError:
             return jsonify({"error": "Invalid timestamp format"}), 401
         
-        # Récupérer le body de la requête
-        body = ""
+        # Générer la signature attendue : le body brut (bytes) est haché par blocs
+        # pendant sa lecture, sans décodage ni ré-encodage
+        hasher = _signature_hasher(request.method, request.path, timestamp)
+        body = b""
         if request.method in ['POST', 'PUT', 'PATCH']:
-            body = request.get_data(as_text=True)
-        
-        # Générer la signature attendue
-        expected_signature = generate_signature(
-            request.method,
-            request.path,
-            timestamp,
-            body
-        )
+            body = _read_signed_body(hasher)
+        expected_signature = base64.b64encode(hasher.digest()).decode('utf-8')
         
         # Vérifier la signature (comparaison sécurisée)
         if not hmac.compare_digest(signature, expected_signature):
@@ -167,11 +302,70 @@ def require_hmac_auth(f):
                 }
             }), 401
         
+        # Refuser une signature déjà utilisée (rejeu dans la fenêtre de validité)
+        if request.method in REPLAY_PROTECTED_METHODS:
+            nonce = f"{timestamp}:{signature}"
+            # Horloge entière acceptée jusqu'à request_time + validité incluse, soit
+            # jusqu'à la fin de cette seconde : mémorisée une seconde de plus
+            try:
+                is_new = seen_signatures.add(nonce, request_time + SIGNATURE_VALIDITY_SECONDS + 1)
+            except CapacityError:
+                # Registre plein de signatures encore valables : en évincer une
+                # rouvrirait la porte au rejeu, la requête est refusée
+                return jsonify({"error": "Replay protection cache full, retry later"}), 503
+            if not is_new:
+                return jsonify({"error": "Signature already used (replay detected)"}), 401
+        
         return f(*args, **kwargs)
     
     decorated_function.__name__ = f.__name__
     return decorated_function
 
+def parse_bulk_items():
+    """Lire les éléments d'un lot : tableau JSON ou flux NDJSON (un objet par ligne)
+
+    Retourne une liste de (données, erreur de parsing), ou None si le body
+    n'est pas exploitable.
+    """
+    if request.mimetype in ('application/x-ndjson', 'application/jsonl'):
+        items = []
+        for line in request.get_data(cache=True).splitlines():
+            if not line.strip():
+                continue
+            try:
+                items.append((json.loads(line), None))
+            except ValueError:
+                items.append((None, "Invalid JSON line"))
+        return items
+    
+    data = request.get_json(silent=True)
+    return [(item, None) for item in data] if isinstance(data, list) else None
+
+def new_record_id(prefix):
+    """Identifiant court aléatoire au format de l'API (ex: pat_1a2b3c4d)"""
+    return f"{prefix}_{uuid.uuid4().hex[:8]}"
+
+def insert_created(collection, record, prefix):
+    """Insérer un enregistrement créé par l'API, identifiant régénéré s'il est déjà pris
+
+    32 bits aléatoires : les collisions deviennent probables dès quelques
+    dizaines de milliers d'identifiants (lots, grosses collections).
+    """
+    with collection.transaction():
+        while record["id"] in collection:
+            record["id"] = new_record_id(prefix)
+        collection.insert(record)
+
+def bulk_response(results):
+    """Réponse d'un import en masse : 201 si tout est créé, 207 sinon"""
+    created = sum(1 for result in results if result["status"] == 201)
+    failed = len(results) - created
+    return jsonify({
+        "results": results,
+        "created": created,
+        "failed": failed
+    }), 201 if not failed else 207
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
@@ -180,25 +374,34 @@ def health_check():
         "api": "MedScheduler",
         "version": "1.1.0",
         "authentication": "HMAC-SHA256 Signature",
-        "timestamp": datetime.utcnow().strftime("%d/%m/%Y %H:%M:%S")
+        "timestamp": datetime.utcnow().strftime("%d/%m/%Y %H:%M:%S"),
+        "response_cache": response_cache.stats(),
+        "replay_cache": seen_signatures.stats(),
+        "events": event_broker.stats()
     })
 
 
 # PATIENTS ENDPOINTS
 @app.route('/patients', methods=['GET'])
 @require_hmac_auth
+@conditional(patients)
+@cached_list(response_cache, patients)
 def get_patients():
-    """Récupérer tous les patients"""
-    return jsonify({
-        "patients": patients,
-        "total": len(patients)
-    })
+    """Récupérer tous les patients (pagination par curseur / streaming optionnels)"""
+    try:
+        page = PageRequest.from_args(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    entries, total = paginate(patients, page)
+    return list_response(page, "patients", entries, total)
 
 @app.route('/patients/<patient_id>', methods=['GET'])
 @require_hmac_auth
+@conditional(patients, item_arg='patient_id')
 def get_patient(patient_id):
     """Récupérer un patient spécifique"""
-    patient = next((p for p in patients if p["id"] == patient_id), None)
+    patient = patients.get(patient_id)
     if not patient:
         return jsonify({"error": "Patient not found"}), 404
     return jsonify(patient)
@@ -207,15 +410,48 @@ def get_patient(patient_id):
 @require_hmac_auth
 def create_patient():
     """Créer un nouveau patient"""
-    data = request.get_json()
+    patient, error = build_patient(request.get_json())
+    if error:
+        return jsonify({"error": error}), 400
+    
+    insert_created(patients, patient, "pat")
+    return jsonify(patient), 201
+
+@app.route('/patients/bulk', methods=['POST'])
+@require_hmac_auth
+def create_patients_bulk():
+    """Créer des patients en masse (tableau JSON ou NDJSON, une seule signature)"""
+    items = parse_bulk_items()
+    if items is None:
+        return jsonify({"error": "Expected a JSON array or an NDJSON body"}), 400
+    if len(items) > BULK_MAX_ITEMS:
+        return jsonify({"error": f"Too many items (max {BULK_MAX_ITEMS})"}), 413
+    
+    results = []
+    with patients.transaction():  # Un seul commit pour le lot (SQLite)
+        for index, (data, error) in enumerate(items):
+            if not error:
+                patient, error = build_patient(data)
+            if error:
+                results.append({"index": index, "status": 400, "error": error})
+                continue
+            insert_created(patients, patient, "pat")
+            results.append({"index": index, "status": 201, "id": patient["id"]})
+    
+    return bulk_response(results)
+
+def build_patient(data):
+    """Valider les données reçues et construire un patient -> (patient, erreur)"""
+    if not isinstance(data, dict):
+        return None, "JSON object required"
     
     required_fields = ["first_name", "last_name", "birthdate", "phone_number"]
     for field in required_fields:
         if field not in data:
-            return jsonify({"error": f"Missing required field: {field}"}), 400
+            return None, f"Missing required field: {field}"
     
     patient = {
-        "id": f"pat_{uuid.uuid4().hex[:8]}",
+        "id": new_record_id("pat"),
         "first_name": data["first_name"],
         "last_name": data["last_name"], 
         "birthdate": data["birthdate"],
@@ -223,32 +459,37 @@ def create_patient():
         "email": data.get("email", ""),
         "created_at": datetime.utcnow().strftime("%Y/%m/%d %H:%M:%S")
     }
-    
-    patients.append(patient)
-    return jsonify(patient), 201
+    return patient, None
 
 # APPOINTMENTS ENDPOINTS
 @app.route('/appointments', methods=['GET'])
 @require_hmac_auth
+@conditional(appointments)
+@cached_list(response_cache, appointments)
 def get_appointments():
     """Récupérer tous les rendez-vous"""
-    # Filtrage optionnel par date
-    date_filter = request.args.get('date')
-    filtered_appointments = appointments
+    try:
+        page = PageRequest.from_args(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     
-    if date_filter:
-        filtered_appointments = [apt for apt in appointments if apt["appointment_date"] == date_filter]
+    # Filtrage optionnel par date, patient ou docteur (via les index secondaires)
+    filters = {
+        "appointment_date": request.args.get('date'),
+        "patient_id": request.args.get('patient_id'),
+        "doctor_name": request.args.get('doctor_name')
+    }
+    filtered_appointments = appointments.query(**filters) if any(filters.values()) else None
     
-    return jsonify({
-        "appointments": filtered_appointments,
-        "total": len(filtered_appointments)
-    })
+    entries, total = paginate(appointments, page, filtered_appointments)
+    return list_response(page, "appointments", entries, total)
 
 @app.route('/appointments/<appointment_id>', methods=['GET'])
 @require_hmac_auth
+@conditional(appointments, item_arg='appointment_id')
 def get_appointment(appointment_id):
     """Récupérer un rendez-vous spécifique"""
-    appointment = next((a for a in appointments if a["id"] == appointment_id), None)
+    appointment = appointments.get(appointment_id)
     if not appointment:
         return jsonify({"error": "Appointment not found"}), 404
     return jsonify(appointment)
@@ -257,20 +498,62 @@ def get_appointment(appointment_id):
 @require_hmac_auth
 def create_appointment():
     """Créer un nouveau rendez-vous"""
-    data = request.get_json()
+    appointment, error = build_appointment(request.get_json())
+    if error:
+        return jsonify({"error": error}), 400
+    
+    # Vérification des conflits et insertion sans écriture concurrente intercalée
+    with appointments.transaction():
+        error, status = check_schedule(appointment)
+        if error:
+            return jsonify({"error": error}), status
+        insert_created(appointments, appointment, "apt")
+    return jsonify(appointment), 201
+
+@app.route('/appointments/bulk', methods=['POST'])
+@require_hmac_auth
+def create_appointments_bulk():
+    """Créer des rendez-vous en masse (tableau JSON ou NDJSON, une seule signature)"""
+    items = parse_bulk_items()
+    if items is None:
+        return jsonify({"error": "Expected a JSON array or an NDJSON body"}), 400
+    if len(items) > BULK_MAX_ITEMS:
+        return jsonify({"error": f"Too many items (max {BULK_MAX_ITEMS})"}), 413
+    
+    results = []
+    # Un seul commit pour le lot (SQLite) ; chaque créneau est vérifié contre les précédents
+    with appointments.transaction():
+        for index, (data, error) in enumerate(items):
+            if not error:
+                appointment, error = build_appointment(data)
+            if error:
+                results.append({"index": index, "status": 400, "error": error})
+                continue
+            error, status = check_schedule(appointment)
+            if error:
+                results.append({"index": index, "status": status, "error": error})
+                continue
+            insert_created(appointments, appointment, "apt")
+            results.append({"index": index, "status": 201, "id": appointment["id"]})
+    
+    return bulk_response(results)
+
+def build_appointment(data):
+    """Valider les données reçues et construire un rendez-vous -> (rendez-vous, erreur)"""
+    if not isinstance(data, dict):
+        return None, "JSON object required"
     
     required_fields = ["patient_id", "doctor_name", "appointment_date", "appointment_time"]
     for field in required_fields:
         if field not in data:
-            return jsonify({"error": f"Missing required field: {field}"}), 400
+            return None, f"Missing required field: {field}"
     
-    # Vérifier que le patient existe
-    patient_exists = any(p["id"] == data["patient_id"] for p in patients)
-    if not patient_exists:
-        return jsonify({"error": "Patient not found"}), 400
+    # Vérifier que le patient existe (index primaire, O(1) ; un identifiant est une chaîne)
+    if not isinstance(data["patient_id"], str) or data["patient_id"] not in patients:
+        return None, "Patient not found"
     
     appointment = {
-        "id": f"apt_{uuid.uuid4().hex[:8]}",
+        "id": new_record_id("apt"),
         "patient_id": data["patient_id"],
         "doctor_name": data["doctor_name"],
         "appointment_date": data["appointment_date"],
@@ -279,61 +562,130 @@ def create_appointment():
         "reason": data.get("reason", ""),
         "created_at": datetime.utcnow().strftime("%Y/%m/%d %H:%M:%S")
     }
-    
-    appointments.append(appointment)
-    return jsonify(appointment), 201
+    return appointment, None
 
 @app.route('/appointments/<appointment_id>', methods=['PUT'])
 @require_hmac_auth
 def update_appointment(appointment_id):
     """Mettre à jour un rendez-vous"""
-    appointment = next((a for a in appointments if a["id"] == appointment_id), None)
-    if not appointment:
+    if appointment_id not in appointments:
         return jsonify({"error": "Appointment not found"}), 404
     
     data = request.get_json()
     
-    # Mettre à jour les champs fournis
+    # Mettre à jour les champs fournis (les index sont maintenus par le store)
     updatable_fields = ["doctor_name", "appointment_date", "appointment_time", 
                        "duration", "reason"]
+    changes = {field: data[field] for field in updatable_fields if field in data}
     
-    for field in updatable_fields:
-        if field in data:
-            appointment[field] = data[field]
-    
+    with appointments.transaction():
+        current = appointments.get(appointment_id)
+        if current is None:
+            return jsonify({"error": "Appointment not found"}), 404
+        if any(field in changes for field in ("doctor_name", "appointment_date",
+                                              "appointment_time", "duration")):
+            error, status = check_schedule({**current, **changes})
+            if error:
+                return jsonify({"error": error}), status
+        appointment = appointments.update(appointment_id, changes)
     return jsonify(appointment)
 
 # AVAILABILITIES ENDPOINTS
 @app.route('/availabilities', methods=['GET'])
 @require_hmac_auth
+@conditional(availabilities)
+@cached_list(response_cache, availabilities)
 def get_availabilities():
     """Récupérer les disponibilités"""
-    # Filtrage optionnel par date ou docteur
-    date_filter = request.args.get('date')
-    doctor_filter = request.args.get('doctor_name')
+    try:
+        page = PageRequest.from_args(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     
-    filtered_availabilities = availabilities
+    # Filtrage optionnel par date ou docteur
+    filters = {
+        "date": request.args.get('date'),
+        "doctor_name": request.args.get('doctor_name')
+    }
+    filtered_availabilities = availabilities.query(**filters) if any(filters.values()) else None
     
-    if date_filter:
-        filtered_availabilities = [av for av in filtered_availabilities if av["date"] == date_filter]
+    entries, total = paginate(availabilities, page, filtered_availabilities)
+    return list_response(page, "availabilities", entries, total)
+
+@app.route('/availabilities/free', methods=['GET'])
+@require_hmac_auth
+@conditional(availabilities, appointments)
+def get_free_slots():
+    """Créneaux encore libres : grilles publiées moins les rendez-vous réservés"""
+    filters = {
+        "date": request.args.get('date'),
+        "doctor_name": request.args.get('doctor_name')
+    }
+    grids = availabilities.query(**filters)
     
-    if doctor_filter:
-        filtered_availabilities = [av for av in filtered_availabilities if av["doctor_name"] == doctor_filter]
+    free_availabilities = []
+    for grid in grids:
+        key = (grid["doctor_name"], grid["date"])
+        _, slot_minutes = published_slots(*key)
+        free_slots = [
+            slot for slot in grid["slots"]
+            if not bookings.find_conflict(key, parse_time_minutes(slot),
+                                          parse_time_minutes(slot) + slot_minutes)
+        ]
+        free_availabilities.append({**grid, "slots": free_slots})
     
     return jsonify({
-        "availabilities": filtered_availabilities,
-        "total": len(filtered_availabilities)
+        "availabilities": free_availabilities,
+        "total": len(free_availabilities)
     })
 
+# FLUX DE MODIFICATIONS
+@app.route('/changes', methods=['GET'])
+@require_hmac_auth
+def get_changes():
+    """Créations, modifications et suppressions depuis la séquence `since` (synchronisation incrémentale)"""
+    try:
+        since, limit = parse_changes_args(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    page = read_changes(db, since, limit)
+    if page is None:
+        return jsonify({
+            "error": "Sequence too old: deletions before it are no longer retained, full resync required",
+            "horizon": db.backend.change_horizon(),
+            "last_seq": db.backend.last_rev(),
+            "resync_since": 0
+        }), 410
+    return jsonify(page)
+
+# FLUX D'ÉVÉNEMENTS (SSE)
+@app.route('/events', methods=['GET'])
+@require_hmac_auth
+def get_events():
+    """Modifications de patients et de rendez-vous poussées en Server-Sent Events (reprise par Last-Event-ID)
+
+    Le flux se termine après EVENT_STREAM_MAX_SECONDS : le client se reconnecte
+    avec une nouvelle signature et Last-Event-ID, sans perdre d'événement.
+    """
+    try:
+        last_event_id = parse_last_event_id(request.headers, request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    subscription = event_broker.subscribe(last_event_id, expires_at=time.time() + EVENT_STREAM_MAX_SECONDS)
+    if subscription is None:
+        return jsonify({"error": "Too many event subscribers, retry later"}), 503
+    return event_stream_response(subscription)
+
 if __name__ == '__main__':
-    import os
     port = int(os.environ.get('PORT', 5001))
     print("🏥 MedScheduler API starting...")
     print("🔐 HMAC-SHA256 Authentication enabled")
     print("📋 Authentication details:")
     print(f"   Client ID: {CLIENT_ID}")
     print(f"   Signature validity: {SIGNATURE_VALIDITY_SECONDS} seconds")
-    print("📚 Test data loaded:")
+    print(f"📚 {'Fixture ' + FIXTURE_PATH if FIXTURE_PATH else 'Test data'} loaded:")
     print(f"   - {len(patients)} patients")
     print(f"   - {len(appointments)} appointments")
     print(f"   - {len(availabilities)} availabilities")
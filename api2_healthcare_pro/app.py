@@ -4,7 +4,7 @@ HealthCare Pro API - API 2 (Hybride REST/HL7)
 Authentification: JWT/OAuth
 Format: API REST classique pour patients/rendez-vous + Endpoints HL7 spécialisés
 - REST API: /api/patients, /api/appointments (JSON simple)
-- HL7 API: /hl7/ADT, /hl7/sample (messages HL7)
+- HL7 API: /hl7/ADT (messages ou lots HL7), /hl7/sample (messages HL7)
 """
 
 from flask import Flask, request, jsonify
@@ -12,11 +12,31 @@ try:
     from flask_cors import CORS
 except ImportError:
     CORS = None
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import uuid
 import jwt
+import gc
 import json
+import os
+import sys
+import threading
+import time
 from functools import wraps
+from itertools import islice
+
+# Les modules partagés (common/) sont à la racine du dépôt
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.store import Database
+from common.expiring import CapacityError, ExpiringDict
+from common.pagination import PageRequest, paginate, list_response
+from common.http_cache import conditional
+from common.response_cache import ResponseCache, cached_list
+from common.search import TrigramIndex
+from common.sorted_index import SortedIndex
+from common import hl7
+from common.changes import parse_changes_args, read_changes
+from common.events import EventBroker, event_stream_response, parse_last_event_id
+from common.fixtures import read_fixture
 
 app = Flask(__name__)
 if CORS:
@@ -29,12 +49,26 @@ JWT_ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_SECONDS = 10  # Token d'accès très court (10 secondes)
 REFRESH_TOKEN_EXPIRE_DAYS = 7     # Refresh token plus long
 
-# Base de données des refresh tokens (en production, utiliser Redis/DB)
-active_refresh_tokens = set()
+# Access tokens déjà vérifiés : token -> (payload, scopes), jusqu'à leur expiration
+TOKEN_CACHE_MAX_ENTRIES = 10000
+verified_tokens = ExpiringDict(max_size=TOKEN_CACHE_MAX_ENTRIES)
+
+# Cache des listes déjà sérialisées (taille maximale en octets, éviction LRU)
+RESPONSE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+response_cache = ResponseCache(max_bytes=RESPONSE_CACHE_MAX_BYTES)
 
 # Base de données simulée
-patients_db = []
-appointments_db = []
+# En mémoire par défaut ; fichier SQLite partagé entre workers si configuré,
+# ex: HEALTHCARE_PRO_DATABASE_URL=sqlite:///healthcare_pro.db
+db = Database(os.environ.get('HEALTHCARE_PRO_DATABASE_URL'))
+
+# Registre des refresh tokens actifs jusqu'à leur expiration
+# (partagé entre workers avec SQLite, éviction au fil des écritures)
+REFRESH_TOKEN_REGISTRY_MAX_ENTRIES = 100000
+active_refresh_tokens = db.registry("refresh_tokens", max_size=REFRESH_TOKEN_REGISTRY_MAX_ENTRIES)
+
+patients_db = db.collection("patients", key="id", indexes=("patient_number",))
+appointments_db = db.collection("appointments", key="appointment_id", indexes=("patient_id", "practitioner"))
 
 # Données de test avec format REST classique
 test_patients_data = [
@@ -114,13 +148,146 @@ test_availabilities_data = [
     }
 ]
 
-# Initialiser avec les données de test
-patients_db.extend(test_patients_data)
-appointments_db.extend(test_appointments_data)
-availabilities_db = list(test_availabilities_data)
+# Données initiales : fixture binaire pré-générée si configurée (benchmarks/datasets.py
+# --format fixture), ex: HEALTHCARE_PRO_FIXTURE=/data/healthcare_pro.fixture ; données de test sinon
+FIXTURE_PATH = os.environ.get('HEALTHCARE_PRO_FIXTURE')
+initial_data = read_fixture(FIXTURE_PATH, "healthcare_pro") if FIXTURE_PATH else {
+    "patients": test_patients_data,
+    "appointments": test_appointments_data,
+    "availabilities": test_availabilities_data
+}
+
+# Initialiser avec les données initiales (si la base est vide)
+patients_db.seed(initial_data.get("patients", ()))
+
+# Index de recherche des patients : construit à la première recherche (voir
+# patient_search_index), puis maintenu à chaque écriture (y compris celles des
+# autres workers, rattrapées par la collection)
+PATIENT_SEARCH_FIELDS = ("full_name", "patient_number", "email", "contact_phone")
+patient_search = TrigramIndex(PATIENT_SEARCH_FIELDS, key="id", compact_fields=("contact_phone",))
+patient_search_built = threading.Event()
+_patient_search_lock = threading.Lock()
+
+def patient_search_index():
+    """Index de recherche des patients, construit au premier appel
+
+    Le démarrage ne paie pas la construction (≈ 5 s pour 200 000 patients) : seule
+    la première recherche d'un worker l'attend. L'abonnement rejoue les patients
+    existants sous le verrou de la collection, sans écriture concurrente perdue.
+    """
+    if not patient_search_built.is_set():
+        with _patient_search_lock:
+            if not patient_search_built.is_set():
+                patients_db.subscribe(patient_search.apply)
+                patient_search_built.set()
+    return patient_search
+
+# Construction au démarrage si demandée (ex: benchmarks), HEALTHCARE_PRO_SEARCH_WARMUP=1
+if os.environ.get('HEALTHCARE_PRO_SEARCH_WARMUP') == '1':
+    patient_search_index()
+
+def parse_appointment_datetime(value):
+    """Date et heure ISO 8601 d'un rendez-vous (ramenée en UTC si un fuseau est donné)"""
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+# Rendez-vous triés par date et heure : requêtes de période en O(log n + k)
+appointment_times = SortedIndex("datetime", key="appointment_id", parse=parse_appointment_datetime)
+appointments_db.subscribe(appointment_times.apply)
+
+def _next_month(start):
+    return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+# Préfixes de date acceptés par ?date= et fin de la période couverte
+DATE_PREFIXES = (
+    ("%Y", lambda start: start.replace(year=start.year + 1)),
+    ("%Y-%m", _next_month),
+    ("%Y-%m-%d", lambda start: start + timedelta(days=1)),
+    ("%Y-%m-%dT%H", lambda start: start + timedelta(hours=1)),
+    ("%Y-%m-%dT%H:%M", lambda start: start + timedelta(minutes=1)),
+)
+
+def date_prefix_period(value):
+    """Période [début, fin) couverte par un préfixe de date (ex: 2024, 2024-03, 2024-03-22)"""
+    for fmt, period_end in DATE_PREFIXES:
+        try:
+            start = datetime.strptime(value, fmt)
+            if start.strftime(fmt) == value:
+                return start, period_end(start)
+        except ValueError:
+            continue
+    raise ValueError("Invalid date (expected a date prefix: YYYY, YYYY-MM, YYYY-MM-DD, "
+                     "YYYY-MM-DDTHH or YYYY-MM-DDTHH:MM)")
+
+def appointment_period(args):
+    """Période [début, fin) demandée via date / from / to, ValueError si invalide"""
+    start = end = None
+    if args.get('date'):
+        start, end = date_prefix_period(args['date'])
+    for name in ('from', 'to'):
+        if not args.get(name):
+            continue
+        try:
+            bound = parse_appointment_datetime(args[name])
+        except ValueError:
+            raise ValueError(f"Invalid '{name}' datetime (expected ISO 8601)")
+        if name == 'from':
+            start = bound if start is None else max(start, bound)
+        else:
+            end = bound if end is None else min(end, bound)
+    return start, end
+
+def select_appointments(filters, start=None, end=None, status=None):
+    """Rendez-vous filtrés, dans l'ordre d'insertion (None = aucun filtre)
+
+    On parcourt la source la plus sélective (période de l'index trié ou index
+    d'égalité) puis on vérifie les autres filtres sur chaque candidat.
+    """
+    filters = {field: value for field, value in filters.items() if value}
+    ranged = start is not None or end is not None
+    if not filters and not ranged and not status:
+        return None
+    
+    if ranged and (not filters or appointment_times.count(start, end)
+                   <= min(appointments_db.count(field, value) for field, value in filters.items())):
+        candidates = appointments_db.in_order(appointments_db.get_many(appointment_times.range(start, end)))
+        candidates = [apt for apt in candidates
+                      if all(apt.get(field) == value for field, value in filters.items())]
+    else:
+        candidates = appointments_db.query(**filters)  # Déjà dans l'ordre d'insertion
+        if ranged:
+            candidates = [
+                apt for apt in candidates
+                if (value := appointment_times.value(apt["appointment_id"])) is not None
+                and (start is None or value >= start) and (end is None or value < end)
+            ]
+    
+    if status:
+        # Les rendez-vous sans statut sont réservés ("booked")
+        candidates = [apt for apt in candidates if apt.get("status", "booked") == status]
+    return candidates
+
+appointments_db.seed(initial_data.get("appointments", ()))
+availabilities_db = db.collection("availabilities", key="availability_id", indexes=("day", "practitioner"))
+availabilities_db.seed(initial_data.get("availabilities", ()))
+del initial_data
+if FIXTURE_PATH:
+    gc.freeze()  # Données chargées exclues des passages du ramasse-miettes (et partagées après fork)
+
+# Modifications de patients et de rendez-vous poussées aux abonnés de GET /api/events
+event_broker = EventBroker(db, (patients_db, appointments_db))
+# Durée d'un flux, indépendante du token d'accès (10 s) : le client se reconnecte
+# avec un token valide et Last-Event-ID, l'autorisation est revérifiée à chaque connexion
+EVENT_STREAM_MAX_SECONDS = 300
 
 def generate_tokens(user_id="healthcare_user", scopes=None):
-    """Générer un access token et un refresh token"""
+    """Générer un access token et un refresh token
+
+    CapacityError si le registre des refresh tokens est plein de tokens valables
+    (aucun n'est révoqué pour faire de la place).
+    """
     if scopes is None:
         scopes = ['read:patients', 'write:patients', 'read:appointments', 'write:appointments', 'hl7:process', 'write:tokens']
     
@@ -149,7 +316,7 @@ def generate_tokens(user_id="healthcare_user", scopes=None):
     refresh_token = jwt.encode(refresh_payload, JWT_REFRESH_SECRET, algorithm=JWT_ALGORITHM)
     
     # Stocker le refresh token comme actif
-    active_refresh_tokens.add(refresh_token_id)
+    active_refresh_tokens.add(refresh_token_id, time.time() + REFRESH_TOKEN_EXPIRE_DAYS * 24 * 3600)
     
     return access_token, refresh_token
 
@@ -171,15 +338,22 @@ def require_jwt_auth(required_scopes=None):
                 return jsonify({"error": "Missing authorization token"}), 401
             
             try:
-                payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-                
-                # Vérifier que c'est un access token
-                if payload.get('type') != 'access':
-                    return jsonify({"error": "Invalid token type"}), 401
+                # Token déjà vérifié et non expiré : pas de nouveau décodage ni de vérification de signature
+                cached = verified_tokens.get(token)
+                if cached is None:
+                    payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+                    
+                    # Vérifier que c'est un access token
+                    if payload.get('type') != 'access':
+                        return jsonify({"error": "Invalid token type"}), 401
+                    
+                    cached = (payload, frozenset(payload.get('scope', [])))
+                    if 'exp' in payload:
+                        verified_tokens.set(token, cached, payload['exp'])
+                payload, user_scopes = cached
                 
                 # Vérifier les scopes si requis
                 if required_scopes:
-                    user_scopes = payload.get('scope', [])
                     missing_scopes = [scope for scope in required_scopes if scope not in user_scopes]
                     if missing_scopes:
                         return jsonify({
@@ -208,6 +382,13 @@ def require_jwt_auth(required_scopes=None):
     
     return decorator
 
+def success_envelope():
+    """Champs communs des réponses de liste (horodatage recalculé à chaque réponse)"""
+    return {
+        "success": True,
+        "timestamp": datetime.utcnow().strftime("%a, %d %b %Y %H:%M:%S GMT")
+    }
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
@@ -220,9 +401,17 @@ def health_check():
             "hl7": "/hl7/* (ADT messages)"
         },
         "authentication": "JWT Bearer Token",
-        "timestamp": datetime.utcnow().strftime("%a, %d %b %Y %H:%M:%S GMT")
+        "timestamp": datetime.utcnow().strftime("%a, %d %b %Y %H:%M:%S GMT"),
+        "response_cache": response_cache.stats(),
+        "refresh_tokens": active_refresh_tokens.stats(),
+        "patient_search": {"built": patient_search_built.is_set(), "documents": len(patient_search)},
+        "events": event_broker.stats()
     })
 
+def refresh_registry_full():
+    """503 : registre des refresh tokens plein, émission refusée"""
+    return jsonify({"error": "Refresh token registry full, retry later"}), 503
+
 @app.route('/auth/token', methods=['POST'])
 def get_token():
     """Endpoint pour obtenir des tokens JWT (OAuth 2.0 avec refresh)"""
@@ -241,7 +430,10 @@ def get_token():
             available_scopes = ['read:patients', 'write:patients', 'read:appointments', 'write:appointments', 'hl7:process', 'write:tokens']
             granted_scopes = [scope for scope in requested_scopes if scope in available_scopes] or available_scopes
             
-            access_token, refresh_token = generate_tokens(scopes=granted_scopes)
+            try:
+                access_token, refresh_token = generate_tokens(scopes=granted_scopes)
+            except CapacityError:
+                return refresh_registry_full()
             
             return jsonify({
                 "access_token": access_token,
@@ -267,18 +459,26 @@ def get_token():
             if payload.get('type') != 'refresh':
                 return jsonify({"error": "Invalid token type"}), 401
             
-            # Vérifier que le token est encore actif
+            # Vérifier que le token est encore actif et le révoquer dans la même
+            # opération (un refresh token ne peut être échangé qu'une fois, même
+            # si deux workers reçoivent la requête en parallèle)
             token_id = payload.get('token_id')
-            if token_id not in active_refresh_tokens:
+            if not active_refresh_tokens.consume(token_id):
                 return jsonify({"error": "Refresh token has been revoked"}), 401
             
             # Générer de nouveaux tokens
             user_id = payload.get('user_id')
             scopes = payload.get('scope', [])
-            new_access_token, new_refresh_token = generate_tokens(user_id, scopes)
-            
-            # Révoquer l'ancien refresh token
-            active_refresh_tokens.discard(token_id)
+            try:
+                new_access_token, new_refresh_token = generate_tokens(user_id, scopes)
+            except CapacityError:
+                # Rendre l'ancien refresh token utilisable pour un nouvel essai (au
+                # mieux : un autre worker a pu prendre la place libérée entre-temps)
+                try:
+                    active_refresh_tokens.add(token_id, payload['exp'])
+                except CapacityError:
+                    pass
+                return refresh_registry_full()
             
             return jsonify({
                 "access_token": new_access_token,
@@ -314,8 +514,7 @@ def revoke_token():
         payload = jwt.decode(refresh_token, JWT_REFRESH_SECRET, algorithms=[JWT_ALGORITHM])
         token_id = payload.get('token_id')
         
-        if token_id in active_refresh_tokens:
-            active_refresh_tokens.discard(token_id)
+        if active_refresh_tokens.consume(token_id):
             return jsonify({"message": "Token revoked successfully"})
         else:
             return jsonify({"message": "Token was already revoked"})
@@ -326,30 +525,50 @@ def revoke_token():
 # PATIENTS ENDPOINTS (REST API)
 @app.route('/api/patients', methods=['GET'])
 @require_jwt_auth(['read:patients'])
+@conditional(patients_db)
+@cached_list(response_cache, patients_db, envelope=success_envelope)
 def get_patients():
     """Récupérer tous les patients (format REST classique)"""
+    try:
+        page = PageRequest.from_args(request.args)
+    except ValueError as e:
+        return jsonify({"success": False, "error": "Invalid request", "message": str(e)}), 400
+    
     # Filtrage optionnel
-    search = request.args.get('search', '').lower()
+    search = request.args.get('search', '')
     active_only = request.args.get('active') == 'true'
     
-    filtered_patients = patients_db
-    
     if search:
+        return search_patients(page, search, active_only)
+    
+    filtered_patients = None
+    
+    if active_only:
         filtered_patients = [
-            p for p in filtered_patients 
-            if search in p.get('full_name', '').lower() 
-            or search in p.get('patient_number', '').lower()
+            p for p in (patients_db if filtered_patients is None else filtered_patients)
+            if p.get('active', True)
         ]
     
+    entries, total = paginate(patients_db, page, filtered_patients)
+    return list_response(page, "data", entries, total, envelope=success_envelope())
+
+
+def search_patients(page, search, active_only):
+    """Recherche classée via l'index trigrammes (nom, numéro patient, email, téléphone)
+
+    Le curseur désigne un rang dans le classement : seuls les `limit` premiers
+    résultats après ce rang sont triés.
+    """
+    accept = None
     if active_only:
-        filtered_patients = [p for p in filtered_patients if p.get('active', True)]
-    
-    return jsonify({
-        "success": True,
-        "data": filtered_patients,
-        "total": len(filtered_patients),
-        "timestamp": datetime.utcnow().strftime("%a, %d %b %Y %H:%M:%S GMT")
-    })
+        accept = lambda patient_id: patients_db.get(patient_id).get('active', True)
+    limit = None if page.limit is None else page.after + page.limit + 1
+    patient_ids, total = patient_search_index().search(search, limit=limit, accept=accept)
+    entries = (
+        (rank, patients_db.get(patient_id))
+        for rank, patient_id in enumerate(patient_ids, 1) if rank > page.after
+    )
+    return list_response(page, "data", entries, total, envelope=success_envelope())
 
 
 @app.route('/api/patients', methods=['POST'])
@@ -391,7 +610,7 @@ def create_patient():
         "registered_date": datetime.utcnow().strftime("%a, %d %b %Y %H:%M:%S GMT")
     }
     
-    patients_db.append(new_patient)
+    patients_db.insert(new_patient)
     
     return jsonify({
         "success": True,
@@ -403,40 +622,34 @@ def create_patient():
 # APPOINTMENTS ENDPOINTS (REST API)
 @app.route('/api/appointments', methods=['GET'])
 @require_jwt_auth(['read:appointments'])
+@conditional(appointments_db)
+@cached_list(response_cache, appointments_db, envelope=success_envelope)
 def get_appointments():
     """Récupérer tous les rendez-vous (format REST classique)"""
-    # Filtrage optionnel
-    date_filter = request.args.get('date')
-    status_filter = request.args.get('status')
-    patient_id = request.args.get('patient_id')
-    doctor_id = request.args.get('doctor_id')
-    
-    filtered_appointments = appointments_db
+    try:
+        page = PageRequest.from_args(request.args)
+        start, end = appointment_period(request.args)
+    except ValueError as e:
+        return jsonify({"success": False, "error": "Invalid request", "message": str(e)}), 400
     
-    if date_filter:
-        filtered_appointments = [
-            apt for apt in filtered_appointments 
-            if apt["datetime"].startswith(date_filter)
-        ]
+    # Filtrage optionnel (doctor_id désigne le praticien)
+    filters = {
+        "patient_id": request.args.get('patient_id'),
+        "practitioner": request.args.get('practitioner') or request.args.get('doctor_id')
+    }
+    status_filter = request.args.get('status')
     
-    if patient_id:
-        filtered_appointments = [
-            apt for apt in filtered_appointments 
-            if apt["patient_id"] == patient_id
-        ]
+    filtered_appointments = select_appointments(filters, start, end, status_filter)
     
-    return jsonify({
-        "success": True,
-        "data": filtered_appointments,
-        "total": len(filtered_appointments),
-        "timestamp": datetime.utcnow().strftime("%a, %d %b %Y %H:%M:%S GMT")
-    })
+    entries, total = paginate(appointments_db, page, filtered_appointments)
+    return list_response(page, "data", entries, total, envelope=success_envelope())
 
 @app.route('/api/appointments/<appointment_id>', methods=['GET'])
 @require_jwt_auth(['read:appointments'])
+@conditional(appointments_db, item_arg='appointment_id')
 def get_appointment(appointment_id):
     """Récupérer un rendez-vous spécifique"""
-    appointment = next((a for a in appointments_db if a["appointment_id"] == appointment_id), None)
+    appointment = appointments_db.get(appointment_id)
     if not appointment:
         return jsonify({
             "success": False,
@@ -474,7 +687,7 @@ def create_appointment():
         }), 400
     
     # Vérifier que le patient existe
-    patient = next((p for p in patients_db if p["id"] == data.get('patient_id')), None)
+    patient = patients_db.get(data.get('patient_id'))
     if not patient:
         return jsonify({
             "success": False,
@@ -493,7 +706,7 @@ def create_appointment():
         "created": datetime.utcnow().strftime("%a, %d %b %Y %H:%M:%S GMT")
     }
     
-    appointments_db.append(new_appointment)
+    appointments_db.insert(new_appointment)
     
     return jsonify({
         "success": True,
@@ -505,8 +718,7 @@ def create_appointment():
 @require_jwt_auth(['write:appointments'])
 def update_appointment(appointment_id):
     """Mettre à jour un rendez-vous"""
-    appointment = next((a for a in appointments_db if a["appointment_id"] == appointment_id), None)
-    if not appointment:
+    if appointment_id not in appointments_db:
         return jsonify({
             "success": False,
             "error": "Appointment not found"
@@ -520,12 +732,11 @@ def update_appointment(appointment_id):
             "message": "JSON data required"
         }), 400
     
-    # Mettre à jour les champs
+    # Mettre à jour les champs (via la collection : version et ETag incrémentés)
     updatable_fields = ['practitioner', 'datetime', 'length_minutes', 'type', 'notes']
     
-    for field in updatable_fields:
-        if field in data:
-            appointment[field] = data[field]
+    changes = {field: data[field] for field in updatable_fields if field in data}
+    appointment = appointments_db.update(appointment_id, changes)
     
     return jsonify({
         "success": True,
@@ -537,15 +748,12 @@ def update_appointment(appointment_id):
 @require_jwt_auth(['write:appointments'])
 def delete_appointment(appointment_id):
     """Supprimer un rendez-vous"""
-    appointment = next((a for a in appointments_db if a["appointment_id"] == appointment_id), None)
-    if not appointment:
+    if appointments_db.delete(appointment_id) is None:
         return jsonify({
             "success": False,
             "error": "Appointment not found"
         }), 404
     
-    appointments_db.remove(appointment)
-    
     return jsonify({
         "success": True,
         "message": "Appointment deleted successfully"
@@ -554,34 +762,293 @@ def delete_appointment(appointment_id):
 # AVAILABILITIES ENDPOINTS
 @app.route('/api/availabilities', methods=['GET'])
 @require_jwt_auth(['read:appointments'])
+@conditional(availabilities_db)
+@cached_list(response_cache, availabilities_db, envelope=success_envelope)
 def get_availabilities():
     """Récupérer les disponibilités"""
+    try:
+        page = PageRequest.from_args(request.args)
+    except ValueError as e:
+        return jsonify({"success": False, "error": "Invalid request", "message": str(e)}), 400
+    
     # Filtrage optionnel par date ou praticien
-    day_filter = request.args.get('day')
-    practitioner_filter = request.args.get('practitioner')
+    filters = {
+        "day": request.args.get('day'),
+        "practitioner": request.args.get('practitioner')
+    }
+    filtered_availabilities = availabilities_db.query(**filters) if any(filters.values()) else None
     
-    filtered_availabilities = availabilities_db
+    entries, total = paginate(availabilities_db, page, filtered_availabilities)
+    return list_response(page, "data", entries, total, envelope=success_envelope())
+
+# FLUX DE MODIFICATIONS
+@app.route('/api/changes', methods=['GET'])
+@require_jwt_auth(['read:patients', 'read:appointments'])
+def get_changes():
+    """Créations, modifications et suppressions depuis la séquence `since` (synchronisation incrémentale)"""
+    try:
+        since, limit = parse_changes_args(request.args)
+    except ValueError as e:
+        return jsonify({"success": False, "error": "Invalid request", "message": str(e)}), 400
     
-    if day_filter:
-        filtered_availabilities = [av for av in filtered_availabilities if av["day"] == day_filter]
+    page = read_changes(db, since, limit)
+    if page is None:
+        return jsonify({
+            "success": False,
+            "error": "Sequence expired",
+            "message": "Deletions before this sequence are no longer retained, full resync required",
+            "horizon": db.backend.change_horizon(),
+            "last_seq": db.backend.last_rev(),
+            "resync_since": 0
+        }), 410
+    return jsonify({**success_envelope(), "data": page.pop("changes"), **page})
+
+# FLUX D'ÉVÉNEMENTS (SSE)
+@app.route('/api/events', methods=['GET'])
+@require_jwt_auth(['read:patients', 'read:appointments'])
+def get_events():
+    """Modifications de patients et de rendez-vous poussées en Server-Sent Events (reprise par Last-Event-ID)
+
+    Le flux se termine après EVENT_STREAM_MAX_SECONDS : le client se reconnecte
+    avec un token valide et Last-Event-ID, sans perdre d'événement. Le token et ses
+    scopes sont vérifiés à chaque connexion : un client révoqué ne se réabonne pas.
+    """
+    try:
+        last_event_id = parse_last_event_id(request.headers, request.args)
+    except ValueError as e:
+        return jsonify({"success": False, "error": "Invalid request", "message": str(e)}), 400
     
-    if practitioner_filter:
-        filtered_availabilities = [av for av in filtered_availabilities if av["practitioner"] == practitioner_filter]
+    subscription = event_broker.subscribe(last_event_id, expires_at=time.time() + EVENT_STREAM_MAX_SECONDS)
+    if subscription is None:
+        return jsonify({
+            "success": False,
+            "error": "Service unavailable",
+            "message": "Too many event subscribers, retry later"
+        }), 503
+    return event_stream_response(subscription)
+
+# ENDPOINT HL7
+HL7_MAPPED_EVENTS = ("A01", "A04", "A08")  # Admission, inscription, mise à jour patient
+HL7_COMMIT_BATCH = 500  # Messages d'un lot écrits par transaction
+HL7_VISIT_TYPES = {"I": "admission", "E": "emergency", "O": "consultation"}  # Classe patient (PV1-2)
+HL7_VISIT_ID_PREFIX = "hcp-visit-"  # Rendez-vous d'une visite : espace distinct des ids REST et fixtures
+
+def component(components, number):
+    """Composant n (1..n) d'une liste de composants HL7, '' s'il est absent"""
+    return components[number - 1] if len(components) >= number else ''
+
+def hl7_phone(xtn):
+    """Numéro de téléphone d'un XTN : numéro brut, sinon +pays, zone et numéro local"""
+    if component(xtn, 1):
+        return component(xtn, 1)
+    number = component(xtn, 6) + component(xtn, 7)
+    country = component(xtn, 5)
+    return f"+{country}{number}" if country and number else number
+
+def patient_changes_from_pid(pid):
+    """Champs patient (format REST) renseignés dans un segment PID"""
+    changes = {}
+    name = pid.components(5)
+    full_name = ' '.join(part for part in (component(name, 2), component(name, 3), component(name, 1)) if part)
+    if full_name:
+        changes["full_name"] = full_name
+    birth = hl7.parse_timestamp(pid.get(7))
+    if birth:
+        changes["date_of_birth"] = birth.strftime("%d/%m/%Y")
+    gender = pid.get(8)
+    if gender:
+        changes["gender"] = gender
+    address = pid.components(11)
+    for field, number in (("street_address", 1), ("city", 3), ("postal_code", 5)):
+        if component(address, number):
+            changes[field] = component(address, number)
+    # Téléphones personnel (PID-13) puis professionnel (PID-14) ; email en XTN "Internet"
+    for number in (13, 14):
+        for repetition in range(1, pid.repetitions(number) + 1):
+            xtn = pid.components(number, repetition)
+            if component(xtn, 3) == "Internet" or component(xtn, 2) == "NET":
+                changes.setdefault("email", component(xtn, 4))
+            elif "contact_phone" not in changes:
+                phone = hl7_phone(xtn)
+                if phone:
+                    changes["contact_phone"] = phone
+    return changes
+
+def medical_record_number(pid):
+    """Identifiant patient de type MR dans PID-3 (première répétition sinon)"""
+    for repetition in range(1, pid.repetitions(3) + 1):
+        if pid.get(3, 5, repetition) == "MR":
+            return pid.get(3, 1, repetition)
+    return pid.get(3, 1)
+
+def upsert_patient_from_pid(pid):
+    """Créer ou mettre à jour le patient d'un segment PID -> patient"""
+    changes = patient_changes_from_pid(pid)
+    patient_number = medical_record_number(pid)
+    existing = patients_db.find("patient_number", patient_number) if patient_number else []
+    if existing:
+        return patients_db.update(existing[0]["id"], changes)
     
-    return jsonify({
-        "success": True,
-        "data": filtered_availabilities,
-        "total": len(filtered_availabilities),
-        "timestamp": datetime.utcnow().strftime("%a, %d %b %Y %H:%M:%S GMT")
+    patient = {
+        "id": f"hcp-patient-{str(uuid.uuid4())[:8]}",
+        "patient_number": patient_number or f"HCP{len(patients_db) + 1:03d}",
+        "full_name": "",
+        "email": "",
+        "contact_phone": "",
+        "gender": "",
+        "date_of_birth": "",
+        "street_address": "",
+        "city": "",
+        "postal_code": "",
+        **changes,
+        "registered_date": datetime.utcnow().strftime("%a, %d %b %Y %H:%M:%S GMT")
+    }
+    return patients_db.insert(patient)
+
+def upsert_visit_from_pv1(pv1, patient, event):
+    """Créer ou mettre à jour le rendez-vous d'une visite PV1 (ignoré sans date d'admission)
+
+    Le rendez-vous d'une visite numérotée (PV1-19) a pour id `hcp-visit-<numéro>`
+    et garde son numéro (`visit_number`) ; ValueError si cet id désigne un
+    rendez-vous qui ne provient pas de cette visite HL7.
+    """
+    admitted = hl7.parse_timestamp(pv1.get(44))
+    if admitted is None:
+        return None
+    
+    doctor = pv1.components(7)
+    family, given = component(doctor, 2), component(doctor, 3)
+    prefix = (component(doctor, 6) or "Dr").rstrip('.')
+    location = ' '.join(part for part in pv1.components(3)[:3] if part)
+    visit = {
+        "patient_id": patient["id"],
+        "practitioner": f"{prefix}. {given} {family}".replace("  ", " ") if family else "",
+        "datetime": admitted.isoformat(),
+        "type": HL7_VISIT_TYPES.get(pv1.get(2), "checkup"),
+        "notes": f"HL7 ADT^{event}" + (f" - {location}" if location else ""),
+    }
+    
+    visit_number = pv1.get(19, 1)
+    if not visit_number:
+        appointment_id = f"{HL7_VISIT_ID_PREFIX}{str(uuid.uuid4())[:8]}"
+    else:
+        appointment_id = f"{HL7_VISIT_ID_PREFIX}{visit_number}"
+        existing = appointments_db.get(appointment_id)
+        if existing is not None:
+            if existing.get("visit_number") != visit_number:
+                raise ValueError(f"appointment {appointment_id} was not created from HL7 visit {visit_number}")
+            return appointments_db.update(appointment_id, visit)
+    return appointments_db.insert({
+        "appointment_id": appointment_id,
+        "length_minutes": 30,
+        **visit,
+        "visit_number": visit_number or None,
+        "created": datetime.utcnow().strftime("%a, %d %b %Y %H:%M:%S GMT")
     })
 
-# ENDPOINT HL7 SIMULÉ
+def handle_adt_message(message):
+    """Traiter un message ADT -> (code d'accusé MSA-1, texte)
+
+    A01/A04/A08 : le patient (PID) est créé ou mis à jour par numéro patient,
+    la visite (PV1) devient un rendez-vous identifié par son numéro de visite.
+    ValueError / TypeError si le message ne peut pas être appliqué : ses écritures
+    déjà faites sont annulées avec la transaction (voir acknowledge_messages).
+    """
+    if not message.has_header:
+        return hl7.REJECT, "Missing MSH segment"
+    message_type, event = message.message_type
+    if message_type != "ADT":
+        return hl7.REJECT, f"Unsupported message type: {message_type or 'missing'}"
+    event = event or (message.segment('EVN').get(1) if message.segment('EVN') else '')
+    if event not in HL7_MAPPED_EVENTS:
+        return hl7.ACCEPT, f"Message accepted (event {event or 'missing'} not mapped)"
+    
+    pid = message.segment('PID')
+    if pid is None:
+        return hl7.ERROR, "Missing PID segment"
+    patient = upsert_patient_from_pid(pid)
+    pv1 = message.segment('PV1')
+    if pv1 is not None:
+        upsert_visit_from_pv1(pv1, patient, event)
+    return hl7.ACCEPT, "Message accepted and processed successfully"
+
+def acknowledge_messages(messages):
+    """Accusés (segments) d'une liste de messages, appliqués en une transaction
+
+    Si un message ne peut pas être appliqué, la transaction est annulée et les
+    messages sont rejoués un par un, chacun dans sa transaction : les autres sont
+    appliqués et acquittés normalement, celui qui échoue reçoit un AE sans laisser
+    d'écriture (pas de patient mis à jour sans sa visite).
+    """
+    try:
+        with db.transaction():
+            return [hl7.ack_segments(message, *handle_adt_message(message)) for message in messages]
+    except (ValueError, TypeError):
+        pass
+    return [acknowledge_message(message) for message in messages]
+
+def acknowledge_message(message):
+    """Accusé (segments) d'un message appliqué seul dans sa transaction"""
+    try:
+        with db.transaction():
+            return hl7.ack_segments(message, *handle_adt_message(message))
+    except (ValueError, TypeError) as e:
+        return hl7.ack_segments(message, hl7.ERROR, f"Message could not be applied: {e}")
+
+def acknowledge_hl7(chunks):
+    """Traiter un corps HL7 lu en flux -> accusé (texte), None si ce n'est pas du HL7
+
+    Un message seul reçoit un ACK simple ; plusieurs messages ou un lot
+    (FHS/BHS) reçoivent un lot d'accusés avec un MSA par message.
+    """
+    reader = hl7.HL7Reader(chunks)
+    messages = reader.messages()
+    acks = []
+    while True:
+        # Lot lu et découpé avant la transaction : un client lent ne bloque pas les écritures
+        batch = list(islice(messages, HL7_COMMIT_BATCH))
+        # Écritures regroupées par transaction (un commit pour HL7_COMMIT_BATCH messages)
+        acks.extend(acknowledge_messages(batch))
+        if len(batch) < HL7_COMMIT_BATCH:
+            break
+    if len(acks) <= 1 and not reader.envelope:
+        # Corps vide ou sans MSH : pas du HL7 (un message refusé reçoit son accusé AR)
+        if not acks or not batch[0].has_header:
+            return None
+    terminator = (reader.terminator or b'\r').decode('ascii')
+    return terminator.join(hl7_response(reader, acks))
+
+def hl7_response(reader, acks):
+    """Segments de réponse : ACK simple pour un message seul, lot d'accusés sinon"""
+    if len(acks) == 1 and not reader.envelope:
+        return acks[0]
+    return hl7.batch_ack(acks, reader.envelope)
+
+def acknowledge_mllp(payloads):
+    """Traiter des trames MLLP d'une connexion -> accusés (bytes), un par trame
+
+    Même traitement que POST /hl7/ADT : les messages de toutes les trames sont
+    appliqués en une transaction, un message en échec n'empêche pas l'accusé des
+    autres (voir acknowledge_messages). Une trame sans MSH reçoit un accusé AR
+    (pas de réponse d'erreur HTTP en MLLP).
+    """
+    readers = [hl7.HL7Reader((payload,)) for payload in payloads]
+    frames = [list(reader.messages()) for reader in readers]
+    acks = iter(acknowledge_messages([message for messages in frames for message in messages]))
+    responses = []
+    for reader, messages in zip(readers, frames):
+        frame_acks = list(islice(acks, len(messages)))
+        if not frame_acks:
+            frame_acks.append(hl7.ack_segments(hl7.Message(b'', []), hl7.REJECT, "Missing MSH segment"))
+        responses.append('\r'.join(hl7_response(reader, frame_acks)).encode('utf-8'))
+    return responses
+
 @app.route('/hl7/ADT', methods=['POST'])
 @require_jwt_auth(['hl7:process'])
 def process_hl7_adt():
     """
-    Endpoint HL7 simulé pour les messages ADT (Admit, Discharge, Transfer)
-    Accepte du pseudo-HL7 et retourne une confirmation
+    Endpoint HL7 pour les messages ADT (Admit, Discharge, Transfer)
+    Accepte un message, plusieurs messages ou un lot FHS/BHS et retourne les accusés
     """
     content_type = request.headers.get('Content-Type', '')
     
@@ -590,25 +1057,14 @@ def process_hl7_adt():
             "error": "Invalid content type. Expected application/hl7-v2 or text/plain"
         }), 400
     
-    hl7_message = request.data.decode('utf-8')
+    # Corps lu par blocs : les messages sont traités au fil de la lecture
+    response_hl7 = acknowledge_hl7(iter(lambda: request.stream.read(hl7.READ_CHUNK_SIZE), b''))
     
-    # Simulation de parsing HL7
-    lines = hl7_message.split('\n')
-    msh_segment = next((line for line in lines if line.startswith('MSH')), None)
-    
-    if not msh_segment:
+    if response_hl7 is None:
         return jsonify({
             "error": "Invalid HL7 message: Missing MSH segment"
         }), 400
     
-    # Extraire quelques informations basiques
-    segments = msh_segment.split('|')
-    message_control_id = segments[9] if len(segments) > 9 else str(uuid.uuid4())
-    
-    # Simuler le processing
-    response_hl7 = f"""MSH|^~\\&|HEALTHCARE_PRO|HCP_SYSTEM|SENDING_APP|SENDING_FACILITY|{datetime.utcnow().strftime('%Y%m%d%H%M%S')}||ACK|{message_control_id}|P|2.4
-MSA|AA|{message_control_id}|Message accepted and processed successfully"""
-    
     return response_hl7, 200, {'Content-Type': 'application/hl7-v2'}
 
 @app.route('/hl7/sample', methods=['GET'])
@@ -616,13 +1072,12 @@ def get_hl7_sample():
     """Retourner un exemple de message HL7 ADT"""
     sample_hl7 = """MSH|^~\\&|SENDING_APP|SENDING_FACILITY|HEALTHCARE_PRO|HCP_SYSTEM|20240322143000||ADT^A01|12345|P|2.4
 EVN|A01|20240322143000
-PID|1||HCP001^^^HCP^MR||Dubois^Pierre^Michel||19781108|M||||||^PRN^PH^^^33^145678901
-PV1|1|I|ICU^101^1|||^Garcia^Elena^Dr|||||||||||12345|||||||||||||||||||||20240322100000"""
+PID|1||HCP001^^^HCP^MR||Dubois^Pierre^Michel||19781108|M|||789 Boulevard de l'Hôpital^^Marseille^^13005||^PRN^PH^^33^1^45678901
+PV1|1|I|ICU^101^1||||^Garcia^Elena^^^Dr||||||||||||12345|||||||||||||||||||||||||20240322100000"""
     
     return sample_hl7, 200, {'Content-Type': 'application/hl7-v2'}
 
 if __name__ == '__main__':
-    import os
     port = int(os.environ.get('PORT', 5002))
     print("🏥 HealthCare Pro API (Hybride REST/HL7) starting...")
     print("🔐 OAuth 2.0 with JWT + Refresh Tokens enabled")
@@ -630,7 +1085,7 @@ if __name__ == '__main__':
     print("   client_id: healthcare_pro_client")
     print("   client_secret: healthcare_secret_2024")
     print("   grant_types: client_credentials, refresh_token")
-    print("📚 Test data loaded:")
+    print(f"📚 {'Fixture ' + FIXTURE_PATH if FIXTURE_PATH else 'Test data'} loaded:")
     print(f"   - {len(patients_db)} patients (REST format)")
     print(f"   - {len(appointments_db)} appointments (REST format)")
     print(f"   - {len(availabilities_db)} availabilities (REST format)")
@@ -645,6 +1100,8 @@ if __name__ == '__main__':
     print("   - GET/POST /api/patients")
     print("   - GET/POST/PUT/DELETE /api/appointments")
     print("   - GET /api/availabilities")
+    print("   - GET /api/changes (incremental sync)")
+    print("   - GET /api/events (server-sent events)")
     print("🔗 HL7 endpoints:")
     print("   - POST /hl7/ADT (ADT messages)")
     print("   - GET /hl7/sample (sample message)")
@@ -0,0 +1,14 @@
+#!/usr/bin/env python3
+"""
+HealthCare Pro API - point d'entrée ASGI (asyncio)
+Mêmes routes (REST et HL7), même authentification JWT, mêmes réponses que app.py
+Lancement : gunicorn --worker-class uvicorn.workers.UvicornWorker --workers 2 --bind 0.0.0.0:5002 asgi:application
+"""
+
+import os
+
+from app import app
+from common.asgi import ASGIApp
+
+# Threads exécutant les vues ; les connexions elles-mêmes ne consomment pas de thread
+application = ASGIApp(app, max_threads=int(os.environ.get('ASGI_MAX_THREADS', 32)))
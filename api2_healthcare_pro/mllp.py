@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+HealthCare Pro API - écoute MLLP (HL7 v2 sur connexions TCP persistantes), optionnelle
+Mêmes traitements et mêmes accusés que POST /hl7/ADT, sans en-têtes HTTP par message
+MLLP n'a pas d'authentification : écoute locale par défaut (MLLP_HOST), à ouvrir
+aux seuls moteurs d'interface (pare-feu, VPN)
+Avec HEALTHCARE_PRO_DATABASE_URL (SQLite partagé), les écritures sont visibles des workers HTTP
+Lancement : python mllp.py
+"""
+
+import asyncio
+import logging
+import os
+
+from app import acknowledge_mllp
+from common.mllp import MLLPServer
+
+MLLP_HOST = os.environ.get('MLLP_HOST', '127.0.0.1')
+MLLP_PORT = int(os.environ.get('MLLP_PORT', 2575))
+
+
+def build_server():
+    return MLLPServer(
+        acknowledge_mllp,
+        max_connections=int(os.environ.get('MLLP_MAX_CONNECTIONS', 100)),
+        max_pending=int(os.environ.get('MLLP_MAX_PENDING', 32)),
+        max_concurrency=int(os.environ.get('MLLP_MAX_CONCURRENCY', 4)),
+        max_message_bytes=int(os.environ.get('MLLP_MAX_MESSAGE_BYTES', 1024 * 1024)),
+        idle_timeout=float(os.environ.get('MLLP_IDLE_TIMEOUT', 300)),
+    )
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    print(f"🏥 HealthCare Pro MLLP listener on {MLLP_HOST}:{MLLP_PORT}")
+    try:
+        asyncio.run(build_server().serve_forever(MLLP_HOST, MLLP_PORT))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark : mode ASGI (uvicorn, asgi.py) vs déploiement synchrone actuel (gunicorn sync, app.py)
+- Démarre successivement les deux serveurs de l'API choisie en local
+- Garde des connexions lentes ouvertes pendant la mesure (en-têtes envoyés une
+  ligne par seconde, comme un émetteur HL7 sur un lien lent)
+- Mesure le débit et les latences p50/p95/p99 de clients rapides en keep-alive
+- Rapport JSON (sortie standard ou --output)
+
+Usage : python benchmarks/asgi_vs_sync.py --api medscheduler --slow-clients 50 --connections 100
+"""
+
+import argparse
+import asyncio
+import time
+
+from harness import APIS, medscheduler_signer, read_response, running_server, summarize, write_report
+
+DEFAULT_PATHS = {"medscheduler": "/patients", "healthcare_pro": "/health"}
+
+
+async def fast_client(port, raw_request, deadline, timeout, latencies, errors):
+    reader = writer = None
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(raw_request)
+            response, keep_alive = await asyncio.wait_for(read_response(reader, 'GET'), timeout)
+            if response.status != 200:
+                errors.append(response.status)
+            else:
+                latencies.append(time.perf_counter() - started)
+            if not keep_alive:
+                writer.close()
+                reader = writer = None
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as e:
+            errors.append(type(e).__name__)
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def slow_client(port, deadline):
+    """Connexion qui n'envoie qu'une ligne d'en-tête par seconde jusqu'à la fin de la mesure"""
+    try:
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(b'POST /health HTTP/1.1\r\nHost: localhost\r\n')
+        while time.perf_counter() < deadline:
+            await asyncio.sleep(1)
+            writer.write(b'X-Slow-Link: 1\r\n')
+            await writer.drain()
+        writer.close()
+    except OSError:
+        pass
+
+
+async def measure(port, raw_request, args):
+    latencies, errors = [], []
+    slow_deadline = time.perf_counter() + args.duration + 2
+    slow = [asyncio.create_task(slow_client(port, slow_deadline)) for _ in range(args.slow_clients)]
+    await asyncio.sleep(1)  # Connexions lentes établies avant la mesure
+
+    started = time.perf_counter()
+    deadline = started + args.duration
+    await asyncio.gather(*[
+        fast_client(port, raw_request, deadline, args.timeout, latencies, errors)
+        for _ in range(args.connections)
+    ])
+    elapsed = time.perf_counter() - started
+    for task in slow:
+        task.cancel()
+
+    return summarize(latencies, errors, elapsed)
+
+
+def run_mode(mode, args, raw_request):
+    with running_server(args.api, mode, args.workers) as port:
+        result = asyncio.run(measure(port, raw_request, args))
+    return {"mode": mode, "server": "gunicorn (sync)" if mode == "sync" else "uvicorn (asgi)", **result}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--api', choices=sorted(APIS), default='medscheduler')
+    parser.add_argument('--path', help="Endpoint GET mesuré (défaut selon l'API)")
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--connections', type=int, default=100, help="Clients rapides (keep-alive)")
+    parser.add_argument('--slow-clients', type=int, default=50, help="Connexions lentes maintenues")
+    parser.add_argument('--duration', type=float, default=10.0, help="Durée de mesure (secondes)")
+    parser.add_argument('--timeout', type=float, default=10.0, help="Délai maximal d'une requête")
+    parser.add_argument('--modes', default='sync,asgi')
+    parser.add_argument('--output', help="Fichier du rapport JSON")
+    args = parser.parse_args()
+
+    path = args.path or DEFAULT_PATHS[args.api]
+    # Signature HMAC calculée une fois : un GET n'est pas soumis à l'anti-rejeu
+    auth = asyncio.run(medscheduler_signer().headers("GET", path.split('?', 1)[0])) if args.api == "medscheduler" else {}
+    headers = {"Host": "localhost", **auth}
+    raw_request = (f"GET {path} HTTP/1.1\r\n"
+                   + ''.join(f"{name}: {value}\r\n" for name, value in headers.items())
+                   + "\r\n").encode('latin-1')
+
+    report = {
+        "benchmark": "asgi_vs_sync",
+        "api": args.api,
+        "path": path,
+        "config": {
+            "workers": args.workers,
+            "connections": args.connections,
+            "slow_clients": args.slow_clients,
+            "duration_s": args.duration,
+        },
+        "results": [run_mode(mode, args, raw_request) for mode in args.modes.split(',')],
+    }
+
+    write_report(report, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Jeux de données de benchmark aux schémas des deux APIs (10³ à 10⁶ patients / rendez-vous)
+- Génération déterministe (graine), aux formats natifs de chaque API : patients,
+  rendez-vous sans chevauchement par médecin et par jour (12 créneaux réservés sur
+  16), grilles de disponibilités correspondantes (créneaux réservés marqués
+  indisponibles côté HealthCare Pro), rendez-vous rattachés à des patients existants
+- Écriture dans un fichier SQLite lu au démarrage par les APIs
+  (MEDSCHEDULER_DATABASE_URL / HEALTHCARE_PRO_DATABASE_URL), ou dans une fixture
+  binaire chargée au démarrage d'une API en mémoire (MEDSCHEDULER_FIXTURE /
+  HEALTHCARE_PRO_FIXTURE, voir common/fixtures.py)
+
+Usage : python benchmarks/datasets.py --api medscheduler --size 100000 --output /tmp/medscheduler.db
+        python benchmarks/datasets.py --api healthcare_pro --size 1000000 --format fixture --output /tmp/hcp.fixture
+"""
+
+import argparse
+from datetime import date, datetime, timedelta
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.fixtures import write_fixture
+from common.store import Database
+
+FIRST_NAMES = ["Jean", "Marie", "Pierre", "Sophie", "Hélène", "Éric", "Lucas", "Chloé", "Thomas",
+               "Camille", "Nicolas", "Léa", "François", "Inès", "Julien", "Zoé", "Mathieu", "Anaïs"]
+FEMALE_FIRST_NAMES = {"Marie", "Sophie", "Hélène", "Chloé", "Camille", "Léa", "Inès", "Zoé", "Anaïs"}
+LAST_NAMES = ["Dupont", "Martin", "Dubois", "Leroy", "Moreau", "Lefèvre", "Garcia", "Bernard",
+              "Rousseau", "Petit", "Durand", "Girard", "Bonnet", "Mercier", "Faure", "Chevalier"]
+CITIES = [("Paris", "75001"), ("Marseille", "13001"), ("Lyon", "69001"), ("Toulouse", "31000"),
+          ("Nantes", "44000"), ("Lille", "59000"), ("Bordeaux", "33000"), ("Nice", "06000")]
+REASONS = ["Consultation de routine", "Suivi post-opératoire", "Consultation spécialisée cardiologie",
+           "Renouvellement d'ordonnance", "Bilan annuel", "Douleurs dorsales"]
+HCP_TYPES = ["checkup", "followup", "consultation", "emergency"]
+
+START_DAY = date(2024, 3, 1)
+SLOTS_PER_DAY = 16         # Créneaux de 30 minutes de 09:00 à 17:00
+BOOKED_SLOTS_PER_DAY = 12  # Créneaux réservés par médecin et par jour
+MIDDLE_NAME_RATE = 0.2     # Part des patients HealthCare Pro avec un second prénom
+APPOINTMENTS_PER_DOCTOR = 200
+BATCH_SIZE = 10000
+
+# Créneaux réservés d'une journée : un motif parmi quelques dizaines, selon le médecin et le jour
+BOOKING_PATTERNS = [sorted(random.Random(pattern).sample(range(SLOTS_PER_DAY), BOOKED_SLOTS_PER_DAY))
+                    for pattern in range(64)]
+
+
+def slot_time(slot):
+    minutes = 9 * 60 + 30 * slot
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def schedule_span(size):
+    """(nombre de médecins, nombre de jours) couverts par `size` rendez-vous"""
+    doctors = max(1, size // APPOINTMENTS_PER_DOCTOR)
+    return doctors, -(-size // (doctors * BOOKED_SLOTS_PER_DAY))
+
+
+def doctor_name(doctor):
+    """Nom du médecin n° `doctor` côté MedScheduler"""
+    return f"Dr. {LAST_NAMES[doctor % len(LAST_NAMES)]} {doctor:04d}"
+
+
+def practitioner_name(doctor):
+    """Nom du praticien n° `doctor` côté HealthCare Pro"""
+    return f"Dr. {FIRST_NAMES[doctor % len(FIRST_NAMES)]} {doctor:04d}"
+
+
+def schedule(size):
+    """Positions (médecin, jour, créneau) uniques des `size` rendez-vous"""
+    doctors, _ = schedule_span(size)
+    for index in range(size):
+        doctor, rank = index % doctors, index // doctors
+        day = rank // BOOKED_SLOTS_PER_DAY
+        slots = BOOKING_PATTERNS[(doctor + day) % len(BOOKING_PATTERNS)]
+        yield index, doctor, START_DAY + timedelta(days=day), slots[rank % BOOKED_SLOTS_PER_DAY]
+
+
+def booked_slots(size):
+    """Créneaux réservés de chaque grille : {(médecin, jour): {créneau}}, dans l'ordre du planning"""
+    grids = {}
+    for _, doctor, day, slot in schedule(size):
+        grids.setdefault((doctor, day), set()).add(slot)
+    return grids
+
+
+def person(rng):
+    return rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES), date(1940, 1, 1) + timedelta(days=rng.randrange(25000))
+
+
+def medscheduler_dataset(size, seed=42):
+    """Collections MedScheduler : {nom: (clé, itérateur d'enregistrements)}"""
+    rng = random.Random(seed)
+    created = datetime(2024, 1, 1)
+
+    def patients():
+        for index in range(size):
+            first_name, last_name, birthdate = person(rng)
+            yield {
+                "id": f"pat_{index:07d}",
+                "first_name": first_name,
+                "last_name": last_name,
+                "birthdate": birthdate.isoformat(),
+                "phone_number": f"+336{index:08d}",
+                "email": f"{first_name}.{last_name}.{index}@email.com".lower(),
+                "created_at": (created + timedelta(minutes=index)).strftime("%Y/%m/%d %H:%M:%S")
+            }
+
+    def appointments():
+        for index, doctor, day, slot in schedule(size):
+            yield {
+                "id": f"apt_{index:07d}",
+                "patient_id": f"pat_{rng.randrange(size):07d}",
+                "doctor_name": doctor_name(doctor),
+                "appointment_date": day.isoformat(),
+                "appointment_time": slot_time(slot),
+                "duration": 30,
+                "reason": rng.choice(REASONS),
+                "created_at": (created + timedelta(minutes=index)).strftime("%Y/%m/%d %H:%M:%S")
+            }
+
+    def availabilities():
+        # Grille complète publiée : les créneaux libres sont calculés par /availabilities/free
+        for index, (doctor, day) in enumerate(booked_slots(size)):
+            yield {
+                "id": f"avail_{index:07d}",
+                "doctor_name": doctor_name(doctor),
+                "date": day.isoformat(),
+                "slots": [slot_time(slot) for slot in range(SLOTS_PER_DAY)]
+            }
+
+    return {
+        "patients": ("id", patients()),
+        "appointments": ("id", appointments()),
+        "availabilities": ("id", availabilities()),
+    }
+
+
+def healthcare_pro_dataset(size, seed=42):
+    """Collections HealthCare Pro : {nom: (clé, itérateur d'enregistrements)}"""
+    rng = random.Random(seed)
+    registered = datetime(2024, 1, 1)
+
+    def patients():
+        for index in range(size):
+            first_name, last_name, birthdate = person(rng)
+            city, postal_code = rng.choice(CITIES)
+            given_names = first_name
+            if rng.random() < MIDDLE_NAME_RATE:
+                given_names = f"{first_name} {rng.choice(FIRST_NAMES)}"
+            yield {
+                "id": f"hcp-patient-{index:07d}",
+                "patient_number": f"HCP{index + 1:07d}",
+                "full_name": f"{given_names} {last_name}",
+                "email": f"{first_name}.{last_name}.{index}@email.com".lower(),
+                "contact_phone": f"+331{index:08d}",
+                "date_of_birth": birthdate.strftime("%d/%m/%Y"),
+                "gender": "F" if first_name in FEMALE_FIRST_NAMES else "M",
+                "street_address": f"{rng.randrange(1, 300)} Rue de la Santé",
+                "city": city,
+                "postal_code": postal_code,
+                "registered_date": (registered + timedelta(minutes=index)).strftime("%a, %d %b %Y %H:%M:%S GMT")
+            }
+
+    def appointments():
+        for index, doctor, day, slot in schedule(size):
+            yield {
+                "appointment_id": f"hcp-appointment-{index:07d}",
+                "patient_id": f"hcp-patient-{rng.randrange(size):07d}",
+                "practitioner": practitioner_name(doctor),
+                "datetime": f"{day.isoformat()}T{slot_time(slot)}:00",
+                "length_minutes": 30,
+                "type": rng.choice(HCP_TYPES),
+                "notes": rng.choice(REASONS),
+                "created": (registered + timedelta(minutes=index)).strftime("%a, %d %b %Y %H:%M:%S GMT")
+            }
+
+    def availabilities():
+        for index, ((doctor, day), booked) in enumerate(booked_slots(size).items()):
+            yield {
+                "availability_id": f"av_{index:07d}",
+                "practitioner": practitioner_name(doctor),
+                "day": day.isoformat(),
+                "time_slots": [{"time": f"{slot_time(slot)}:00", "available": slot not in booked}
+                               for slot in range(SLOTS_PER_DAY)]
+            }
+
+    return {
+        "patients": ("id", patients()),
+        "appointments": ("appointment_id", appointments()),
+        "availabilities": ("availability_id", availabilities()),
+    }
+
+
+DATASETS = {
+    "medscheduler": medscheduler_dataset,
+    "healthcare_pro": healthcare_pro_dataset,
+}
+
+
+def write_dataset(api, size, path, seed=42):
+    """Écrire le jeu de données dans un nouveau fichier SQLite -> {collection: nombre}"""
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    db = Database(f"sqlite:///{path}")
+    counts = {}
+    for name, (key, records) in DATASETS[api](size, seed).items():
+        collection = db.collection(name, key=key)
+        batch = []
+        for record in records:
+            batch.append(record)
+            if len(batch) >= BATCH_SIZE:
+                collection.extend(batch)
+                batch = []
+        collection.extend(batch)
+        counts[name] = len(collection)
+    return counts
+
+
+def write_fixture_file(api, size, path, seed=42):
+    """Écrire le jeu de données dans une fixture binaire -> {collection: nombre}"""
+    return write_fixture(path, api, DATASETS[api](size, seed), size=size, seed=seed)
+
+
+WRITERS = {
+    "sqlite": write_dataset,
+    "fixture": write_fixture_file,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--api', choices=sorted(DATASETS), required=True)
+    parser.add_argument('--size', type=int, default=1000, help="Nombre de patients et de rendez-vous")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--format', choices=sorted(WRITERS), default="sqlite",
+                        help="Base SQLite partagée ou fixture binaire chargée au démarrage")
+    parser.add_argument('--output', required=True, help="Fichier à créer")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    counts = WRITERS[args.format](args.api, args.size, args.output, args.seed)
+    print(f"{args.output}: {counts} ({time.perf_counter() - started:.1f}s)")
+
+
+if __name__ == '__main__':
+    main()
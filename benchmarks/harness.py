@@ -0,0 +1,141 @@
+"""
+Outils communs aux benchmarks
+- Démarrage local des APIs (gunicorn sync ou uvicorn ASGI)
+- Client HTTP keep-alive et authentification (signature HMAC MedScheduler, tokens
+  JWT HealthCare Pro renouvelés) : ceux du package client/ (SDK)
+- Statistiques de latence (p50/p95/p99)
+"""
+
+from contextlib import contextmanager
+import importlib.util
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from client import ClientError, ConnectionPool, HMACSigner, TokenManager
+from client.http import read_response
+
+APIS = {
+    "medscheduler": {"dir": "api1_medscheduler", "database_env": "MEDSCHEDULER_DATABASE_URL"},
+    "healthcare_pro": {"dir": "api2_healthcare_pro", "database_env": "HEALTHCARE_PRO_DATABASE_URL"},
+}
+
+MEDSCHEDULER_CLIENT = {"client_id": "medscheduler_client", "secret_key": "medscheduler_secret_key_2024_very_secure"}
+HCP_CLIENT = {"client_id": "healthcare_pro_client", "client_secret": "healthcare_secret_2024"}
+
+
+# SERVEURS
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def server_command(mode, workers, port):
+    if mode == "sync":
+        return [sys.executable, '-m', 'gunicorn', '--workers', str(workers),
+                '--bind', f'127.0.0.1:{port}', '--log-level', 'warning', 'app:app']
+    # Workers uvicorn sous gunicorn : socket d'écoute en TCP_NODELAY (voir README)
+    return [sys.executable, '-m', 'gunicorn', '--worker-class', 'uvicorn.workers.UvicornWorker',
+            '--workers', str(workers), '--bind', f'127.0.0.1:{port}', '--log-level', 'warning',
+            'asgi:application']
+
+
+def wait_ready(port, timeout=300):
+    """Attendre que /health réponde (le chargement d'un gros jeu de données peut être long)"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/health', timeout=1).read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server on port {port} did not start")
+
+
+@contextmanager
+def running_server(api, mode="sync", workers=1, database_url=None):
+    """Démarrer une API en local le temps du bloc -> port"""
+    port = free_port()
+    env = dict(os.environ)
+    if database_url:
+        env[APIS[api]["database_env"]] = database_url
+    # Index de recherche de HealthCare Pro construit au démarrage de chaque worker,
+    # pas pendant la mesure de la première recherche
+    env.setdefault('HEALTHCARE_PRO_SEARCH_WARMUP', '1')
+    process = subprocess.Popen(server_command(mode, workers, port), env=env,
+                               cwd=os.path.join(ROOT, APIS[api]["dir"]))
+    try:
+        wait_ready(port)
+        yield port
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+# AUTHENTIFICATION
+
+def load_app_module(api):
+    """Importer le module app.py d'une API sous un nom dédié (les deux s'appellent app.py)"""
+    name = f"{api}_app"
+    if name not in sys.modules:
+        spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, APIS[api]["dir"], 'app.py'))
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+    return sys.modules[name]
+
+
+def medscheduler_signer():
+    """Signature HMAC des requêtes MedScheduler (client/auth.py)"""
+    return HMACSigner(**MEDSCHEDULER_CLIENT)
+
+
+def healthcare_pro_tokens(pool):
+    """Tokens HealthCare Pro (10 s) obtenus et renouvelés via `pool` (client/auth.py)"""
+    return TokenManager(pool.request, **HCP_CLIENT)
+
+
+# STATISTIQUES
+
+def percentile(sorted_values, fraction):
+    """Percentile (rang le plus proche) en millisecondes"""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return round(sorted_values[index] * 1000, 3)
+
+
+def summarize(latencies, errors, elapsed):
+    """Débit et latences d'une mesure (latences en secondes)"""
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "error_statuses": sorted({str(error) for error in errors}),
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "latency_ms": {
+            "p50": percentile(latencies, 0.50),
+            "p95": percentile(latencies, 0.95),
+            "p99": percentile(latencies, 0.99),
+            "max": percentile(latencies, 1.0),
+        },
+    }
+
+
+def write_report(report, output=None):
+    """Rapport JSON sur la sortie standard et, si demandé, dans un fichier"""
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if output:
+        with open(output, 'w') as f:
+            f.write(text + '\n')
+    print(text)
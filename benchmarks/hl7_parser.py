@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark du traitement HL7 v2 de HealthCare Pro (en processus, sans HTTP)
+- Lot de messages ADT A01/A04/A08 générés (graine) : PID, PV1 complets
+- Mesure en messages par seconde :
+  - découpage : lecture en flux et bornes des messages (HL7Reader)
+  - analyse : champs PID/PV1 lus par le mapping (analyse paresseuse)
+  - analyse complète : découpage de tous les champs/composants (référence)
+  - traitement : analyse + écriture dans les collections + accusés (acknowledge_hl7)
+- Rapport JSON (sortie standard ou --output)
+
+Usage : python benchmarks/hl7_parser.py --messages 20000
+"""
+
+import argparse
+import random
+import time
+
+from datasets import CITIES, FIRST_NAMES, LAST_NAMES
+from harness import load_app_module, write_report
+
+EVENTS = ("A01", "A04", "A08")
+
+
+def adt_message(index, rng):
+    """Message ADT (segments terminés par \\r) d'un patient et d'une visite"""
+    event = EVENTS[index % len(EVENTS)]
+    first_name, last_name = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    city, postal_code = rng.choice(CITIES)
+    patient = index // 2  # Deux messages par patient : création puis mise à jour
+    pv1 = ['PV1'] + [''] * 44
+    pv1[1], pv1[2], pv1[3] = '1', rng.choice('IOE'), f"WARD{rng.randrange(10)}^{rng.randrange(100, 400)}^1"
+    pv1[7] = f"{rng.randrange(1000)}^{rng.choice(LAST_NAMES)}^{rng.choice(FIRST_NAMES)}^^^Dr"
+    pv1[19] = f"V{index:08d}"
+    pv1[44] = f"2024{rng.randrange(1, 13):02d}{rng.randrange(1, 29):02d}{rng.randrange(8, 18):02d}{rng.choice((0, 30)):02d}00"
+    segments = [
+        f"MSH|^~\\&|SENDING_APP|SENDING_FACILITY|HEALTHCARE_PRO|HCP_SYSTEM|20240322143000||ADT^{event}|MSG{index:08d}|P|2.4",
+        f"EVN|{event}|20240322143000",
+        f"PID|1||BENCH{patient:07d}^^^HCP^MR||{last_name}^{first_name}||19{rng.randrange(40, 99)}0{rng.randrange(1, 9)}1{rng.randrange(0, 9)}"
+        f"|{rng.choice('MF')}|||{rng.randrange(1, 300)} Rue de la Santé^^{city}^^{postal_code}"
+        f"||^PRN^PH^^33^1^{rng.randrange(10 ** 7, 10 ** 8)}~^NET^Internet^{first_name}.{last_name}.{patient}@email.com",
+        '|'.join(pv1),
+    ]
+    return '\r'.join(segments).encode('utf-8')
+
+
+def measure(label, count, function, repeat):
+    """Meilleur débit sur `repeat` passages"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return {"stage": label, "messages": count, "best_s": round(best, 4),
+            "messages_per_s": round(count / best) if best else None}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', type=int, default=20000)
+    parser.add_argument('--chunk-size', type=int, default=64 * 1024, help="Taille des blocs lus")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="Fichier du rapport JSON")
+    args = parser.parse_args()
+
+    app = load_app_module("healthcare_pro")
+    hl7 = app.hl7
+    rng = random.Random(args.seed)
+    body = b'\r'.join(adt_message(index, rng) for index in range(args.messages)) + b'\r'
+    chunks = [body[i:i + args.chunk_size] for i in range(0, len(body), args.chunk_size)]
+
+    def split_only():
+        for _ in hl7.HL7Reader(chunks).messages():
+            pass
+
+    def parse_mapped_fields():
+        for message in hl7.HL7Reader(chunks).messages():
+            message.message_type
+            pid, pv1 = message.segment('PID'), message.segment('PV1')
+            app.medical_record_number(pid)
+            app.patient_changes_from_pid(pid)
+            pv1.components(7), pv1.components(3), pv1.get(19, 1), hl7.parse_timestamp(pv1.get(44))
+
+    def parse_everything():
+        # Référence : décodage et découpage de tous les segments, champs et composants
+        for segment in body.decode('utf-8').split('\r'):
+            [field.split('^') for field in segment.split('|')]
+
+    def process():
+        app.acknowledge_hl7(iter(chunks))
+
+    results = [
+        measure("split", args.messages, split_only, args.repeat),
+        measure("parse (mapped fields, lazy)", args.messages, parse_mapped_fields, args.repeat),
+        measure("parse (all fields, eager split)", args.messages, parse_everything, args.repeat),
+        # Traitement mesuré une fois : les passages suivants seraient des mises à jour
+        measure("process (parse + collections + ACK)", args.messages, process, 1),
+    ]
+
+    write_report({
+        "benchmark": "hl7_parser",
+        "config": {"messages": args.messages, "body_bytes": len(body), "chunk_size": args.chunk_size,
+                   "seed": args.seed},
+        "results": results,
+        "patients": len(app.patients_db),
+        "appointments": len(app.appointments_db),
+    }, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Générateur de charge MLLP pour HealthCare Pro (api2_healthcare_pro/mllp.py)
+- Démarre l'écoute MLLP en local (ou vise --port d'une écoute déjà lancée)
+- Connexions persistantes qui envoient des messages ADT A01/A04/A08 générés,
+  jusqu'à --window trames en vol par connexion (fenêtre d'émission)
+- Mesure le débit soutenu (accusés/s) et les latences p50/p95/p99 trame -> accusé ;
+  un accusé autre que AA compte comme erreur
+- Rapport JSON (sortie standard ou --output)
+
+Usage : python benchmarks/mllp_load.py --connections 8 --window 16 --duration 10
+"""
+
+import argparse
+import asyncio
+from collections import deque
+from contextlib import contextmanager
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+from harness import APIS, ROOT, free_port, summarize, write_report
+from hl7_parser import adt_message
+
+START_BLOCK, END_BLOCK = b'\x0b', b'\x1c\x0d'
+
+
+@contextmanager
+def running_listener(args):
+    """Démarrer mllp.py le temps du bloc -> port"""
+    port = free_port()
+    env = dict(os.environ, MLLP_PORT=str(port), MLLP_MAX_CONCURRENCY=str(args.concurrency),
+               MLLP_MAX_PENDING=str(args.max_pending))
+    if args.database_url:
+        env[APIS["healthcare_pro"]["database_env"]] = args.database_url
+    process = subprocess.Popen([sys.executable, 'mllp.py'], env=env, stdout=subprocess.DEVNULL,
+                               cwd=os.path.join(ROOT, APIS["healthcare_pro"]["dir"]))
+    try:
+        deadline = time.time() + 300
+        while True:
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                break
+            except OSError:
+                if time.time() > deadline or process.poll() is not None:
+                    raise RuntimeError("MLLP listener did not start")
+                time.sleep(0.2)
+        yield port
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+async def sender(port, client, args, deadline, latencies, errors):
+    """Une connexion : fenêtre de trames en vol, accusés lus dans l'ordre d'envoi"""
+    rng = random.Random(args.seed + client)
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    sent = deque()  # Instants d'envoi des trames non accusées
+    window = asyncio.Semaphore(args.window)
+    index = client * 10 ** 7
+
+    async def receive():
+        while True:
+            try:
+                payload = await reader.readuntil(END_BLOCK)
+            except asyncio.IncompleteReadError:
+                return
+            latency = time.perf_counter() - sent.popleft()
+            window.release()
+            if b'\rMSA|AA|' in payload:
+                latencies.append(latency)
+            else:
+                errors.append(payload.split(b'\rMSA|', 1)[-1][:2].decode('ascii', 'replace'))
+            if not sent and time.perf_counter() >= deadline:
+                return
+
+    receiver = asyncio.create_task(receive())
+    while time.perf_counter() < deadline:
+        await window.acquire()
+        sent.append(time.perf_counter())
+        writer.write(START_BLOCK + adt_message(index, rng) + END_BLOCK)
+        index += 1
+        await writer.drain()
+    await receiver
+    writer.close()
+
+
+async def measure(port, args):
+    latencies, errors = [], []
+    started = time.perf_counter()
+    deadline = started + args.duration
+    await asyncio.gather(*[
+        sender(port, client, args, deadline, latencies, errors) for client in range(args.connections)
+    ])
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--connections', type=int, default=8)
+    parser.add_argument('--window', type=int, default=16, help="Trames en vol par connexion")
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--concurrency', type=int, default=4, help="MLLP_MAX_CONCURRENCY du serveur démarré")
+    parser.add_argument('--max-pending', type=int, default=32, help="MLLP_MAX_PENDING du serveur démarré")
+    parser.add_argument('--database-url', help="Backend du serveur démarré (ex: sqlite:///tmp/hcp.db)")
+    parser.add_argument('--port', type=int, help="Écoute MLLP déjà lancée (sinon démarrée en local)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="Fichier du rapport JSON")
+    args = parser.parse_args()
+
+    if args.port:
+        result = asyncio.run(measure(args.port, args))
+    else:
+        with running_listener(args) as port:
+            result = asyncio.run(measure(port, args))
+
+    write_report({
+        "benchmark": "mllp_load",
+        "config": {key: getattr(args, key) for key in
+                   ("connections", "window", "duration", "concurrency", "max_pending", "database_url", "seed")},
+        "result": result,
+    }, args.output)
+
+
+if __name__ == '__main__':
+    main()
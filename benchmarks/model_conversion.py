@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Benchmark des convertisseurs du modèle canonique (common/model.py)
+- Jeux de données générés aux schémas des deux APIs (benchmarks/datasets.py)
+- Débit (enregistrements/s) de chaque convertisseur par lots, dans les deux sens
+- Référence : conversion naïve d'un dict à la fois avec strptime/strftime
+- Mémoire par enregistrement : dict du payload vs enregistrement canonique
+
+Usage : python benchmarks/model_conversion.py --size 200000
+"""
+
+import argparse
+from datetime import datetime
+from itertools import islice
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common import model
+from datasets import healthcare_pro_dataset, medscheduler_dataset
+from harness import write_report
+
+
+def naive_patient_from_healthcare_pro(item):
+    """Conversion d'un seul payload, formats analysés à chaque appel (référence)"""
+    given, _, family = item["full_name"].rpartition(' ')
+    return {
+        "id": item["id"],
+        "given_name": given,
+        "family_name": family,
+        "birth_date": datetime.strptime(item["date_of_birth"], "%d/%m/%Y").date(),
+        "phone": item["contact_phone"],
+        "email": item["email"],
+        "created_at": datetime.strptime(item["registered_date"], "%a, %d %b %Y %H:%M:%S GMT"),
+    }
+
+
+def naive_appointment_from_medscheduler(item):
+    return {
+        "id": item["id"],
+        "patient_id": item["patient_id"],
+        "practitioner": item["doctor_name"],
+        "start": datetime.strptime(f"{item['appointment_date']} {item['appointment_time']}", "%Y-%m-%d %H:%M"),
+        "duration_minutes": int(item["duration"]),
+        "notes": item["reason"],
+        "created_at": datetime.strptime(item["created_at"], "%Y/%m/%d %H:%M:%S"),
+    }
+
+
+def measure(label, count, function, repeat):
+    """Meilleur débit sur `repeat` passages (caches de dates vidés avant chacun)"""
+    best = None
+    for _ in range(repeat):
+        for cached in (model.parse_iso_date, model.parse_french_date, model.parse_clock,
+                       model.format_iso_date, model.format_french_date):
+            cached.cache_clear()
+        started = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return {"converter": label, "records": count, "best_s": round(best, 4),
+            "records_per_s": round(count / best) if best else None}
+
+
+def bytes_per_record(build):
+    """Mémoire allouée par enregistrement pour une liste construite par `build`"""
+    tracemalloc.start()
+    records = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return round(size / len(records))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=200000, help="Enregistrements par collection")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="Fichier du rapport JSON")
+    args = parser.parse_args()
+
+    payloads = {}
+    for api, dataset in ((model.MEDSCHEDULER, medscheduler_dataset), (model.HEALTHCARE_PRO, healthcare_pro_dataset)):
+        for name, (_, records) in dataset(args.size, args.seed).items():
+            if name in ("patients", "appointments"):
+                payloads[(name, api)] = list(islice(records, args.size))
+
+    results = []
+    canonical = {}
+    for (name, api), items in payloads.items():
+        from_api, to_api = model.CONVERTERS[(name, api)]
+        results.append(measure(f"{name} {api} -> canonical", len(items), lambda: from_api(items), args.repeat))
+        canonical[(name, api)] = records = from_api(items)
+        results.append(measure(f"{name} canonical -> {api}", len(records), lambda: to_api(records), args.repeat))
+    for label, convert, items in (
+            ("patients healthcare_pro -> canonical (naive, per dict)", naive_patient_from_healthcare_pro,
+             payloads[("patients", model.HEALTHCARE_PRO)]),
+            ("appointments medscheduler -> canonical (naive, per dict)", naive_appointment_from_medscheduler,
+             payloads[("appointments", model.MEDSCHEDULER)])):
+        results.append(measure(label, len(items), lambda: [convert(item) for item in items], args.repeat))
+
+    # Conversion croisée complète : MedScheduler -> canonique -> HealthCare Pro
+    items = payloads[("appointments", model.MEDSCHEDULER)]
+    results.append(measure("appointments medscheduler -> healthcare_pro", len(items),
+                           lambda: model.appointments_to_healthcare_pro(model.appointments_from_medscheduler(items)),
+                           args.repeat))
+
+    sample = payloads[("patients", model.HEALTHCARE_PRO)][:50000]
+    memory = {
+        "patient_payload_dict": bytes_per_record(lambda: [dict(item) for item in sample]),
+        "patient_canonical": bytes_per_record(lambda: model.patients_from_healthcare_pro(sample)),
+    }
+
+    write_report({
+        "benchmark": "model_conversion",
+        "config": {"size": args.size, "seed": args.seed, "repeat": args.repeat},
+        "results": results,
+        "bytes_per_record": memory,
+    }, args.output)
+
+
+if __name__ == '__main__':
+    main()
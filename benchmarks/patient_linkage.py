@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Benchmark du rapprochement de patients entre les deux APIs (common/linkage.py)
+- Patients MedScheduler générés, puis patients HealthCare Pro dont une part
+  désigne les mêmes personnes avec des écarts réalistes (téléphone au format
+  national ou absent, faute de frappe dans le nom, second prénom, autre e-mail,
+  date de naissance décalée), le reste étant d'autres personnes
+- Entrées lues en flux (payloads générés -> convertisseurs par lots -> linkage)
+- Rapport : débit, blocs, comparaisons, précision / rappel, mémoire maximale,
+  et durée estimée d'une comparaison naïve de toutes les paires
+
+Usage : python benchmarks/patient_linkage.py --size 1000000
+"""
+
+import argparse
+from datetime import date, timedelta
+from itertools import islice
+import os
+import random
+import resource
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common import linkage, model
+from harness import write_report
+
+GIVEN_PARTS = ["Jean", "Marie", "Pierre", "Anne", "Louis", "Claire", "Paul", "Sophie", "Hélène", "Éric",
+               "Lucas", "Chloé", "Thomas", "Camille", "Léa", "Inès", "Julien", "Zoé", "Mathieu", "Anaïs",
+               "Hugo", "Manon", "Noé", "Jade", "Gabriel", "Louise", "Raphaël", "Emma", "Arthur", "Alice"]
+FAMILY_PREFIXES = ["Du", "Le", "Ber", "Mar", "Lef", "Rou", "Gi", "Bon", "Mer", "Fau", "Che", "Mo", "Pe", "Dur",
+                   "Gar", "Lam", "Bar", "Fon", "Roch", "Ga", "Vi", "Bou", "Cha", "Tes", "Ma", "Bre", "Co", "Ri"]
+FAMILY_SUFFIXES = ["pont", "roy", "nard", "tin", "èvre", "sseau", "rard", "net", "cier", "re", "valier",
+                   "reau", "tit", "and", "cia", "bert", "thier", "taine", "ault", "llard", "gnon", "det",
+                   "chet", "sier", "lin", "quet", "ron", "vier", "mont", "lais", "card", "teau"]
+FAMILY_NAMES = [prefix + suffix for prefix in FAMILY_PREFIXES for suffix in FAMILY_SUFFIXES]
+MATCH_BATCH = 10000
+
+
+def person(rng, index):
+    given = rng.choice(GIVEN_PARTS)
+    family = rng.choice(FAMILY_NAMES)
+    born = date(1930, 1, 1) + timedelta(days=rng.randrange(30000))
+    return {"index": index, "given": given, "family": family, "born": born,
+            "phone": f"6{rng.randrange(10 ** 8):08d}", "email": f"{given}.{family}.{index}@email.com"}
+
+
+def typo(rng, text):
+    position = rng.randrange(1, len(text))
+    return text[:position] + rng.choice("aeioulnrst") + text[position + 1:]
+
+
+def medscheduler_patients(size, seed):
+    rng = random.Random(seed)
+    for index in range(size):
+        who = person(rng, index)
+        yield {
+            "id": f"pat_{index:07d}",
+            "first_name": who["given"],
+            "last_name": who["family"],
+            "birthdate": who["born"].isoformat(),
+            "phone_number": f"+33{who['phone']}",
+            "email": who["email"].lower(),
+            "created_at": "2024/01/01 00:00:00",
+        }
+
+
+def healthcare_pro_patients(size, seed, overlap):
+    """Même graine que medscheduler_patients : les `overlap` premiers sont les mêmes personnes"""
+    rng = random.Random(seed)
+    noise = random.Random(seed + 1)
+    shared = int(size * overlap)
+    for index in range(size):
+        who = person(rng, index)
+        if index >= shared:
+            who = person(noise, size + index)
+        given, family, born = who["given"], who["family"], who["born"]
+        phone = f"+33{who['phone']}"
+        email = who["email"].lower()
+        if noise.random() < 0.5:
+            national = "0" + who["phone"]
+            phone = " ".join(national[i:i + 2] for i in range(0, 10, 2))
+        draw = noise.random()
+        if draw < 0.1:
+            phone = ""
+        elif draw < 0.2:
+            phone = f"+336{noise.randrange(10 ** 8):08d}"
+        if noise.random() < 0.1:
+            family = typo(noise, family)
+        if noise.random() < 0.2:
+            given = f"{given} {noise.choice(GIVEN_PARTS)}"
+        if noise.random() < 0.5:
+            email = email.replace("@email.com", "@mail.fr")
+        if noise.random() < 0.05:
+            born += timedelta(days=1)
+        yield {
+            "id": f"hcp-patient-{index:07d}",
+            "patient_number": f"HCP{index + 1:07d}",
+            "full_name": f"{given} {family}",
+            "email": email,
+            "contact_phone": phone,
+            "date_of_birth": born.strftime("%d/%m/%Y"),
+            "registered_date": "Mon, 01 Jan 2024 00:00:00 GMT",
+        }
+
+
+def canonical(payloads, convert, batch_size=MATCH_BATCH):
+    """Flux de payloads -> flux de Patient, convertis par lots"""
+    while True:
+        batch = list(islice(payloads, batch_size))
+        if not batch:
+            return
+        yield from convert(batch)
+
+
+def naive_estimate(size, seed, pairs=200000):
+    """Durée estimée (s) de la notation de toutes les paires size x size"""
+    left = list(linkage.project(model.patients_from_medscheduler(list(medscheduler_patients(1000, seed)))))
+    right = list(linkage.project(model.patients_from_healthcare_pro(
+        list(healthcare_pro_patients(1000, seed, 0.5)))))
+    rng = random.Random(seed)
+    sample = [(rng.choice(left), rng.choice(right)) for _ in range(pairs)]
+    started = time.perf_counter()
+    for left_record, right_record in sample:
+        linkage.score(left_record, right_record)
+    return (time.perf_counter() - started) / pairs * size * size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=1000000, help="Patients de chaque côté")
+    parser.add_argument('--overlap', type=float, default=0.5, help="Part de personnes communes")
+    parser.add_argument('--threshold', type=float, default=linkage.DEFAULT_THRESHOLD)
+    parser.add_argument('--run-size', type=int, default=linkage.DEFAULT_RUN_SIZE)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="Fichier du rapport JSON")
+    args = parser.parse_args()
+
+    linker = linkage.PatientLinker(threshold=args.threshold, run_size=args.run_size)
+    left = canonical(medscheduler_patients(args.size, args.seed), model.patients_from_medscheduler)
+    right = canonical(healthcare_pro_patients(args.size, args.seed, args.overlap), model.patients_from_healthcare_pro)
+
+    started = time.perf_counter()
+    found = true_positives = 0
+    for match in linker.link(left, right):
+        found += 1
+        if match.left_id[4:] == match.right_id[12:]:
+            true_positives += 1
+    elapsed = time.perf_counter() - started
+    expected = int(args.size * args.overlap)
+
+    write_report({
+        "benchmark": "patient_linkage",
+        "config": {"size": args.size, "overlap": args.overlap, "threshold": args.threshold,
+                   "run_size": args.run_size, "seed": args.seed},
+        "elapsed_s": round(elapsed, 1),
+        "records_per_s": round(2 * args.size / elapsed),
+        "stats": linker.stats,
+        "precision": round(true_positives / found, 4) if found else None,
+        "recall": round(true_positives / expected, 4) if expected else None,
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024),
+        "naive_all_pairs_estimated_s": round(naive_estimate(args.size, args.seed)),
+    }, args.output)
+
+
+if __name__ == '__main__':
+    main()
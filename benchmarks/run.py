@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Suite de benchmark de MedScheduler et HealthCare Pro
+- Pour chaque taille : génère le jeu de données (SQLite), démarre l'API en local,
+  puis charge chaque endpoint avec des clients keep-alive concurrents
+- Requêtes envoyées avec le client du package client/ : signature HMAC
+  MedScheduler, tokens JWT HealthCare Pro (10 s) renouvelés par refresh token
+- Rapport JSON : débit, erreurs et latences p50/p95/p99 par endpoint
+
+Usage : python benchmarks/run.py --sizes 1000,10000,100000 --mode sync --output report.json
+"""
+
+import argparse
+import asyncio
+from datetime import datetime, timedelta
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+from urllib.parse import urlencode
+
+import datasets
+from harness import (ClientError, ConnectionPool, healthcare_pro_tokens, medscheduler_signer,
+                     running_server, summarize, write_report)
+
+
+def medscheduler_scenarios(size):
+    """Endpoints mesurés : {nom: fonction(rng, n) -> (méthode, chemin, corps)}"""
+    doctors, days = datasets.schedule_span(size)
+
+    def day(rng):
+        return (datasets.START_DAY + timedelta(days=rng.randrange(days))).isoformat()
+
+    def new_patient(rng, n):
+        return {"first_name": "Bench", "last_name": f"Patient {n}", "birthdate": "1990-01-01",
+                "phone_number": f"+337{n:08d}"}
+
+    def new_appointment(rng, n):
+        # Un médecin dédié par requête : aucune collision de créneau
+        return {"patient_id": f"pat_{rng.randrange(size):07d}", "doctor_name": f"Dr. Bench {n}",
+                "appointment_date": day(rng), "appointment_time": "10:00"}
+
+    return {
+        "GET /patients?limit=100": lambda rng, n: ("GET", "/patients?limit=100", None),
+        "GET /patients/{id}": lambda rng, n: ("GET", f"/patients/pat_{rng.randrange(size):07d}", None),
+        "GET /appointments?date&limit=100": lambda rng, n: (
+            "GET", "/appointments?" + urlencode({"date": day(rng), "limit": 100}), None),
+        "GET /appointments?patient_id": lambda rng, n: (
+            "GET", f"/appointments?patient_id=pat_{rng.randrange(size):07d}", None),
+        "GET /availabilities/free": lambda rng, n: (
+            "GET", "/availabilities/free?" + urlencode(
+                {"date": day(rng), "doctor_name": datasets.doctor_name(rng.randrange(doctors))}), None),
+        "POST /patients": lambda rng, n: ("POST", "/patients", new_patient(rng, n)),
+        "POST /appointments": lambda rng, n: ("POST", "/appointments", new_appointment(rng, n)),
+    }
+
+
+def healthcare_pro_scenarios(size):
+    """Endpoints mesurés : {nom: fonction(rng, n) -> (méthode, chemin, corps)}"""
+    _, days = datasets.schedule_span(size)
+
+    def new_patient(rng, n):
+        return {"full_name": f"Bench Patient {n}", "email": f"bench.{n}@email.com",
+                "date_of_birth": "01/01/1990", "contact_phone": f"+337{n:08d}"}
+
+    return {
+        "GET /api/patients?limit=100": lambda rng, n: ("GET", "/api/patients?limit=100", None),
+        "GET /api/patients?search&limit=50": lambda rng, n: (
+            "GET", "/api/patients?" + urlencode(
+                {"search": rng.choice(datasets.LAST_NAMES).lower()[:4], "limit": 50}), None),
+        "GET /api/appointments?patient_id": lambda rng, n: (
+            "GET", f"/api/appointments?patient_id=hcp-patient-{rng.randrange(size):07d}", None),
+        "GET /api/appointments/{id}": lambda rng, n: (
+            "GET", f"/api/appointments/hcp-appointment-{rng.randrange(size):07d}", None),
+        "GET /api/availabilities?day": lambda rng, n: (
+            "GET", "/api/availabilities?" + urlencode(
+                {"day": (datasets.START_DAY + timedelta(days=rng.randrange(days))).isoformat()}), None),
+        "POST /api/patients": lambda rng, n: ("POST", "/api/patients", new_patient(rng, n)),
+    }
+
+
+SCENARIOS = {
+    "medscheduler": medscheduler_scenarios,
+    "healthcare_pro": healthcare_pro_scenarios,
+}
+
+
+async def client(port, auth, build, counter, deadline, timeout, latencies, errors, seed):
+    rng = random.Random(seed)
+    connection = ConnectionPool('127.0.0.1', port, max_connections=1, timeout=timeout)
+    while time.perf_counter() < deadline:
+        counter[0] += 1
+        method, path, payload = build(rng, counter[0])
+        body = json.dumps(payload).encode('utf-8') if payload is not None else b''
+        # Signature sur le chemin sans query string
+        headers = await auth.headers(method, path.split('?', 1)[0], body)
+        if body:
+            headers["Content-Type"] = "application/json"
+        started = time.perf_counter()
+        try:
+            response = await connection.request(method, path, headers, body)
+        except (ClientError, OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as e:
+            errors.append(type(e).__name__)
+            continue
+        if response.status >= 400:
+            errors.append(response.status)
+        else:
+            latencies.append(time.perf_counter() - started)
+    await connection.close()
+
+
+async def measure_endpoint(port, auth, build, args, counter):
+    latencies, errors = [], []
+    started = time.perf_counter()
+    deadline = started + args.duration
+    await asyncio.gather(*[
+        client(port, auth, build, counter, deadline, args.timeout, latencies, errors, seed)
+        for seed in range(args.connections)
+    ])
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+async def measure_api(api, port, size, args):
+    token_pool = ConnectionPool('127.0.0.1', port, max_connections=1)
+    auth = medscheduler_signer() if api == "medscheduler" else healthcare_pro_tokens(token_pool)
+    counter = [10 ** 7]  # Identifiants des créations, hors de la plage du jeu de données
+    endpoints = []
+    for name, build in SCENARIOS[api](size).items():
+        if args.endpoints and not any(pattern in name for pattern in args.endpoints):
+            continue
+        endpoints.append({"endpoint": name, **await measure_endpoint(port, auth, build, args, counter)})
+    result = {"endpoints": endpoints}
+    if api == "healthcare_pro":
+        result["token_renewals"] = auth.renewals
+        await auth.close()
+    await token_pool.close()
+    return result
+
+
+def run_size(api, size, args, workdir):
+    path = os.path.join(workdir, f"{api}_{size}.db")
+    started = time.perf_counter()
+    counts = datasets.write_dataset(api, size, path, args.seed)
+    generated = time.perf_counter() - started
+
+    started = time.perf_counter()
+    with running_server(api, args.mode, args.workers, f"sqlite:///{path}") as port:
+        startup = time.perf_counter() - started
+        measured = asyncio.run(measure_api(api, port, size, args))
+    return {
+        "api": api,
+        "size": size,
+        "dataset": counts,
+        "dataset_generation_s": round(generated, 3),
+        "startup_s": round(startup, 3),
+        **measured,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--apis', default='medscheduler,healthcare_pro')
+    parser.add_argument('--sizes', default='1000,10000',
+                        help="Tailles des jeux de données, ex: 1000,10000,100000,1000000")
+    parser.add_argument('--mode', choices=['sync', 'asgi'], default='sync',
+                        help="gunicorn (app.py) ou uvicorn (asgi.py)")
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--connections', type=int, default=16, help="Clients concurrents par endpoint")
+    parser.add_argument('--duration', type=float, default=5.0, help="Durée de mesure par endpoint (secondes)")
+    parser.add_argument('--timeout', type=float, default=30.0, help="Délai maximal d'une requête")
+    parser.add_argument('--endpoints', type=lambda value: value.split(','),
+                        help="Ne mesurer que les endpoints contenant l'un de ces motifs")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="Fichier du rapport JSON")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench-')
+    try:
+        results = [
+            run_size(api, int(size), args, workdir)
+            for api in args.apis.split(',')
+            for size in args.sizes.split(',')
+        ]
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    write_report({
+        "benchmark": "suite",
+        "generated_at": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "config": {
+            "mode": args.mode,
+            "workers": args.workers,
+            "connections": args.connections,
+            "duration_s": args.duration,
+            "seed": args.seed,
+        },
+        "results": results,
+    }, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,19 @@
+"""
+Client asyncio des APIs MedScheduler et HealthCare Pro (sans dépendance externe)
+
+    async with HealthCareProClient("http://localhost:5002", "healthcare_pro_client",
+                                   "healthcare_secret_2024") as client:
+        patients = (await client.get("/api/patients", params={"search": "dubois"})).json()
+"""
+
+from .apis import APIClient, HealthCareProClient, MedSchedulerClient
+from .auth import AuthenticationError, HMACSigner, TokenManager
+from .calendar import AvailabilityCalendar, Slot, merge_slots
+from .http import ClientError, ConnectionPool, HTTPStatusError, PoolManager, Response
+
+__all__ = [
+    "APIClient", "HealthCareProClient", "MedSchedulerClient",
+    "AuthenticationError", "HMACSigner", "TokenManager",
+    "AvailabilityCalendar", "Slot", "merge_slots",
+    "ClientError", "ConnectionPool", "HTTPStatusError", "PoolManager", "Response",
+]
@@ -0,0 +1,116 @@
+"""
+Clients asyncio des APIs MedScheduler et HealthCare Pro
+- Requêtes authentifiées automatiquement (signature HMAC ou token Bearer)
+- Connexions partagées par hôte via un PoolManager (plafond de concurrence par hôte)
+"""
+
+import json
+from urllib.parse import urlencode, urlsplit
+
+from .auth import HMACSigner, TokenManager
+from .http import DEFAULT_MAX_CONNECTIONS_PER_HOST, DEFAULT_TIMEOUT, USER_AGENT, PoolManager
+
+
+class APIClient:
+    """Client d'une API : URL de base, pool de connexions et authentification
+
+    Utilisable comme contexte asynchrone (`async with ... as client`) pour
+    fermer connexions et tâches de fond.
+    """
+
+    def __init__(self, base_url, pools=None, max_connections_per_host=DEFAULT_MAX_CONNECTIONS_PER_HOST,
+                 timeout=DEFAULT_TIMEOUT):
+        parts = urlsplit(base_url)
+        self.base_url = base_url.rstrip('/')
+        self.base_path = parts.path.rstrip('/')
+        self._owns_pools = pools is None
+        self.pools = pools or PoolManager(max_connections_per_host, timeout)
+        self.pool = self.pools.pool(base_url)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def auth_headers(self, method, path, body):
+        """En-têtes d'authentification d'une requête (à définir par API)"""
+        return {}
+
+    async def send(self, method, path, headers=None, body=b'', query=''):
+        """Envoyer une requête sans authentification -> Response"""
+        target = self.base_path + path + (f"?{query}" if query else '')
+        return await self.pool.request(method, target, {"User-Agent": USER_AGENT, **(headers or {})}, body)
+
+    async def request(self, method, path, params=None, json_body=None, body=b'', headers=None):
+        """Requête authentifiée -> Response (sans lever d'exception sur 4xx/5xx)"""
+        headers = dict(headers or {})
+        if json_body is not None:
+            body = json.dumps(json_body, separators=(',', ':')).encode('utf-8')
+            headers.setdefault("Content-Type", "application/json")
+        query = urlencode(params, doseq=True) if params else ''
+        return await self._send_authenticated(method, path, headers, body, query)
+
+    async def _send_authenticated(self, method, path, headers, body, query):
+        headers.update(await self.auth_headers(method, self.base_path + path, body))
+        return await self.send(method, path, headers, body, query)
+
+    async def get(self, path, params=None, **kwargs):
+        return await self.request('GET', path, params=params, **kwargs)
+
+    async def post(self, path, json_body=None, **kwargs):
+        return await self.request('POST', path, json_body=json_body, **kwargs)
+
+    async def put(self, path, json_body=None, **kwargs):
+        return await self.request('PUT', path, json_body=json_body, **kwargs)
+
+    async def delete(self, path, **kwargs):
+        return await self.request('DELETE', path, **kwargs)
+
+    async def close(self):
+        if self._owns_pools:
+            await self.pools.close()
+
+
+class MedSchedulerClient(APIClient):
+    """Client MedScheduler : chaque requête est signée (HMAC)"""
+
+    def __init__(self, base_url, client_id, secret_key, **kwargs):
+        super().__init__(base_url, **kwargs)
+        self.signer = HMACSigner(client_id, secret_key)
+
+    async def auth_headers(self, method, path, body):
+        return await self.signer.headers(method, path, body)
+
+
+class HealthCareProClient(APIClient):
+    """Client HealthCare Pro : token Bearer renouvelé avant expiration
+
+    Si l'API refuse malgré tout le token (401, ex: révocation), il est
+    renouvelé et la requête est rejouée une fois.
+    """
+
+    def __init__(self, base_url, client_id, client_secret, scope=None, **kwargs):
+        super().__init__(base_url, **kwargs)
+        self.tokens = TokenManager(self.send, client_id, client_secret, scope)
+
+    async def auth_headers(self, method, path, body):
+        return await self.tokens.headers()
+
+    async def _send_authenticated(self, method, path, headers, body, query):
+        token = (await self.tokens.headers())["Authorization"]
+        response = await self.send(method, path, {**headers, "Authorization": token}, body, query)
+        if response.status == 401:
+            await self.tokens.renew(rejected_token=token[len("Bearer "):])
+            headers.update(await self.tokens.headers())
+            response = await self.send(method, path, headers, body, query)
+        return response
+
+    async def send_hl7(self, message, path='/hl7/ADT'):
+        """Envoyer un ou plusieurs messages HL7 v2 (texte ou bytes) -> Response (accusés)"""
+        body = message.encode('utf-8') if isinstance(message, str) else message
+        return await self.request('POST', path, body=body, headers={"Content-Type": "application/hl7-v2"})
+
+    async def close(self):
+        await self.tokens.close()
+        await super().close()
@@ -0,0 +1,157 @@
+"""
+Authentification du client
+- MedScheduler : signature HMAC-SHA256 de chaque requête (même schéma que
+  generate_signature côté API : {METHOD}\\n{PATH}\\n{TIMESTAMP}\\n{BODY}, en base64)
+- HealthCare Pro : token d'accès JWT (10 s) obtenu par client_credentials puis
+  renouvelé par refresh token avant son expiration
+  - renouvellement en tâche de fond tant que le client est utilisé : les
+    requêtes n'attendent pas de token et ne reçoivent pas de 401
+  - un seul renouvellement en vol, partagé par tous les appelants (un refresh
+    token n'est échangeable qu'une fois)
+"""
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import time
+
+from .http import ClientError
+
+REFRESH_RATIO = 0.6   # Renouveler après 60 % de la durée de vie du token
+IDLE_SECONDS = 60     # Sans requête depuis ce délai : plus de renouvellement en tâche de fond
+
+
+class AuthenticationError(ClientError):
+    """Identifiants refusés ou token impossible à obtenir"""
+
+
+class HMACSigner:
+    """En-têtes d'authentification MedScheduler (X-Client-ID, X-Timestamp, X-Signature)"""
+
+    def __init__(self, client_id, secret_key, clock=time.time):
+        self.client_id = client_id
+        self.clock = clock
+        self._key = hmac.new(secret_key.encode('utf-8'), digestmod=hashlib.sha256)
+
+    def signature(self, method, path, timestamp, body=b''):
+        """Signature d'une requête (chemin sans query string, corps brut)"""
+        hasher = self._key.copy()
+        hasher.update(f"{method}\n{path}\n{timestamp}\n".encode('utf-8'))
+        hasher.update(body.encode('utf-8') if isinstance(body, str) else body)
+        return base64.b64encode(hasher.digest()).decode('utf-8')
+
+    async def headers(self, method, path, body=b''):
+        timestamp = str(int(self.clock()))
+        return {
+            "X-Client-ID": self.client_id,
+            "X-Timestamp": timestamp,
+            "X-Signature": self.signature(method, path, timestamp, body),
+        }
+
+
+class TokenManager:
+    """Tokens HealthCare Pro d'un client, renouvelés avant expiration
+
+    `send(method, path, headers, body)` envoie une requête non authentifiée
+    (fournie par le client) -> Response.
+    """
+
+    def __init__(self, send, client_id, client_secret, scope=None, token_path='/auth/token',
+                 refresh_ratio=REFRESH_RATIO, idle_seconds=IDLE_SECONDS, clock=time.monotonic):
+        self.send = send
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.scope = scope
+        self.token_path = token_path
+        self.refresh_ratio = refresh_ratio
+        self.idle_seconds = idle_seconds
+        self.clock = clock
+        self.access_token = None
+        self.refresh_token = None
+        self.expires_at = 0    # Horloge monotone
+        self.refresh_at = 0
+        self.renewals = 0
+        self._last_used = 0
+        self._inflight = None  # Renouvellement en cours, partagé
+        self._background = None
+
+    async def headers(self, method=None, path=None, body=b''):
+        self._last_used = self.clock()
+        if self.access_token is None or self.clock() >= self.refresh_at:
+            await self.renew()
+        return {"Authorization": f"Bearer {self.access_token}"}
+
+    async def renew(self, rejected_token=None):
+        """Renouveler le token (une seule requête pour tous les appelants simultanés)
+
+        `rejected_token` : token refusé par l'API (401) ; s'il a déjà été remplacé,
+        rien n'est renouvelé.
+        """
+        if rejected_token is not None and rejected_token != self.access_token:
+            return
+        if self._inflight is None:
+            self._inflight = asyncio.ensure_future(self._renew())
+            self._inflight.add_done_callback(self._renewed)
+        # shield : l'annulation d'un appelant n'annule pas le renouvellement des autres
+        await asyncio.shield(self._inflight)
+
+    def _renewed(self, future):
+        self._inflight = None
+        if not future.cancelled() and future.exception() is None and self._background is None:
+            self._background = asyncio.ensure_future(self._refresh_in_background())
+
+    async def _renew(self):
+        data = None
+        if self.refresh_token:
+            data = await self._token_request({"grant_type": "refresh_token",
+                                              "refresh_token": self.refresh_token})
+        if data is None:
+            # Pas de refresh token, ou refresh token expiré/révoqué : identifiants du client
+            payload = {"grant_type": "client_credentials", "client_id": self.client_id,
+                       "client_secret": self.client_secret}
+            if self.scope:
+                payload["scope"] = self.scope
+            data = await self._token_request(payload)
+            if data is None:
+                raise AuthenticationError("Token request rejected (client_credentials)")
+        now = self.clock()
+        lifetime = data.get("expires_in", 0)
+        self.access_token = data["access_token"]
+        self.refresh_token = data.get("refresh_token")
+        self.expires_at = now + lifetime
+        self.refresh_at = now + lifetime * self.refresh_ratio
+        self.renewals += 1
+
+    async def _token_request(self, payload):
+        """Réponse JSON d'une demande de token, None si elle est refusée (4xx)"""
+        response = await self.send('POST', self.token_path, {"Content-Type": "application/json"},
+                                   json.dumps(payload).encode('utf-8'))
+        if 400 <= response.status < 500:
+            return None
+        response.raise_for_status()
+        return response.json()
+
+    async def _refresh_in_background(self):
+        """Renouveler à `refresh_at` tant que le client a servi récemment"""
+        try:
+            while True:
+                await asyncio.sleep(max(0, self.refresh_at - self.clock()))
+                if self.clock() - self._last_used > self.idle_seconds:
+                    return  # Client inactif : le prochain appel renouvellera lui-même
+                if self.clock() >= self.refresh_at:
+                    try:
+                        await self.renew()
+                    except (ClientError, OSError, asyncio.TimeoutError):
+                        return  # Le prochain appel renouvellera (et remontera l'erreur)
+        finally:
+            self._background = None
+
+    async def close(self):
+        if self._background is not None:
+            self._background.cancel()
+            try:
+                await self._background
+            except asyncio.CancelledError:
+                pass
@@ -0,0 +1,114 @@
+"""
+Calendrier de disponibilités fusionné des deux APIs
+- Sources lues à la demande, jour par jour : MedScheduler /availabilities/free
+  (créneaux "HH:MM" déjà privés des rendez-vous) et HealthCare Pro
+  /api/availabilities (créneaux "HH:MM:SS" avec indicateur `available`),
+  les deux sources d'un jour étant interrogées en parallèle
+- Créneaux normalisés en Slot (début en datetime, praticien, source)
+- Fusion k-voies (heapq.merge) des grilles de tous les praticiens : un seul
+  flux trié par heure, sans trier de liste complète
+- "N premiers créneaux libres après T" : les jours suivants ne sont demandés
+  que si les N créneaux ne sont pas encore trouvés
+"""
+
+import asyncio
+from collections import namedtuple
+from datetime import datetime, time, timedelta
+import heapq
+from operator import attrgetter
+
+MEDSCHEDULER, HEALTHCARE_PRO = "medscheduler", "healthcare_pro"
+DEFAULT_PAGE_LIMIT = 1000
+DEFAULT_MAX_DAYS = 31
+
+# Créneau normalisé ; `availability_id` = grille d'origine dans sa source
+Slot = namedtuple('Slot', ('start', 'practitioner', 'source', 'availability_id'))
+
+_start = attrgetter('start')
+
+
+def parse_clock(text):
+    """'14:30' ou '14:30:00' -> time"""
+    return time(int(text[:2]), int(text[3:5]), int(text[6:8] or 0))
+
+
+def medscheduler_slots(grid):
+    """Créneaux triés d'une grille MedScheduler ({doctor_name, date, slots})"""
+    day = datetime.strptime(grid["date"], "%Y-%m-%d").date()
+    for text in sorted(grid.get("slots", ())):
+        yield Slot(datetime.combine(day, parse_clock(text)), grid["doctor_name"], MEDSCHEDULER, grid.get("id"))
+
+
+def healthcare_pro_slots(grid):
+    """Créneaux libres triés d'une grille HealthCare Pro ({practitioner, day, time_slots})"""
+    day = datetime.strptime(grid["day"], "%Y-%m-%d").date()
+    times = sorted(slot["time"] for slot in grid.get("time_slots", ()) if slot.get("available"))
+    for text in times:
+        yield Slot(datetime.combine(day, parse_clock(text)), grid["practitioner"], HEALTHCARE_PRO,
+                   grid.get("availability_id"))
+
+
+def merge_slots(streams):
+    """Fusion k-voies de flux de créneaux déjà triés -> un flux trié par heure"""
+    return heapq.merge(*streams, key=_start)
+
+
+class AvailabilityCalendar:
+    """Disponibilités fusionnées d'un MedSchedulerClient et/ou d'un HealthCareProClient
+
+    Les grilles d'un jour sont lues entièrement (une grille peut contenir le
+    créneau le plus tôt) ; les jours ne sont lus qu'au fil de l'itération.
+    """
+
+    def __init__(self, medscheduler=None, healthcare_pro=None, page_limit=DEFAULT_PAGE_LIMIT):
+        self.medscheduler = medscheduler
+        self.healthcare_pro = healthcare_pro
+        self.page_limit = page_limit
+
+    async def _medscheduler_grids(self, day):
+        response = await self.medscheduler.get("/availabilities/free", params={"date": day.isoformat()})
+        return response.raise_for_status().json()["availabilities"]
+
+    async def _healthcare_pro_grids(self, day):
+        grids = []
+        params = {"day": day.isoformat(), "limit": self.page_limit}
+        while True:
+            data = (await self.healthcare_pro.get("/api/availabilities", params=params)).raise_for_status().json()
+            grids.extend(data["data"])
+            if not data.get("next_cursor"):
+                return grids
+            params["cursor"] = data["next_cursor"]
+
+    async def day_slots(self, day):
+        """Créneaux libres d'un jour, toutes sources et tous praticiens, triés par heure"""
+        sources = []
+        if self.medscheduler is not None:
+            sources.append((self._medscheduler_grids(day), medscheduler_slots))
+        if self.healthcare_pro is not None:
+            sources.append((self._healthcare_pro_grids(day), healthcare_pro_slots))
+        grids = await asyncio.gather(*(fetch for fetch, _ in sources))
+        return merge_slots(to_slots(grid) for (_, to_slots), source_grids in zip(sources, grids)
+                           for grid in source_grids)
+
+    async def slots(self, after, max_days=DEFAULT_MAX_DAYS, practitioners=None):
+        """Créneaux libres à partir de `after` (datetime), triés, sur au plus `max_days` jours"""
+        for offset in range(max_days):
+            day = after.date() + timedelta(days=offset)
+            for slot in await self.day_slots(day):
+                if slot.start >= after and (practitioners is None or slot.practitioner in practitioners):
+                    yield slot
+
+    async def first_free(self, count, after, max_days=DEFAULT_MAX_DAYS, practitioners=None):
+        """Les `count` premiers créneaux libres à partir de `after`"""
+        result = []
+        if count <= 0:
+            return result
+        stream = self.slots(after, max_days, practitioners)
+        try:
+            async for slot in stream:
+                result.append(slot)
+                if len(result) >= count:
+                    break
+        finally:
+            await stream.aclose()
+        return result
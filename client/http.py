@@ -0,0 +1,172 @@
+"""
+Transport HTTP/1.1 asyncio du client (sans dépendance externe)
+- Connexions keep-alive réutilisées, regroupées par hôte (ConnectionPool)
+- Nombre de requêtes simultanées plafonné par hôte : au-delà, les appels attendent
+- Une connexion inactive fermée par le serveur est rouverte une fois, de façon transparente
+"""
+
+import asyncio
+from collections import deque
+import json
+import ssl as ssl_module
+from urllib.parse import urlsplit
+
+DEFAULT_MAX_CONNECTIONS_PER_HOST = 10
+DEFAULT_TIMEOUT = 30
+USER_AGENT = "healthcare-apis-client/1.0"
+
+
+class ClientError(Exception):
+    """Erreur du client (réseau, authentification, réponse d'erreur)"""
+
+
+class HTTPStatusError(ClientError):
+    """Réponse HTTP 4xx/5xx"""
+
+    def __init__(self, response):
+        self.response = response
+        super().__init__(f"HTTP {response.status}: {response.body[:200].decode('utf-8', 'replace')}")
+
+
+class Response:
+    """Réponse HTTP : statut, en-têtes (noms en minuscules) et corps brut"""
+
+    __slots__ = ('status', 'headers', 'body')
+
+    def __init__(self, status, headers, body):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def __repr__(self):
+        return f"<Response {self.status}>"
+
+    @property
+    def ok(self):
+        return self.status < 400
+
+    @property
+    def text(self):
+        return self.body.decode('utf-8', 'replace')
+
+    def json(self):
+        return json.loads(self.body) if self.body else None
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise HTTPStatusError(self)
+        return self
+
+
+async def read_response(reader, method):
+    """Lire une réponse HTTP/1.1 -> (Response, keep_alive)"""
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    version, status = lines[0].split(' ', 2)[:2]
+    status = int(status)
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+
+    keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+    if method == 'HEAD' or status in (204, 304) or 100 <= status < 200:
+        body = b''
+    elif headers.get('transfer-encoding', '').lower() == 'chunked':
+        chunks = []
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            chunks.append((await reader.readexactly(size + 2))[:-2])
+            if size == 0:
+                break
+        body = b''.join(chunks)
+    elif 'content-length' in headers:
+        body = await reader.readexactly(int(headers['content-length']))
+    else:
+        # Corps délimité par la fermeture de la connexion
+        body = await reader.read()
+        keep_alive = False
+    return Response(status, headers, body), keep_alive
+
+
+class ConnectionPool:
+    """Connexions keep-alive vers un hôte, au plus `max_connections` requêtes simultanées"""
+
+    def __init__(self, host, port, ssl=None, max_connections=DEFAULT_MAX_CONNECTIONS_PER_HOST,
+                 timeout=DEFAULT_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.ssl = ssl
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._idle = deque()  # (reader, writer) prêts à être réutilisés
+        self._slots = asyncio.Semaphore(max_connections)
+
+    async def request(self, method, target, headers, body=b''):
+        """Envoyer une requête (cible = chemin + query) -> Response"""
+        lines = [f"{method} {target} HTTP/1.1", f"Host: {self.host}"]
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        if body or method in ('POST', 'PUT', 'PATCH'):
+            lines.append(f"Content-Length: {len(body)}")
+        raw = ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body
+
+        async with self._slots:
+            connection = self._idle.pop() if self._idle else None
+            if connection is not None:
+                try:
+                    return await self._exchange(connection, raw, method)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    # Connexion fermée par le serveur pendant l'inactivité : nouvel essai
+                    pass
+            return await self._exchange(await self._connect(), raw, method)
+
+    async def _connect(self):
+        try:
+            return await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port, ssl=self.ssl), self.timeout)
+        except (OSError, asyncio.TimeoutError) as e:
+            raise ClientError(f"Cannot connect to {self.host}:{self.port}: {e}") from e
+
+    async def _exchange(self, connection, raw, method):
+        reader, writer = connection
+        try:
+            writer.write(raw)
+            response, keep_alive = await asyncio.wait_for(read_response(reader, method), self.timeout)
+        except BaseException:
+            writer.close()
+            raise
+        if keep_alive:
+            self._idle.append(connection)
+        else:
+            writer.close()
+        return response
+
+    async def close(self):
+        while self._idle:
+            _, writer = self._idle.pop()
+            writer.close()
+
+
+class PoolManager:
+    """Un ConnectionPool par hôte (schéma, hôte, port), partageable entre clients"""
+
+    def __init__(self, max_connections_per_host=DEFAULT_MAX_CONNECTIONS_PER_HOST, timeout=DEFAULT_TIMEOUT):
+        self.max_connections_per_host = max_connections_per_host
+        self.timeout = timeout
+        self._pools = {}
+
+    def pool(self, url):
+        parts = urlsplit(url)
+        secure = parts.scheme == 'https'
+        key = (parts.scheme, parts.hostname, parts.port or (443 if secure else 80))
+        if key not in self._pools:
+            self._pools[key] = ConnectionPool(
+                key[1], key[2], ssl=ssl_module.create_default_context() if secure else None,
+                max_connections=self.max_connections_per_host, timeout=self.timeout)
+        return self._pools[key]
+
+    async def close(self):
+        for pool in self._pools.values():
+            await pool.close()
+        self._pools.clear()
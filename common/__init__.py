@@ -0,0 +1,3 @@
+"""
+Briques communes aux APIs MedScheduler et HealthCare Pro
+"""
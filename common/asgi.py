@@ -0,0 +1,268 @@
+"""
+Mode de service asynchrone (ASGI) des applications Flask
+- Connexions, keep-alive, lecture du corps et envoi de la réponse sont gérés par la
+  boucle asyncio du serveur ASGI (uvicorn) : un client lent n'occupe aucun thread
+- Corps de requête : les premiers BODY_PREFETCH_BYTES sont lus par la boucle avant
+  la vue (un petit corps est donc complet) ; la suite est demandée à la boucle bloc
+  par bloc quand la vue lit `wsgi.input`, sans mettre tout le corps en mémoire
+- Seule l'exécution de la vue Flask (mêmes routes, mêmes décorateurs
+  d'authentification, mêmes réponses) passe par un pool de threads borné
+- Les réponses en streaming sont produites par blocs dans le pool et envoyées
+  au fil de l'eau, sans bloquer la boucle
+- Une vue peut confier à la boucle un corps asynchrone (`environ[ASYNC_BODY_KEY]`),
+  ex: flux SSE longs (common/events.py) qui n'occupent alors aucun thread
+
+Exemple : gunicorn --worker-class uvicorn.workers.UvicornWorker --bind 0.0.0.0:5001 asgi:application
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import io
+import json
+import sys
+
+from werkzeug.exceptions import ClientDisconnected, RequestEntityTooLarge
+
+DEFAULT_MAX_THREADS = 32
+DEFAULT_MAX_BODY_BYTES = 64 * 1024 * 1024
+BODY_PREFETCH_BYTES = 64 * 1024   # Début du corps lu par la boucle avant d'appeler la vue
+RESPONSE_BATCH_BYTES = 64 * 1024  # Octets produits par passage dans le pool avant envoi
+
+# Clé d'environnement : présente (None) sous ASGI ; une vue y dépose un itérable
+# asynchrone de bytes qui remplace le corps WSGI de sa réponse
+ASYNC_BODY_KEY = 'common.asgi.async_body'
+
+
+class ReceiveStream(io.RawIOBase):
+    """Suite du corps d'une requête, lue depuis le thread de la vue (`wsgi.input`)
+
+    Chaque lecture qui épuise le bloc courant demande le message suivant à la
+    boucle (`receive`) : la réception suit le rythme de la vue et seul le bloc en
+    cours est gardé en mémoire. Au-delà de `max_bytes` : 413 (RequestEntityTooLarge).
+    """
+
+    def __init__(self, head, receive, loop, max_bytes):
+        self._chunk = memoryview(head)
+        self._more = True
+        self._size = len(head)
+        self._receive = receive
+        self._loop = loop
+        self.max_bytes = max_bytes
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._chunk and self._more:
+            self._next()
+        size = min(len(buffer), len(self._chunk))
+        buffer[:size] = self._chunk[:size]
+        self._chunk = self._chunk[size:]
+        return size
+
+    def _next(self):
+        message = asyncio.run_coroutine_threadsafe(self._receive(), self._loop).result()
+        if message['type'] == 'http.disconnect':
+            self._more = False
+            raise ClientDisconnected()
+        chunk = message.get('body', b'')
+        self._size += len(chunk)
+        if self._size > self.max_bytes:
+            self._more = False
+            raise RequestEntityTooLarge()
+        self._chunk = memoryview(chunk)
+        self._more = message.get('more_body', False)
+
+
+def build_environ(scope, body, stream=None):
+    """Environnement WSGI (PEP 3333) d'une requête HTTP ASGI
+
+    `body` est le corps complet, ou seulement son début si la suite est lue à la
+    demande depuis `stream` (ReceiveStream).
+    """
+    root_path = scope.get('root_path', '')
+    path = scope['path']
+    if root_path and path.startswith(root_path):
+        path = path[len(root_path):]
+    server = scope.get('server') or ('localhost', 80)
+
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': root_path.encode('utf-8').decode('latin-1'),
+        'PATH_INFO': path.encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body) if stream is None else io.BufferedReader(stream, RESPONSE_BATCH_BYTES),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+        ASYNC_BODY_KEY: None,
+    }
+    if scope.get('client'):
+        environ['REMOTE_ADDR'], environ['REMOTE_PORT'] = scope['client'][0], str(scope['client'][1])
+
+    for raw_name, raw_value in scope['headers']:
+        name = raw_name.decode('latin-1').upper().replace('-', '_')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = 'HTTP_' + name
+        value = raw_value.decode('latin-1')
+        environ[name] = f"{environ[name]},{value}" if name in environ else value
+
+    if stream is None:
+        # Corps entièrement lu : sa taille réelle fait foi (y compris en chunked)
+        environ['CONTENT_LENGTH'] = str(len(body))
+    elif 'CONTENT_LENGTH' not in environ:
+        # Chunked : le flux se termine de lui-même, sans longueur annoncée
+        environ['wsgi.input_terminated'] = True
+    return environ
+
+
+def _pull(chunks, budget=RESPONSE_BATCH_BYTES):
+    """Lire des blocs de la réponse WSGI jusqu'à `budget` octets -> (données, terminé)"""
+    batch = []
+    size = 0
+    for chunk in chunks:
+        if chunk:
+            batch.append(chunk)
+            size += len(chunk)
+        if size >= budget:
+            return b''.join(batch), False
+    return b''.join(batch), True
+
+
+class ASGIApp:
+    """Adaptateur ASGI d'une application WSGI (Flask)"""
+
+    def __init__(self, wsgi_app, max_threads=DEFAULT_MAX_THREADS, max_body_bytes=DEFAULT_MAX_BODY_BYTES):
+        self.wsgi_app = wsgi_app
+        self.max_body_bytes = max_body_bytes
+        self.executor = ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix='wsgi')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self._http(scope, receive, send)
+        else:
+            raise ValueError(f"Unsupported ASGI scope type: {scope['type']}")
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _read_head(self, receive):
+        """Début du corps lu sans bloquer de thread -> (données, suite à lire), None si trop gros
+
+        Lecture arrêtée après BODY_PREFETCH_BYTES : la suite reste dans `receive`.
+        """
+        chunks = []
+        size = 0
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return None
+            chunk = message.get('body', b'')
+            size += len(chunk)
+            if size > self.max_body_bytes:
+                return None
+            chunks.append(chunk)
+            more = message.get('more_body', False)
+            if not more or size >= BODY_PREFETCH_BYTES:
+                return b''.join(chunks), more
+
+    async def _http(self, scope, receive, send):
+        declared = dict(scope['headers']).get(b'content-length', b'0')
+        head = None
+        if not declared.isdigit() or int(declared) <= self.max_body_bytes:
+            head = await self._read_head(receive)
+        if head is None:
+            payload = json.dumps({"error": "Request body too large",
+                                  "max_bytes": self.max_body_bytes}).encode('utf-8')
+            await send({'type': 'http.response.start', 'status': 413,
+                        'headers': [(b'content-type', b'application/json'),
+                                    (b'content-length', str(len(payload)).encode('ascii'))]})
+            await send({'type': 'http.response.body', 'body': payload})
+            return
+
+        loop = asyncio.get_running_loop()
+        body, more = head
+        stream = ReceiveStream(body, receive, loop, self.max_body_bytes) if more else None
+        environ = build_environ(scope, body, stream)
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [
+                (name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers
+            ]
+            return self._write_unsupported
+
+        def run():
+            result = self.wsgi_app(environ, start_response)
+            chunks = iter(result)
+            return (result, chunks) + _pull(chunks)
+
+        result, chunks, data, done = await loop.run_in_executor(self.executor, run)
+        async_body = environ[ASYNC_BODY_KEY]
+        if async_body is not None:
+            if hasattr(result, 'close'):
+                await loop.run_in_executor(self.executor, result.close)
+            await self._stream(async_body, response, receive, send)
+            return
+        try:
+            await send({'type': 'http.response.start', 'status': response['status'],
+                        'headers': response['headers']})
+            await send({'type': 'http.response.body', 'body': data, 'more_body': not done})
+            while not done:
+                data, done = await loop.run_in_executor(self.executor, _pull, chunks)
+                await send({'type': 'http.response.body', 'body': data, 'more_body': not done})
+        finally:
+            if hasattr(result, 'close'):
+                await loop.run_in_executor(self.executor, result.close)
+
+    async def _stream(self, body, response, receive, send):
+        """Envoyer un corps asynchrone jusqu'à sa fin ou la déconnexion du client"""
+        chunks = body.__aiter__()
+        disconnected = asyncio.ensure_future(self._wait_disconnect(receive))
+        try:
+            await send({'type': 'http.response.start', 'status': response['status'],
+                        'headers': response['headers']})
+            while True:
+                chunk = asyncio.ensure_future(chunks.__anext__())
+                await asyncio.wait((chunk, disconnected), return_when=asyncio.FIRST_COMPLETED)
+                if not chunk.done():
+                    # Générateur interrompu (et terminé) avant sa fermeture
+                    chunk.cancel()
+                    await asyncio.wait((chunk,))
+                    return
+                try:
+                    data = chunk.result()
+                except StopAsyncIteration:
+                    break
+                await send({'type': 'http.response.body', 'body': data, 'more_body': True})
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            disconnected.cancel()
+            await chunks.aclose()
+            if hasattr(body, 'close'):
+                body.close()
+
+    @staticmethod
+    async def _wait_disconnect(receive):
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    @staticmethod
+    def _write_unsupported(data):
+        raise NotImplementedError("WSGI write() callable is not supported")
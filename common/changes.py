@@ -0,0 +1,58 @@
+"""
+Flux de modifications pour la synchronisation incrémentale (GET /changes)
+- Séquence = révision globale du backend, croissante à chaque création,
+  modification ou suppression, toutes collections confondues
+- Compaction par clé : seule la dernière modification d'un enregistrement est
+  servie (avec son état courant) ; une suppression est servie sans enregistrement
+- Rétention bornée : au-delà de MAX_TOMBSTONES suppressions, les plus anciennes
+  sont oubliées ; un `since` antérieur à l'horizon impose une resynchronisation complète
+- `since=0` est toujours accepté : instantané complet (tous les enregistrements
+  vivants), puis `next_since` pour la suite. Les suppressions oubliées ne
+  concernent pas un consommateur qui part de zéro
+- Coût d'une synchronisation proportionnel au nombre de modifications
+"""
+
+from common.pagination import DEFAULT_PAGE_LIMIT, MAX_PAGE_LIMIT
+
+INSERT, UPDATE, DELETE = "insert", "update", "delete"
+
+
+def parse_changes_args(args):
+    """(since, limit) depuis request.args, ValueError si invalides"""
+    try:
+        since = int(args.get('since', 0))
+        limit = int(args.get('limit', DEFAULT_PAGE_LIMIT))
+    except ValueError:
+        raise ValueError("since and limit must be integers")
+    if since < 0:
+        raise ValueError("since must be a positive sequence number")
+    if not 1 <= limit <= MAX_PAGE_LIMIT:
+        raise ValueError(f"limit must be between 1 and {MAX_PAGE_LIMIT}")
+    return since, limit
+
+
+def read_changes(database, since, limit):
+    """Page du flux -> dict (changes, next_since, last_seq, has_more), None si `since` a expiré
+
+    Un `since` expiré (antérieur à l'horizon, hors 0) impose de vider la copie
+    locale et de repartir de `since=0`.
+    """
+    backend = database.backend
+    if 0 < since < backend.change_horizon():
+        return None
+    rows = backend.changes(since, limit + 1)
+    has_more = len(rows) > limit
+    changes = []
+    for collection, record_id, seq, rev, record in rows[:limit]:
+        if record is None:
+            action = DELETE
+        else:
+            action = INSERT if seq == rev else UPDATE
+        changes.append({"seq": rev, "collection": collection, "id": record_id, "action": action,
+                        "record": record})
+    return {
+        "changes": changes,
+        "next_since": changes[-1]["seq"] if changes else since,
+        "last_seq": backend.last_rev(),
+        "has_more": has_more,
+    }
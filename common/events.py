@@ -0,0 +1,299 @@
+"""
+Flux d'événements poussés aux abonnés (Server-Sent Events, GET /events)
+- Source : le flux de modifications (common/changes.py), lu par un thread de
+  relève réveillé à chaque écriture locale et, à intervalle régulier, pour les
+  écritures des autres workers (SQLite)
+- Identifiant d'événement = séquence du flux de modifications : identique sur
+  tous les workers, et `GET /changes?since=<id>` complète un flux interrompu
+- Tampon circulaire borné des derniers événements, déjà sérialisés une fois
+  pour tous les abonnés ; reprise par `Last-Event-ID` tant que l'identifiant
+  est dans le tampon, événement `reset` sinon
+- Abonnés synchrones (WSGI : un thread par connexion) ou asynchrones (ASGI :
+  aucun thread par connexion, un seul réveil par boucle asyncio et par lot)
+"""
+
+import asyncio
+from collections import deque
+import json
+import logging
+import os
+import threading
+import time
+
+from flask import Response, request
+
+from common.asgi import ASYNC_BODY_KEY
+from common.changes import read_changes
+
+DEFAULT_BUFFER_SIZE = 10000     # Événements gardés pour la reprise par Last-Event-ID
+DEFAULT_MAX_SUBSCRIBERS = 10000  # Connexions simultanées par processus
+POLL_INTERVAL_SECONDS = 1.0     # Relève des écritures des autres workers
+HEARTBEAT_SECONDS = 15          # Commentaire envoyé à une connexion inactive
+RETRY_MILLISECONDS = 3000       # Délai de reconnexion conseillé au client
+PUMP_BATCH = 1000               # Modifications lues par passage dans le flux
+
+logger = logging.getLogger(__name__)
+
+STREAM_HEADERS = {
+    'Cache-Control': 'no-cache',
+    'X-Accel-Buffering': 'no',  # Pas de mise en tampon par un proxy nginx
+}
+
+HEARTBEAT_FRAME = b": keepalive\n\n"
+
+
+def encode_event(event_id, event, data):
+    """Trame SSE (bytes) : id, type d'événement et données JSON sur une ligne"""
+    payload = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+    return f"id: {event_id}\nevent: {event}\ndata: {payload}\n\n".encode('utf-8')
+
+
+def parse_last_event_id(headers, args):
+    """Identifiant de reprise (en-tête Last-Event-ID ou ?last_event_id=), None sans reprise
+
+    ValueError si la valeur n'est pas une séquence.
+    """
+    value = headers.get('Last-Event-ID') or args.get('last_event_id')
+    if not value:
+        return None
+    try:
+        event_id = int(value)
+    except ValueError:
+        raise ValueError("Last-Event-ID must be an event sequence number")
+    if event_id < 0:
+        raise ValueError("Last-Event-ID must be a positive sequence number")
+    return event_id
+
+
+class _LoopWaker:
+    """Réveil des abonnés asynchrones d'une boucle : un événement asyncio renouvelé à chaque lot"""
+
+    def __init__(self):
+        self.event = asyncio.Event()
+
+    def fire(self):
+        event, self.event = self.event, asyncio.Event()
+        event.set()
+
+
+class EventBroker:
+    """Diffusion des modifications de collections aux abonnés SSE d'un processus
+
+    Le thread de relève démarre avec le premier abonné (et redémarre après un
+    fork) ; les événements antérieurs à son démarrage ne sont pas dans le tampon.
+    """
+
+    def __init__(self, database, collections, buffer_size=DEFAULT_BUFFER_SIZE,
+                 max_subscribers=DEFAULT_MAX_SUBSCRIBERS, poll_interval=POLL_INTERVAL_SECONDS):
+        self.database = database
+        self.names = frozenset(collection.name for collection in collections)
+        self.buffer_size = buffer_size
+        self.max_subscribers = max_subscribers
+        self.poll_interval = poll_interval
+        self.subscribers = 0
+        self._frames = deque()  # (séquence, trame), séquences croissantes
+        self._floor = 0         # Séquence à partir de laquelle le tampon est complet
+        self._head = 0          # Dernière séquence relevée
+        self._condition = threading.Condition()
+        self._wakers = {}       # boucle asyncio -> _LoopWaker
+        self._wake = threading.Event()
+        self._pid = None
+        for collection in collections:
+            collection.subscribe(self._on_write)
+
+    def _on_write(self, action, record):
+        if not self._wake.is_set():  # Lot d'écritures : un seul réveil
+            self._wake.set()
+
+    def _start(self):
+        """Démarrer le thread de relève à la position courante du flux (sous le verrou)"""
+        if self._pid == os.getpid():
+            return
+        self._head = self._floor = self.database.backend.last_rev()
+        self._frames.clear()
+        self._wakers = {}
+        self._pid = os.getpid()
+        threading.Thread(target=self._run, name='event-pump', daemon=True).start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            try:
+                self._pump()
+            except Exception:
+                # Ex: base SQLite verrouillée trop longtemps ; nouvel essai au prochain réveil
+                logger.exception("Event pump failed, retrying")
+
+    def _pump(self):
+        """Relever les modifications depuis la dernière séquence et les publier"""
+        has_more = True
+        while has_more:
+            page = read_changes(self.database, self._head, PUMP_BATCH)
+            if page is None:
+                # Relève en retard au-delà de l'horizon : repartir de la position courante
+                self._publish((), self.database.backend.last_rev(), reset=True)
+                return
+            frames = [
+                (change["seq"], encode_event(change["seq"], change["collection"], change))
+                for change in page["changes"] if change["collection"] in self.names
+            ]
+            if page["next_since"] > self._head:
+                self._publish(frames, page["next_since"])
+            has_more = page["has_more"]
+
+    def _publish(self, frames, head, reset=False):
+        with self._condition:
+            if reset:
+                self._frames.clear()
+                self._floor = head
+            self._frames.extend(frames)
+            while len(self._frames) > self.buffer_size:
+                self._floor = self._frames.popleft()[0]
+            self._head = head
+            self._condition.notify_all()
+            wakers = list(self._wakers.items())
+        for loop, waker in wakers:
+            try:
+                loop.call_soon_threadsafe(waker.fire)
+            except RuntimeError:
+                # Boucle fermée : ses abonnés sont partis avec elle
+                with self._condition:
+                    self._wakers.pop(loop, None)
+
+    def subscribe(self, last_event_id=None, expires_at=None):
+        """Nouvel abonnement, None si le nombre maximum d'abonnés est atteint
+
+        `last_event_id` : dernier événement reçu (reprise), None pour les seuls
+        événements à venir. `expires_at` : fin du flux (timestamp), ex: expiration
+        du token ayant ouvert la connexion.
+        """
+        with self._condition:
+            if self.subscribers >= self.max_subscribers:
+                return None
+            self._start()
+            self.subscribers += 1
+            cursor = self._head if last_event_id is None else last_event_id
+            if cursor > self._head and cursor > self.database.backend.last_rev():
+                cursor = -1  # Identifiant jamais attribué (ex: redémarrage sans persistance) : reset
+        return Subscription(self, cursor, expires_at)
+
+    def _unsubscribe(self):
+        with self._condition:
+            self.subscribers -= 1
+
+    def _waker(self, loop):
+        with self._condition:
+            waker = self._wakers.get(loop)
+            if waker is None:
+                waker = self._wakers[loop] = _LoopWaker()
+            return waker
+
+    def _take(self, cursor):
+        """Trames postérieures à `cursor` -> (nouveau curseur, bytes) ; reset si hors du tampon
+
+        Appelé sous le verrou. Les trames sont lues depuis la fin du tampon :
+        un abonné à jour ne parcourt que les nouveaux événements. Le curseur
+        avance aussi sur les modifications d'autres collections (sans trame).
+        """
+        if cursor < self._floor:
+            frame = encode_event(self._head, "reset", {
+                "reason": "Missed events are no longer buffered, resync with the change feed",
+                "id": self._head,
+            })
+            return self._head, frame
+        if cursor >= self._head:
+            # À jour, ou reprise d'un id déjà attribué que la relève n'a pas encore lu
+            return cursor, b''
+        pending = []
+        for seq, frame in reversed(self._frames):
+            if seq <= cursor:
+                break
+            pending.append(frame)
+        pending.reverse()
+        return self._head, b''.join(pending)
+
+    def stats(self):
+        with self._condition:
+            return {"subscribers": self.subscribers, "buffered": len(self._frames),
+                    "floor": self._floor, "head": self._head}
+
+
+class Subscription:
+    """Connexion SSE d'un abonné : itérable synchrone (WSGI) ou asynchrone (ASGI)
+
+    `close()` libère la place de l'abonné ; appelée par le serveur en fin de
+    réponse, y compris si le flux n'a jamais été lu.
+    """
+
+    def __init__(self, broker, cursor, expires_at=None):
+        self.broker = broker
+        self.cursor = cursor
+        self.expires_at = expires_at
+        self._closed = False
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self.broker._unsubscribe()
+
+    def _timeout(self):
+        """Attente maximale avant le prochain heartbeat, None si le flux a expiré"""
+        if self.expires_at is None:
+            return HEARTBEAT_SECONDS
+        remaining = self.expires_at - time.time()
+        return min(HEARTBEAT_SECONDS, remaining) if remaining > 0 else None
+
+    def __iter__(self):
+        broker = self.broker
+        yield f"retry: {RETRY_MILLISECONDS}\n\n".encode('ascii')
+        try:
+            while True:
+                with broker._condition:
+                    self.cursor, data = broker._take(self.cursor)
+                    if not data:
+                        timeout = self._timeout()
+                        if timeout is None:
+                            return
+                        if broker._condition.wait(timeout):
+                            continue
+                        data = HEARTBEAT_FRAME
+                yield data
+        finally:
+            self.close()
+
+    async def __aiter__(self):
+        broker = self.broker
+        waker = broker._waker(asyncio.get_running_loop())
+        yield f"retry: {RETRY_MILLISECONDS}\n\n".encode('ascii')
+        try:
+            while True:
+                # Événement capturé avant la lecture : un lot publié entre les deux le déclenche
+                event = waker.event
+                with broker._condition:
+                    self.cursor, data = broker._take(self.cursor)
+                if not data:
+                    timeout = self._timeout()
+                    if timeout is None:
+                        return
+                    try:
+                        await asyncio.wait_for(event.wait(), timeout)
+                    except asyncio.TimeoutError:
+                        yield HEARTBEAT_FRAME
+                    continue
+                yield data
+        finally:
+            self.close()
+
+
+def event_stream_response(subscription):
+    """Réponse Flask d'un abonnement pour la requête courante
+
+    Sous ASGI (common/asgi.py), le flux est servi par la boucle asyncio sans
+    occuper de thread ; sous WSGI, par le thread de la requête.
+    """
+    body = subscription
+    if ASYNC_BODY_KEY in request.environ:
+        request.environ[ASYNC_BODY_KEY] = subscription
+        body = iter(())  # Pas une séquence : aucun Content-Length calculé
+    return Response(body, mimetype='text/event-stream', headers=STREAM_HEADERS)
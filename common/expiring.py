@@ -0,0 +1,109 @@
+"""
+Structures à expiration temporelle et mémoire bornée
+- Tas trié par date d'expiration : l'éviction se fait au fil des opérations
+- Taille maximale : au-delà, un dictionnaire (cache) évince les entrées les plus
+  proches de l'expiration ; un ensemble (registre) refuse les nouveaux éléments
+"""
+
+import heapq
+import threading
+import time
+
+
+class CapacityError(Exception):
+    """Structure pleine : aucun élément expiré à évincer pour en accueillir un nouveau"""
+
+
+class ExpiringDict:
+    """Dictionnaire borné dont chaque entrée expire à une date donnée"""
+
+    def __init__(self, max_size=100000, clock=time.time):
+        self.max_size = max_size
+        self.clock = clock
+        self._entries = {}  # clé -> (date d'expiration, valeur)
+        self._heap = []     # (date d'expiration, clé)
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.rejections = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        entry = self._entries.get(key)
+        return entry is not None and entry[0] > self.clock()
+
+    def get(self, key, default=None):
+        """Valeur d'une entrée non expirée, `default` sinon"""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= self.clock():
+            return default
+        return entry[1]
+
+    def set(self, key, value, expires_at):
+        """Ajouter ou remplacer une entrée"""
+        with self._lock:
+            self._purge(self.clock())
+            self._set(key, value, expires_at)
+
+    def discard(self, key):
+        """Retirer une entrée (l'entrée du tas est ignorée à son éviction)"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def purge(self):
+        """Évincer toutes les entrées expirées"""
+        with self._lock:
+            self._purge(self.clock())
+
+    def _set(self, key, value, expires_at):
+        if key not in self._entries:
+            while len(self._entries) >= self.max_size:
+                self._pop()
+        self._entries[key] = (expires_at, value)
+        heapq.heappush(self._heap, (expires_at, key))
+        if len(self._heap) > 2 * self.max_size:
+            # Trop d'entrées obsolètes (discard, remplacements) : reconstruire le tas
+            self._heap = [(entry[0], key) for key, entry in self._entries.items()]
+            heapq.heapify(self._heap)
+
+    def _purge(self, now):
+        while self._heap and self._heap[0][0] <= now:
+            self._pop()
+
+    def _pop(self):
+        expires_at, key = heapq.heappop(self._heap)
+        # Une entrée de tas est obsolète si la clé a été retirée ou remplacée
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == expires_at:
+            del self._entries[key]
+            self.evictions += 1
+
+
+class ExpiringSet(ExpiringDict):
+    """Ensemble borné dont chaque élément expire à une date donnée
+
+    Un élément non expiré n'est jamais évincé pour faire de la place (ex: nonce
+    anti-rejeu, refresh token actif) : plein, l'ensemble refuse les nouveaux.
+    """
+
+    def add(self, item, expires_at):
+        """Ajouter un élément, False s'il est déjà présent et non expiré
+
+        CapacityError si l'ensemble est plein d'éléments non expirés.
+        """
+        with self._lock:
+            self._purge(self.clock())
+            if item in self._entries:
+                return False
+            if len(self._entries) >= self.max_size:
+                self.rejections += 1
+                raise CapacityError(f"{self.max_size} active entries, none expired")
+            self._set(item, None, expires_at)
+            return True
+
+    def remove(self, item):
+        """Retirer un élément, True s'il était présent et non expiré"""
+        with self._lock:
+            entry = self._entries.pop(item, None)
+            return entry is not None and entry[0] > self.clock()
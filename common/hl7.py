@@ -0,0 +1,314 @@
+"""
+Messages HL7 v2 : lecture en flux, lots (FHS/BHS), analyse paresseuse et accusés
+- Segments terminés par \\r (norme) ; \\n et \\r\\n sont aussi acceptés
+- Un corps peut contenir un message, plusieurs messages ou un fichier de lots
+  FHS/BHS ... BTS/FTS : les messages sont produits un par un au fil de la lecture
+- Caractères d'encodage lus dans MSH-1/MSH-2 (séparateurs et échappement)
+- Analyse paresseuse sur le tampon brut : un message ne garde que les bornes de
+  ses segments (index par type construit au premier accès) ; seul un segment lu
+  est découpé en champs, répétitions et composants sont découpés à la demande,
+  et seule la valeur demandée est décodée
+- Accusé de lot : un MSA par message, dans l'ordre de réception
+"""
+
+from datetime import datetime
+import re
+
+_TERMINATORS = re.compile(rb'\r\n|\r|\n')
+ENVELOPE_SEGMENTS = (b'FHS', b'BHS', b'BTS', b'FTS')
+READ_CHUNK_SIZE = 64 * 1024
+
+# Codes d'accusé (MSA-1)
+ACCEPT, ERROR, REJECT = "AA", "AE", "AR"
+
+DEFAULT_ENCODING = b'|^~\\&'  # Champ, composant, répétition, échappement, sous-composant
+
+
+class Segment:
+    """Segment d'un message : découpé en champs au premier accès seulement
+
+    Les champs sont numérotés comme dans la norme (PID-5 = get(5)) ; pour MSH,
+    MSH-1 est le séparateur de champs et MSH-2 les caractères d'encodage.
+    """
+
+    __slots__ = ('message', 'start', 'end', 'is_header', '_fields')
+
+    def __init__(self, message, start, end):
+        self.message = message
+        self.start = start
+        self.end = end
+        self.is_header = message.buffer.startswith(b'MSH', start)
+        self._fields = None
+
+    @property
+    def name(self):
+        return self.message.buffer[self.start:self.start + 3].decode('ascii', 'replace')
+
+    def fields(self):
+        """Champs bruts (bytes) indexés par numéro : fields()[5] = PID-5"""
+        if self._fields is None:
+            separator = self.message.separators[0]
+            fields = self.message.buffer[self.start:self.end].split(separator)
+            if self.is_header:
+                fields.insert(1, separator)
+            self._fields = fields
+        return self._fields
+
+    def raw(self, number, component=None, repetition=1, subcomponent=None):
+        """Valeur brute (non décodée) d'un champ, composant ou sous-composant, None si absente"""
+        fields = self.fields()
+        if number >= len(fields):
+            return None
+        value = fields[number]
+        if number <= 2 and self.is_header:
+            return value
+        _, component_separator, repetition_separator, _, subcomponent_separator = self.message.separators
+        if component is None and subcomponent is None and repetition == 1 and repetition_separator not in value:
+            return value
+        for separator, position in ((repetition_separator, repetition), (component_separator, component),
+                                    (subcomponent_separator, subcomponent)):
+            if position is None:
+                continue
+            if separator in value:
+                parts = value.split(separator)
+                if position > len(parts):
+                    return None
+                value = parts[position - 1]
+            elif position != 1:
+                return None
+        return value
+
+    def get(self, number, component=None, repetition=1, subcomponent=None):
+        """Valeur décodée d'un champ, d'un composant ou d'un sous-composant ('' si absente)"""
+        value = self.raw(number, component, repetition, subcomponent)
+        if not value:
+            return ''
+        if number <= 2 and self.is_header:
+            return value.decode('latin-1')
+        return self.message.unescape(value)
+
+    def components(self, number, repetition=1):
+        """Composants décodés d'un champ (liste, vide si le champ est absent)"""
+        value = self.raw(number, repetition=repetition)
+        if not value:
+            return []
+        component_separator, escape = self.message.separators[1], self.message.separators[3]
+        if escape not in value:
+            return value.decode('utf-8', 'replace').split(component_separator.decode('latin-1'))
+        unescape = self.message.unescape
+        return [unescape(part) for part in value.split(component_separator)]
+
+    def repetitions(self, number):
+        """Nombre de répétitions d'un champ (0 s'il est vide)"""
+        fields = self.fields()
+        if number >= len(fields) or not fields[number]:
+            return 0
+        return fields[number].count(self.message.separators[2]) + 1
+
+
+class Message:
+    """Message HL7 sur un tampon brut : seules les bornes des segments sont gardées"""
+
+    def __init__(self, buffer, spans):
+        self.buffer = buffer
+        self.spans = spans  # [(début, fin)] des segments dans le tampon
+        self._index = None
+        start, end = spans[0] if spans else (0, 0)
+        self.has_header = buffer.startswith(b'MSH', start) and end - start > 3
+        if self.has_header:
+            # MSH-1 (champ) puis MSH-2 (composant, répétition, échappement, sous-composant)
+            field_separator = buffer[start + 3:start + 4]
+            encoding = field_separator + buffer[start + 4:min(end, start + 8)].split(field_separator, 1)[0]
+            encoding += DEFAULT_ENCODING[len(encoding):]
+        else:
+            encoding = DEFAULT_ENCODING
+        self.separators = tuple(encoding[i:i + 1] for i in range(5))
+        self._header = Segment(self, start, end) if self.has_header else None
+
+    def __len__(self):
+        return len(self.spans)
+
+    def _segment_index(self):
+        if self._index is None:
+            index = {}
+            for start, end in self.spans:
+                index.setdefault(self.buffer[start:start + 3], []).append((start, end))
+            self._index = index
+        return self._index
+
+    def segments(self, name):
+        """Segments d'un type (ex: 'PID'), dans l'ordre du message"""
+        return [Segment(self, start, end) for start, end in self._segment_index().get(name.encode('ascii'), ())]
+
+    def segment(self, name):
+        """Premier segment d'un type, None s'il est absent"""
+        spans = self._segment_index().get(name.encode('ascii'))
+        return Segment(self, *spans[0]) if spans else None
+
+    def header(self, number, component=None, default=''):
+        """Champ (ou composant) MSH-n"""
+        if self._header is None:
+            return default
+        return self._header.get(number, component) or default
+
+    @property
+    def control_id(self):
+        return self.header(10)
+
+    @property
+    def message_type(self):
+        """Type et événement (MSH-9.1, MSH-9.2), ex: ('ADT', 'A01')"""
+        return self.header(9, 1), self.header(9, 2)
+
+    def unescape(self, raw):
+        """Décoder une valeur brute (UTF-8) et ses séquences d'échappement (\\F\\, \\S\\...)"""
+        escape = self.separators[3]
+        if escape not in raw:
+            return raw.decode('utf-8', 'replace') if raw else ''
+        replacements = {
+            b'F': self.separators[0], b'S': self.separators[1], b'R': self.separators[2],
+            b'E': self.separators[3], b'T': self.separators[4], b'.br': b'\n',
+        }
+        parts = raw.split(escape)
+        result = [parts[0]]
+        # Parties de rang impair : contenu d'une séquence d'échappement fermée
+        for position in range(1, len(parts)):
+            part = parts[position]
+            if position % 2 == 0:
+                result.append(part)
+            elif position == len(parts) - 1:
+                result.append(escape + part)  # Séquence non fermée : texte brut
+            elif part in replacements:
+                result.append(replacements[part])
+            elif part[:1] == b'X' and len(part) % 2 == 1:
+                try:
+                    result.append(bytes.fromhex(part[1:].decode('ascii')))
+                except ValueError:
+                    result.append(escape + part + escape)
+            elif part in (b'H', b'N'):
+                continue  # Mise en évidence : sans objet ici
+            else:
+                result.append(escape + part + escape)
+        return b''.join(result).decode('utf-8', 'replace')
+
+
+class HL7Reader:
+    """Lecture en flux d'un corps HL7 (blocs de bytes)
+
+    `messages()` produit les messages un par un ; les segments d'enveloppe
+    (FHS, BHS, BTS, FTS) sont conservés dans `envelope`. Le terminateur de
+    segment du client est retenu pour lui répondre dans le même format.
+    Les messages complets partagent le tampon du bloc lu : seul le message
+    coupé entre deux blocs est recopié (puis relu avec le bloc suivant).
+    """
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.envelope = {}
+        self.terminator = None
+
+    def messages(self):
+        """Messages du corps (un segment MSH ouvre un nouveau message)"""
+        pending = b''
+        for chunk in self.chunks:
+            buffer = pending + chunk if pending else chunk
+            if self.terminator is None:
+                found = _TERMINATORS.search(buffer)
+                # Un \r en fin de bloc peut être le début d'un \r\n
+                if found and not (found.group() == b'\r' and found.end() == len(buffer)):
+                    self.terminator = found.group()
+            # Le dernier segment peut être coupé entre deux blocs (y compris un \r\n)
+            limit = len(buffer) - 1 if buffer.endswith(b'\r') else len(buffer)
+            spans, start = [], 0
+            for match in _TERMINATORS.finditer(buffer, 0, limit):
+                yield from self._add_segment(buffer, start, match.start(), spans)
+                start = match.end()
+            # Message en cours (ou segment inachevé) repris avec le bloc suivant
+            pending = buffer[spans[0][0] if spans else start:]
+        # Fin du corps : dernier segment (sans terminateur) et dernier message
+        spans, start = [], 0
+        for match in _TERMINATORS.finditer(pending):
+            yield from self._add_segment(pending, start, match.start(), spans)
+            start = match.end()
+        yield from self._add_segment(pending, start, len(pending), spans)
+        if spans:
+            yield Message(pending, spans)
+
+    def _add_segment(self, buffer, start, end, spans):
+        """Ajouter le segment [start, end) au message en cours, produire le message précédent"""
+        while start < end and buffer[start] in b' \t':
+            start += 1
+        if start >= end:
+            return  # Segment vide ou blanc ignoré
+        name = buffer[start:start + 3]
+        if name == b'MSH' or name in ENVELOPE_SEGMENTS:
+            if spans:
+                yield Message(buffer, spans[:])
+                spans.clear()
+            if name != b'MSH':
+                self.envelope[name.decode('ascii')] = buffer[start:end]
+                return
+        spans.append((start, end))
+
+
+def parse_timestamp(value):
+    """Date HL7 (AAAA[MM[JJ[HH[MM[SS]]]]], fraction et fuseau ignorés) -> datetime, None si invalide"""
+    digits = value[:14]
+    for position, char in enumerate(digits):
+        if not '0' <= char <= '9':
+            digits = digits[:position]
+            break
+    if len(digits) < 4 or len(digits) % 2:
+        return None
+    parts = [int(digits[i:i + 2]) for i in range(4, len(digits), 2)]
+    parts += [1, 1, 0, 0, 0][len(parts):]
+    try:
+        return datetime(int(digits[:4]), *parts)
+    except ValueError:
+        return None
+
+
+def escape(text, separators=DEFAULT_ENCODING):
+    """Échapper les caractères réservés d'un texte libre (ex: MSA-3)"""
+    field, component, repetition, escape_char, subcomponent = (chr(c) for c in separators)
+    text = text.replace(escape_char, f"{escape_char}E{escape_char}")
+    for char, code in ((field, 'F'), (component, 'S'), (repetition, 'R'), (subcomponent, 'T')):
+        text = text.replace(char, f"{escape_char}{code}{escape_char}")
+    return text
+
+
+def timestamp():
+    return datetime.utcnow().strftime('%Y%m%d%H%M%S')
+
+
+def ack_segments(message, code, text, application=("HEALTHCARE_PRO", "HCP_SYSTEM")):
+    """Segments MSH + MSA accusant réception d'un message"""
+    sending = (escape(message.header(3) or "SENDING_APP"), escape(message.header(4) or "SENDING_FACILITY"))
+    control_id = escape(message.control_id)
+    return [
+        f"MSH|^~\\&|{application[0]}|{application[1]}|{sending[0]}|{sending[1]}|{timestamp()}||ACK|{control_id}|P|2.4",
+        f"MSA|{code}|{control_id}|{escape(text)}",
+    ]
+
+
+def batch_ack(acks, envelope, application=("HEALTHCARE_PRO", "HCP_SYSTEM")):
+    """Segments d'un lot d'accusés : [FHS] BHS (MSH MSA)... BTS [FTS]
+
+    `acks` contient les segments d'accusé de chaque message. L'identifiant du lot
+    reçu (BHS-11) est repris en référence (BHS-12).
+    """
+    bhs = envelope.get('BHS', b'')
+    received = bhs.split(bhs[3:4] or b'|')
+    reference = escape(received[10].decode('utf-8', 'replace')) if len(received) > 10 else ''
+    header = f"|^~\\&|{application[0]}|{application[1]}|||{timestamp()}|||||{reference}"
+
+    segments = []
+    if 'FHS' in envelope:
+        segments.append("FHS" + header)
+    segments.append("BHS" + header)
+    for ack in acks:
+        segments.extend(ack)
+    segments.append(f"BTS|{len(acks)}")
+    if 'FHS' in envelope:
+        segments.append("FTS|1")
+    return segments
@@ -0,0 +1,52 @@
+"""
+Cache HTTP côté client : ETag fort et GET conditionnel
+- L'ETag dérive des versions des collections (incrémentées à chaque écriture)
+- If-None-Match correspondant -> 304 sans exécuter la vue ni sérialiser
+"""
+
+from functools import wraps
+import hashlib
+
+from flask import Response, make_response, request
+
+
+def compute_etag(collections, item=None, item_id=None):
+    """ETag fort de la ressource demandée (route + paramètres + versions)"""
+    if item_id is not None:
+        # Ressource unitaire : révision de l'enregistrement
+        versions = [f"{item.name}:{item.rev(item_id)}"]
+    else:
+        versions = [f"{collection.name}:{collection.version}" for collection in collections]
+    query = "&".join(f"{name}={value}" for name, value in sorted(request.args.items(multi=True)))
+    digest = hashlib.sha1(f"{request.path}?{query}|{'|'.join(versions)}".encode('utf-8'))
+    return digest.hexdigest()[:32]
+
+
+def conditional(*collections, item_arg=None):
+    """Décorateur de vue GET : ETag fort + réponse 304 si le client est à jour
+
+    `collections` : collections dont dépend la réponse.
+    `item_arg` : nom du paramètre de route identifiant l'enregistrement (vue unitaire,
+    l'ETag dépend alors de la révision de cet enregistrement dans collections[0]).
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            item_id = kwargs.get(item_arg) if item_arg else None
+            if item_arg and collections[0].rev(item_id) is None:
+                return f(*args, **kwargs)  # 404 produit par la vue
+
+            etag = compute_etag(collections, collections[0], item_id)
+            if request.if_none_match.contains(etag):
+                response = Response(status=304)
+                response.set_etag(etag)
+                return response
+
+            response = make_response(f(*args, **kwargs))
+            if response.status_code == 200:
+                response.set_etag(etag)
+            return response
+
+        return decorated_function
+
+    return decorator
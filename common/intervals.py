@@ -0,0 +1,63 @@
+"""
+Index d'intervalles par clé (ex: (docteur, jour))
+- Intervalles [début, fin) triés par début dans chaque clé
+- Détection de chevauchement par bisection en O(log n)
+"""
+
+from bisect import bisect_left, insort
+import threading
+
+
+class IntervalIndex:
+    """Intervalles [début, fin) rattachés à un identifiant, regroupés par clé"""
+
+    def __init__(self):
+        self._buckets = {}    # clé -> liste triée de (début, fin, id)
+        self._positions = {}  # id -> (clé, début, fin)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._positions)
+
+    def intervals(self, key):
+        """Intervalles d'une clé, triés par début"""
+        return list(self._buckets.get(key, ()))
+
+    def add(self, key, start, end, item_id):
+        """Indexer (ou ré-indexer) l'intervalle d'un élément"""
+        with self._lock:
+            self._remove(item_id)
+            insort(self._buckets.setdefault(key, []), (start, end, item_id))
+            self._positions[item_id] = (key, start, end)
+
+    def remove(self, item_id):
+        """Retirer l'intervalle d'un élément"""
+        with self._lock:
+            self._remove(item_id)
+
+    def find_conflict(self, key, start, end, ignore=None):
+        """Identifiant d'un intervalle chevauchant [start, end), ou None
+
+        Les intervalles d'une clé ne se chevauchent pas : seul le dernier intervalle
+        commençant avant `end` peut chevaucher (on recule au-delà de `ignore`).
+        """
+        bucket = self._buckets.get(key)
+        if not bucket:
+            return None
+        position = bisect_left(bucket, (end,)) - 1
+        while position >= 0:
+            other_start, other_end, other_id = bucket[position]
+            if other_id != ignore:
+                return other_id if other_end > start else None
+            position -= 1
+        return None
+
+    def _remove(self, item_id):
+        position = self._positions.pop(item_id, None)
+        if position is None:
+            return
+        key, start, end = position
+        bucket = self._buckets[key]
+        bucket.pop(bisect_left(bucket, (start, end, item_id)))
+        if not bucket:
+            del self._buckets[key]
@@ -0,0 +1,276 @@
+"""
+Rapprochement des patients MedScheduler / HealthCare Pro (record linkage)
+- Entrées : deux flux de Patient canoniques (common/model.py), lus une seule fois
+- Normalisation : noms sans accents ni ponctuation, code phonétique (Soundex) du
+  nom de famille, téléphone au format E.164, date de naissance ISO
+- Blocage : seules les paires partageant une clé de blocage sont comparées
+  (téléphone ; naissance + nom phonétique ; naissance + initiale du prénom),
+  au lieu de toutes les paires
+- Tri externe des clés (passages triés sur disque, fusion k-voies) puis lecture
+  bloc par bloc : mémoire bornée par la taille des passages et des blocs,
+  pas par la taille des entrées
+- Paires candidates notées (somme pondérée des champs concordants, 0 à 1) ;
+  une paire présente dans plusieurs blocs n'est notée qu'une fois
+"""
+
+from collections import namedtuple
+from functools import lru_cache
+import heapq
+from itertools import groupby
+from operator import itemgetter
+import pickle
+import re
+import tempfile
+import unicodedata
+
+DEFAULT_COUNTRY_CODE = "33"
+DEFAULT_THRESHOLD = 0.7
+DEFAULT_RUN_SIZE = 200000       # Clés triées en mémoire avant écriture d'un passage sur disque
+DEFAULT_MAX_BLOCK_SIZE = 1000   # Enregistrements par côté au-delà desquels un bloc est ignoré
+NAME_CACHE_SIZE = 65536
+PICKLE_CHUNK = 4096
+
+# Poids des champs concordants (total 1)
+WEIGHTS = {"birth_date": 0.3, "family_name": 0.25, "given_name": 0.15, "phone": 0.2, "email": 0.1}
+PHONETIC_WEIGHT = 0.6    # Part du poids du nom si seul le code phonétique concorde
+FIRST_NAME_WEIGHT = 0.7  # Part du poids du prénom si seul le premier prénom concorde
+
+# Projection d'un patient : champs normalisés utiles au blocage et à la notation
+LinkRecord = namedtuple('LinkRecord', ('id', 'given_name', 'family_name', 'birth_date', 'phone', 'email'))
+Match = namedtuple('Match', ('left_id', 'right_id', 'score', 'block'))
+
+LEFT, RIGHT = 0, 1
+
+_make_record = LinkRecord._make
+
+_NON_LETTERS = re.compile(r"[^A-Z]+")
+_NON_DIGITS = re.compile(r"\D")
+_SOUNDEX_CODES = str.maketrans("BFPVCGJKQSXZDTLMNR", "111122222222334556")
+
+
+# NORMALISATION
+
+@lru_cache(maxsize=NAME_CACHE_SIZE)
+def normalize_name(text):
+    """'Lefèvre-Hélène ' -> 'LEFEVRE HELENE'"""
+    if not text:
+        return ''
+    folded = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii')
+    return _NON_LETTERS.sub(' ', folded.upper()).strip()
+
+
+@lru_cache(maxsize=NAME_CACHE_SIZE)
+def soundex(name):
+    """Code Soundex d'un nom normalisé ('DUPONT' -> 'D153'), '' si vide"""
+    letters = name.replace(' ', '')
+    if not letters:
+        return ''
+    code = letters[0]
+    previous = letters[0].translate(_SOUNDEX_CODES)
+    for letter in letters[1:]:
+        digit = letter.translate(_SOUNDEX_CODES)
+        if digit.isdigit():
+            if digit != previous:
+                code += digit
+                if len(code) == 4:
+                    break
+            previous = digit
+        elif letter not in 'HW':
+            # Une voyelle sépare deux consonnes de même code, H et W non
+            previous = ''
+    return code.ljust(4, '0')
+
+
+def e164(phone, country_code=DEFAULT_COUNTRY_CODE):
+    """'01 23 45 67 89', '0033 1...', '+33 (0)1...' -> '+33123456789' ; '' si inexploitable"""
+    if not phone:
+        return ''
+    digits = _NON_DIGITS.sub('', phone)
+    if phone.lstrip().startswith('+'):
+        number = digits
+    elif digits.startswith('00'):
+        number = digits[2:]
+    elif digits.startswith('0'):
+        number = country_code + digits[1:]
+    else:
+        number = digits
+    # Préfixe national conservé après l'indicatif (+33 (0)1 ...)
+    if number.startswith(country_code + '0') and len(number) == len(country_code) + 10:
+        number = country_code + number[len(country_code) + 1:]
+    return '+' + number if 8 <= len(number) <= 15 else ''
+
+
+def project(patients, country_code=DEFAULT_COUNTRY_CODE):
+    """Patients canoniques -> LinkRecord normalisés (flux)"""
+    for patient in patients:
+        yield LinkRecord(
+            patient.id,
+            normalize_name(patient.given_name),
+            normalize_name(patient.family_name),
+            patient.birth_date.isoformat() if patient.birth_date else '',
+            e164(patient.phone, country_code),
+            (patient.email or '').strip().lower(),
+        )
+
+
+# CLÉS DE BLOCAGE
+
+def phone_key(record):
+    return record.phone
+
+
+def birth_family_key(record):
+    return f"{record.birth_date}|{soundex(record.family_name)}" if record.birth_date and record.family_name else ''
+
+
+def birth_given_key(record):
+    return f"{record.birth_date}|{record.given_name[:1]}" if record.birth_date and record.given_name else ''
+
+
+# (nom, fonction record -> clé ; '' = pas de bloc pour ce passage)
+BLOCKING_KEYS = (
+    ("phone", phone_key),
+    ("birth_date+family_name", birth_family_key),
+    ("birth_date+given_initial", birth_given_key),
+)
+
+
+# NOTATION
+
+def score(left, right):
+    """Similarité de deux LinkRecord : somme des poids des champs concordants (0 à 1)"""
+    total = 0.0
+    if left.birth_date and left.birth_date == right.birth_date:
+        total += WEIGHTS["birth_date"]
+    if left.family_name and left.family_name == right.family_name:
+        total += WEIGHTS["family_name"]
+    elif left.family_name and soundex(left.family_name) == soundex(right.family_name):
+        total += WEIGHTS["family_name"] * PHONETIC_WEIGHT
+    if left.given_name and left.given_name == right.given_name:
+        total += WEIGHTS["given_name"]
+    elif left.given_name and left.given_name.split(' ', 1)[0] == right.given_name.split(' ', 1)[0]:
+        total += WEIGHTS["given_name"] * FIRST_NAME_WEIGHT
+    if left.phone and left.phone == right.phone:
+        total += WEIGHTS["phone"]
+    if left.email and left.email == right.email:
+        total += WEIGHTS["email"]
+    return total
+
+
+# TRI EXTERNE
+
+def _write_run(items):
+    run = tempfile.TemporaryFile()
+    for start in range(0, len(items), PICKLE_CHUNK):
+        pickle.dump(items[start:start + PICKLE_CHUNK], run, pickle.HIGHEST_PROTOCOL)
+    run.seek(0)
+    return run
+
+
+def _read_run(run):
+    try:
+        while True:
+            yield from pickle.load(run)
+    except EOFError:
+        pass
+    finally:
+        run.close()
+
+
+def external_sort(items, run_size=DEFAULT_RUN_SIZE):
+    """Trier un flux de tuples (clé, ...) par clé en gardant au plus `run_size` éléments en mémoire"""
+    runs = []
+    buffer = []
+    for item in items:
+        buffer.append(item)
+        if len(buffer) >= run_size:
+            buffer.sort(key=itemgetter(0))
+            runs.append(_write_run(buffer))
+            buffer = []
+    buffer.sort(key=itemgetter(0))
+    if not runs:
+        return iter(buffer)
+    runs.append(_write_run(buffer))
+    del buffer
+    return heapq.merge(*(_read_run(run) for run in runs), key=itemgetter(0))
+
+
+# RAPPROCHEMENT
+
+class PatientLinker:
+    """Rapprochement par blocs de deux flux de patients canoniques
+
+    `link(left, right)` produit les Match (score >= threshold) au fil de la
+    lecture des blocs ; `stats` compte blocs, comparaisons et blocs ignorés.
+    Un bloc de plus de `max_block_size` enregistrements d'un côté (ex: numéro
+    de standard partagé) est ignoré : ses paires ne seront trouvées que via
+    une autre clé.
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD, blocking_keys=BLOCKING_KEYS, run_size=DEFAULT_RUN_SIZE,
+                 max_block_size=DEFAULT_MAX_BLOCK_SIZE, country_code=DEFAULT_COUNTRY_CODE):
+        self.threshold = threshold
+        self.blocking_keys = blocking_keys
+        self.run_size = run_size
+        self.max_block_size = max_block_size
+        self.country_code = country_code
+        self.stats = {}
+
+    def _keyed(self, left, right):
+        """(clé de tri 'passage|clé', côté, *champs du LinkRecord) pour chaque clé non vide
+
+        Tuples simples : bien plus rapides à écrire sur disque qu'un namedtuple.
+        """
+        for side, patients in ((LEFT, left), (RIGHT, right)):
+            for record in project(patients, self.country_code):
+                for number, (_, key) in enumerate(self.blocking_keys):
+                    value = key(record)
+                    if value:
+                        yield (f"{number}|{value}", side) + record
+
+    def _blocks(self, left, right):
+        """(n° de passage, clé de tri, [gauche], [droite]) par bloc, blocs trop grands écartés"""
+        stats = self.stats
+        for sort_key, items in groupby(external_sort(self._keyed(left, right), self.run_size), key=itemgetter(0)):
+            sides = ([], [])
+            oversized = False
+            for item in items:
+                records = sides[item[1]]
+                if len(records) >= self.max_block_size:
+                    oversized = True
+                    continue
+                records.append(_make_record(item[2:]))
+            if oversized:
+                stats["oversized_blocks"] += 1
+                yield int(sort_key.partition('|')[0]), sort_key, None, None
+            elif sides[LEFT] and sides[RIGHT]:
+                stats["blocks"] += 1
+                yield int(sort_key.partition('|')[0]), sort_key, sides[LEFT], sides[RIGHT]
+
+    def _seen(self, number, left, right, oversized):
+        """La paire partage-t-elle la clé d'un passage précédent (déjà notée) ?"""
+        for earlier, (_, key) in enumerate(self.blocking_keys[:number]):
+            value = key(left)
+            if value and value == key(right) and f"{earlier}|{value}" not in oversized:
+                return True
+        return False
+
+    def link(self, left, right):
+        """Flux des Match entre deux itérables de Patient canoniques"""
+        self.stats = stats = {"blocks": 0, "oversized_blocks": 0, "comparisons": 0, "matches": 0}
+        oversized = set()
+        threshold = self.threshold
+        names = [name for name, _ in self.blocking_keys]
+        for number, sort_key, lefts, rights in self._blocks(left, right):
+            if lefts is None:
+                oversized.add(sort_key)
+                continue
+            for left_record in lefts:
+                for right_record in rights:
+                    if number and self._seen(number, left_record, right_record, oversized):
+                        continue
+                    stats["comparisons"] += 1
+                    similarity = score(left_record, right_record)
+                    if similarity >= threshold:
+                        stats["matches"] += 1
+                        yield Match(left_record.id, right_record.id, round(similarity, 3), names[number])
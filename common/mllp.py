@@ -0,0 +1,149 @@
+"""
+Serveur MLLP (Minimal Lower Layer Protocol) asyncio pour le trafic HL7 v2
+- Trame : 0x0b <message> 0x1c 0x0d, sur des connexions TCP persistantes ;
+  chaque trame reçoit une trame d'accusé, dans l'ordre de réception
+- Connexions, lecture et écriture sont gérées par la boucle asyncio ; seul le
+  traitement (fonction synchrone) passe par un pool de threads borné
+- Les trames d'une connexion sont traitées dans l'ordre (un A08 ne double pas
+  son A01) ; celles déjà arrivées sont traitées ensemble en un seul passage
+- Contre-pression :
+  - trames en attente bornées par connexion : au-delà, la connexion n'est
+    plus lue et la fenêtre TCP ralentit l'émetteur
+  - traitements simultanés bornés (toutes connexions confondues)
+  - connexions simultanées bornées : au-delà, les nouvelles sont fermées
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import logging
+
+START_BLOCK = b'\x0b'
+END_BLOCK = b'\x1c\x0d'
+
+DEFAULT_MAX_CONNECTIONS = 100
+DEFAULT_MAX_PENDING = 32              # Trames reçues non encore accusées, par connexion
+DEFAULT_MAX_CONCURRENCY = 4           # Traitements simultanés (threads)
+DEFAULT_MAX_MESSAGE_BYTES = 1024 * 1024
+DEFAULT_IDLE_TIMEOUT = 300            # Secondes sans trame avant fermeture
+
+logger = logging.getLogger(__name__)
+
+
+def frame(payload):
+    """Encadrer un message pour MLLP"""
+    return START_BLOCK + payload + END_BLOCK
+
+
+async def read_frame(reader):
+    """Contenu de la trame suivante, None en fin de connexion
+
+    Les octets hors trame (ex: \\r\\n entre deux trames) sont ignorés.
+    Lève asyncio.LimitOverrunError si la trame dépasse la limite du flux.
+    """
+    try:
+        await reader.readuntil(START_BLOCK)
+        payload = await reader.readuntil(END_BLOCK)
+    except asyncio.IncompleteReadError:
+        return None
+    return payload[:-len(END_BLOCK)]
+
+
+class MLLPServer:
+    """Serveur MLLP traitant les trames reçues par `handler`
+
+    `handler(payloads)` reçoit une liste de messages (bytes) d'une même
+    connexion et retourne la liste de leurs accusés (bytes), dans le même ordre.
+    Il est exécuté dans le pool de threads.
+    """
+
+    def __init__(self, handler, max_connections=DEFAULT_MAX_CONNECTIONS, max_pending=DEFAULT_MAX_PENDING,
+                 max_concurrency=DEFAULT_MAX_CONCURRENCY, max_message_bytes=DEFAULT_MAX_MESSAGE_BYTES,
+                 idle_timeout=DEFAULT_IDLE_TIMEOUT):
+        self.handler = handler
+        self.max_connections = max_connections
+        self.max_pending = max_pending
+        self.max_message_bytes = max_message_bytes
+        self.idle_timeout = idle_timeout
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='mllp')
+        self._semaphore = None  # Créé dans la boucle du serveur
+        self._max_concurrency = max_concurrency
+        self.active_connections = 0
+        self.stats = {"connections": 0, "refused_connections": 0, "messages": 0, "batches": 0,
+                      "errors": 0}
+
+    async def start(self, host='127.0.0.1', port=2575):
+        """Démarrer l'écoute -> asyncio.Server"""
+        self._semaphore = asyncio.Semaphore(self._max_concurrency)
+        # Limite du flux : taille maximale d'une trame (readuntil)
+        return await asyncio.start_server(self._serve_connection, host, port, limit=self.max_message_bytes)
+
+    async def serve_forever(self, host='127.0.0.1', port=2575):
+        server = await self.start(host, port)
+        async with server:
+            await server.serve_forever()
+
+    async def _serve_connection(self, reader, writer):
+        if self.active_connections >= self.max_connections:
+            self.stats["refused_connections"] += 1
+            writer.close()
+            return
+        self.active_connections += 1
+        self.stats["connections"] += 1
+        pending = asyncio.Queue(self.max_pending)
+        responder = asyncio.create_task(self._respond(pending, writer))
+        try:
+            while not responder.done():
+                payload = await asyncio.wait_for(read_frame(reader), self.idle_timeout)
+                if payload is None:
+                    break
+                # File pleine : la connexion n'est plus lue jusqu'aux prochains accusés
+                await pending.put(payload)
+        except asyncio.TimeoutError:
+            pass
+        except asyncio.LimitOverrunError:
+            self.stats["errors"] += 1
+            logger.warning("MLLP frame larger than %d bytes, closing connection", self.max_message_bytes)
+        except ConnectionError:
+            pass
+        finally:
+            # Trames déjà reçues accusées avant la fermeture
+            if not responder.done():
+                await pending.put(None)
+            try:
+                await responder
+            except ConnectionError:
+                pass
+            self.active_connections -= 1
+            writer.close()
+
+    async def _respond(self, pending, writer):
+        """Traiter les trames d'une connexion dans l'ordre et renvoyer leurs accusés"""
+        loop = asyncio.get_running_loop()
+        while True:
+            payloads = [await pending.get()]
+            while not pending.empty() and payloads[-1] is not None:
+                payloads.append(pending.get_nowait())
+            closing = payloads[-1] is None
+            if closing:
+                payloads.pop()
+            if payloads:
+                async with self._semaphore:
+                    try:
+                        acks = await loop.run_in_executor(self.executor, self.handler, payloads)
+                    except Exception:
+                        # Sans accusé, l'émetteur renverra les messages sur une nouvelle connexion
+                        self.stats["errors"] += 1
+                        logger.exception("MLLP handler failed, closing connection")
+                        writer.close()
+                        while not closing:
+                            closing = await pending.get() is None  # Libérer la lecture jusqu'à la fin
+                        return
+                self.stats["messages"] += len(payloads)
+                self.stats["batches"] += 1
+                writer.write(b''.join(frame(ack) for ack in acks))
+                await writer.drain()
+            if closing:
+                return
+
+    def close(self):
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,291 @@
+"""
+Modèle canonique des patients et rendez-vous, commun aux deux APIs
+- Enregistrements compacts (__slots__) : dates en date/datetime (UTC), noms
+  séparés prénom(s) / nom de famille, durée en minutes
+- Convertisseurs par lots dans les deux sens : une liste de payloads d'API
+  -> une liste d'enregistrements canoniques (et inversement) en un seul passage
+- Analyse et formatage des dates mis en cache : dans un lot, les mêmes dates
+  (naissance, jour de rendez-vous, créneau) reviennent très souvent
+
+Correspondance des champs :
+    canonique         MedScheduler               HealthCare Pro
+    given_name        first_name                 full_name (tous les mots sauf le dernier)
+    family_name       last_name                  full_name (dernier mot)
+    birth_date        birthdate (AAAA-MM-JJ)     date_of_birth (JJ/MM/AAAA)
+    phone             phone_number               contact_phone
+    start             appointment_date + _time   datetime (AAAA-MM-JJTHH:MM:SS)
+    duration_minutes  duration                   length_minutes
+    practitioner      doctor_name                practitioner
+    notes             reason                     notes
+    created_at        created_at (AAAA/MM/JJ ..) created / registered_date (RFC 1123)
+"""
+
+from datetime import date, datetime
+from functools import lru_cache
+
+MEDSCHEDULER, HEALTHCARE_PRO = "medscheduler", "healthcare_pro"
+
+DATE_CACHE_SIZE = 65536
+
+_MONTHS = ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+_MONTH_NUMBERS = {name: number for number, name in enumerate(_MONTHS, 1)}
+_WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+
+
+class Record:
+    """Base des enregistrements canoniques : champs fixes, sans __dict__"""
+
+    __slots__ = ()
+
+    def __init__(self, *values, **fields):
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+        for name in self.__slots__[len(values):]:
+            setattr(self, name, fields.pop(name, None))
+        if fields:
+            raise TypeError(f"Unknown fields for {type(self).__name__}: {', '.join(fields)}")
+
+    def __repr__(self):
+        values = ', '.join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({values})"
+
+    def __eq__(self, other):
+        return type(other) is type(self) and self.astuple() == other.astuple()
+
+    def astuple(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def asdict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class Patient(Record):
+    __slots__ = ('id', 'source', 'given_name', 'family_name', 'birth_date', 'phone', 'email',
+                 'gender', 'street_address', 'city', 'postal_code', 'patient_number', 'created_at')
+
+    @property
+    def full_name(self):
+        return f"{self.given_name} {self.family_name}".strip()
+
+
+class Appointment(Record):
+    __slots__ = ('id', 'source', 'patient_id', 'practitioner', 'start', 'duration_minutes',
+                 'kind', 'notes', 'created_at')
+
+
+# DATES (analyse et formatage mis en cache)
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def parse_iso_date(text):
+    """'1985-03-15' -> date"""
+    return date(int(text[:4]), int(text[5:7]), int(text[8:10]))
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def parse_french_date(text):
+    """'15/03/1985' -> date"""
+    return date(int(text[6:10]), int(text[3:5]), int(text[:2]))
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def parse_clock(text):
+    """'14:30' ou '14:30:00' -> (heure, minute, seconde)"""
+    return int(text[:2]), int(text[3:5]), int(text[6:8] or 0)
+
+
+def parse_iso_datetime(text):
+    """'2024-03-22T10:00:00' -> datetime (fromisoformat, déjà en C)"""
+    return datetime.fromisoformat(text)
+
+
+def parse_medscheduler_timestamp(text):
+    """'2024/01/15 10:30:00' -> datetime"""
+    day = parse_iso_date(text[:10])
+    return datetime(day.year, day.month, day.day, *parse_clock(text[11:19]))
+
+
+def parse_rfc1123(text):
+    """'Mon, 15 Jan 2024 10:30:00 GMT' -> datetime (sans dépendre de la locale)"""
+    return datetime(int(text[12:16]), _MONTH_NUMBERS[text[8:11]], int(text[5:7]), *parse_clock(text[17:25]))
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def format_iso_date(value):
+    return value.isoformat()
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def format_french_date(value):
+    return f"{value.day:02d}/{value.month:02d}/{value.year:04d}"
+
+
+def format_medscheduler_timestamp(value):
+    return f"{format_iso_date(value.date()).replace('-', '/')} {value.hour:02d}:{value.minute:02d}:{value.second:02d}"
+
+
+def format_rfc1123(value):
+    return (f"{_WEEKDAYS[value.weekday()]}, {value.day:02d} {_MONTHS[value.month - 1]} {value.year:04d} "
+            f"{value.hour:02d}:{value.minute:02d}:{value.second:02d} GMT")
+
+
+def _optional(parse, text):
+    return parse(text) if text else None
+
+
+def split_full_name(full_name):
+    """'Pierre Michel Dubois' -> ('Pierre Michel', 'Dubois')"""
+    given, _, family = (full_name or '').strip().rpartition(' ')
+    return given, family
+
+
+# CONVERTISSEURS PAR LOTS
+
+def patients_from_medscheduler(items):
+    """Patients MedScheduler (dicts) -> [Patient]"""
+    new = Patient.__new__
+    result = []
+    append = result.append
+    for item in items:
+        patient = new(Patient)
+        patient.id = item["id"]
+        patient.source = MEDSCHEDULER
+        patient.given_name = item.get("first_name", "")
+        patient.family_name = item.get("last_name", "")
+        patient.birth_date = _optional(parse_iso_date, item.get("birthdate"))
+        patient.phone = item.get("phone_number", "")
+        patient.email = item.get("email", "")
+        patient.gender = patient.street_address = patient.city = patient.postal_code = None
+        patient.patient_number = None
+        patient.created_at = _optional(parse_medscheduler_timestamp, item.get("created_at"))
+        append(patient)
+    return result
+
+
+def patients_from_healthcare_pro(items):
+    """Patients HealthCare Pro (dicts) -> [Patient]"""
+    new = Patient.__new__
+    result = []
+    append = result.append
+    for item in items:
+        patient = new(Patient)
+        patient.id = item["id"]
+        patient.source = HEALTHCARE_PRO
+        patient.given_name, patient.family_name = split_full_name(item.get("full_name"))
+        patient.birth_date = _optional(parse_french_date, item.get("date_of_birth"))
+        patient.phone = item.get("contact_phone", "")
+        patient.email = item.get("email", "")
+        patient.gender = item.get("gender")
+        patient.street_address = item.get("street_address")
+        patient.city = item.get("city")
+        patient.postal_code = item.get("postal_code")
+        patient.patient_number = item.get("patient_number")
+        patient.created_at = _optional(parse_rfc1123, item.get("registered_date"))
+        append(patient)
+    return result
+
+
+def patients_to_medscheduler(patients):
+    """[Patient] -> patients au format MedScheduler"""
+    return [{
+        "id": patient.id,
+        "first_name": patient.given_name,
+        "last_name": patient.family_name,
+        "birthdate": format_iso_date(patient.birth_date) if patient.birth_date else "",
+        "phone_number": patient.phone or "",
+        "email": patient.email or "",
+        "created_at": format_medscheduler_timestamp(patient.created_at) if patient.created_at else "",
+    } for patient in patients]
+
+
+def patients_to_healthcare_pro(patients):
+    """[Patient] -> patients au format HealthCare Pro"""
+    return [{
+        "id": patient.id,
+        "patient_number": patient.patient_number or "",
+        "full_name": patient.full_name,
+        "email": patient.email or "",
+        "contact_phone": patient.phone or "",
+        "date_of_birth": format_french_date(patient.birth_date) if patient.birth_date else "",
+        "gender": patient.gender or "",
+        "street_address": patient.street_address or "",
+        "city": patient.city or "",
+        "postal_code": patient.postal_code or "",
+        "registered_date": format_rfc1123(patient.created_at) if patient.created_at else "",
+    } for patient in patients]
+
+
+def appointments_from_medscheduler(items):
+    """Rendez-vous MedScheduler (dicts) -> [Appointment]"""
+    new = Appointment.__new__
+    result = []
+    append = result.append
+    for item in items:
+        appointment = new(Appointment)
+        appointment.id = item["id"]
+        appointment.source = MEDSCHEDULER
+        appointment.patient_id = item.get("patient_id")
+        appointment.practitioner = item.get("doctor_name")
+        day = parse_iso_date(item["appointment_date"])
+        appointment.start = datetime(day.year, day.month, day.day, *parse_clock(item["appointment_time"]))
+        appointment.duration_minutes = int(item.get("duration", 30))
+        appointment.kind = None
+        appointment.notes = item.get("reason", "")
+        appointment.created_at = _optional(parse_medscheduler_timestamp, item.get("created_at"))
+        append(appointment)
+    return result
+
+
+def appointments_from_healthcare_pro(items):
+    """Rendez-vous HealthCare Pro (dicts) -> [Appointment]"""
+    new = Appointment.__new__
+    result = []
+    append = result.append
+    for item in items:
+        appointment = new(Appointment)
+        appointment.id = item["appointment_id"]
+        appointment.source = HEALTHCARE_PRO
+        appointment.patient_id = item.get("patient_id")
+        appointment.practitioner = item.get("practitioner")
+        appointment.start = parse_iso_datetime(item["datetime"])
+        appointment.duration_minutes = int(item.get("length_minutes") or 30)
+        appointment.kind = item.get("type")
+        appointment.notes = item.get("notes", "")
+        appointment.created_at = _optional(parse_rfc1123, item.get("created"))
+        append(appointment)
+    return result
+
+
+def appointments_to_medscheduler(appointments):
+    """[Appointment] -> rendez-vous au format MedScheduler"""
+    return [{
+        "id": appointment.id,
+        "patient_id": appointment.patient_id,
+        "doctor_name": appointment.practitioner,
+        "appointment_date": format_iso_date(appointment.start.date()),
+        "appointment_time": f"{appointment.start.hour:02d}:{appointment.start.minute:02d}",
+        "duration": appointment.duration_minutes,
+        "reason": appointment.notes or "",
+        "created_at": format_medscheduler_timestamp(appointment.created_at) if appointment.created_at else "",
+    } for appointment in appointments]
+
+
+def appointments_to_healthcare_pro(appointments):
+    """[Appointment] -> rendez-vous au format HealthCare Pro"""
+    return [{
+        "appointment_id": appointment.id,
+        "patient_id": appointment.patient_id,
+        "practitioner": appointment.practitioner,
+        "datetime": appointment.start.isoformat(),
+        "length_minutes": appointment.duration_minutes,
+        "type": appointment.kind or "checkup",
+        "notes": appointment.notes or "",
+        "created": format_rfc1123(appointment.created_at) if appointment.created_at else "",
+    } for appointment in appointments]
+
+
+CONVERTERS = {
+    ("patients", MEDSCHEDULER): (patients_from_medscheduler, patients_to_medscheduler),
+    ("patients", HEALTHCARE_PRO): (patients_from_healthcare_pro, patients_to_healthcare_pro),
+    ("appointments", MEDSCHEDULER): (appointments_from_medscheduler, appointments_to_medscheduler),
+    ("appointments", HEALTHCARE_PRO): (appointments_from_healthcare_pro, appointments_to_healthcare_pro),
+}
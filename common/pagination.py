@@ -0,0 +1,154 @@
+"""
+Pagination par curseur opaque et réponses JSON en streaming
+- `limit` / `cursor` : pages stables même si de nouveaux enregistrements arrivent
+- `stream=true` : les enregistrements sont sérialisés un par un par un générateur
+"""
+
+import base64
+from itertools import islice
+
+from flask import Response, current_app
+
+DEFAULT_PAGE_LIMIT = 100
+MAX_PAGE_LIMIT = 1000
+STREAM_CHUNK_SIZE = 16 * 1024  # Taille des blocs envoyés au client en streaming
+
+
+def encode_cursor(seq):
+    """Encoder une position (séquence) en curseur opaque"""
+    return base64.urlsafe_b64encode(f"seq:{seq}".encode('ascii')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Décoder un curseur opaque, ValueError s'il est invalide"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('ascii')
+        prefix, seq = raw.split(':', 1)
+        if prefix != 'seq':
+            raise ValueError
+        return int(seq)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+
+
+class PageRequest:
+    """Paramètres de pagination / streaming extraits de la query string"""
+
+    def __init__(self, limit=None, after=0, stream=False):
+        self.limit = limit
+        self.after = after
+        self.stream = stream
+
+    @property
+    def paginated(self):
+        return self.limit is not None
+
+    @classmethod
+    def from_args(cls, args):
+        """Construire depuis request.args, ValueError si les paramètres sont invalides"""
+        cursor = args.get('cursor')
+        limit = args.get('limit')
+        stream = args.get('stream', '').lower() in ('1', 'true')
+
+        after = decode_cursor(cursor) if cursor else 0
+
+        if limit is not None:
+            try:
+                limit = int(limit)
+            except ValueError:
+                raise ValueError("Invalid limit")
+            if not 1 <= limit <= MAX_PAGE_LIMIT:
+                raise ValueError(f"limit must be between 1 and {MAX_PAGE_LIMIT}")
+        elif cursor:
+            limit = DEFAULT_PAGE_LIMIT
+
+        return cls(limit=limit, after=after, stream=stream)
+
+
+def paginate(collection, page, records=None):
+    """Sélectionner les (seq, enregistrement) à renvoyer
+
+    `records` = résultat déjà filtré, ou None pour la collection entière
+    (parcours du journal à partir du curseur, figé à la séquence courante).
+    Retourne (itérateur, total).
+    """
+    if records is None:
+        entries = collection.scan(after=page.after, upto=collection.last_seq)
+        return entries, len(collection)
+    return collection.entries(records, after=page.after), len(records)
+
+
+def _take(entries, limit):
+    """Itérer au plus `limit` enregistrements, le curseur suivant est rempli à la fin"""
+    state = {"next_cursor": None}
+
+    def records():
+        last_seq = None
+        selected = entries if limit is None else islice(entries, limit)
+        for seq, record in selected:
+            last_seq = seq
+            yield record
+        # Curseur suivant uniquement s'il reste des enregistrements
+        if limit is not None and last_seq is not None and next(entries, None) is not None:
+            state["next_cursor"] = encode_cursor(last_seq)
+
+    return records(), state
+
+
+def _json_dumps():
+    # Même sérialisation que jsonify (format compact) ; le provider est capturé pour
+    # rester utilisable par un générateur de streaming hors du contexte d'application
+    provider = current_app.json
+    return lambda value: provider.dumps(value, separators=(',', ':'))
+
+
+def list_body(envelope, fragment):
+    """Corps JSON complet : champs d'enveloppe (recalculés à chaque requête) + fragment de liste"""
+    dumps = _json_dumps()
+    head = ''.join(f'{dumps(name)}:{dumps(value)},' for name, value in envelope.items())
+    return b'{' + head.encode('utf-8') + fragment + b'}\n'
+
+
+def list_response(page, key, entries, total, envelope=None):
+    """Réponse de liste : JSON classique ou streaming selon `page`
+
+    `envelope` contient les champs à ajouter autour de la liste (ex: success, timestamp).
+    En JSON classique, la partie liste déjà sérialisée est exposée dans
+    `response.list_fragment` (réutilisable par le cache de réponses).
+    """
+    envelope = dict(envelope or {})
+    dumps = _json_dumps()
+    records, state = _take(entries, page.limit)
+
+    def tail():
+        fields = {"total": total}
+        if page.paginated:
+            fields["next_cursor"] = state["next_cursor"]
+        return ','.join(f'{dumps(name)}:{dumps(value)}' for name, value in fields.items())
+
+    if not page.stream:
+        items = dumps(list(records))
+        fragment = f'{dumps(key)}:{items},{tail()}'.encode('utf-8')
+        response = Response(list_body(envelope, fragment), mimetype='application/json')
+        response.list_fragment = fragment
+        return response
+
+    def generate():
+        head = ''.join(f'{dumps(name)}:{dumps(value)},' for name, value in envelope.items())
+        buffer = ['{', head, dumps(key), ':[']
+        size = 0
+        separator = ''
+        for record in records:
+            chunk = separator + dumps(record)
+            separator = ','
+            buffer.append(chunk)
+            size += len(chunk)
+            if size >= STREAM_CHUNK_SIZE:
+                yield ''.join(buffer)
+                buffer, size = [], 0
+        buffer.append('],')
+        buffer.append(tail())
+        buffer.append('}')
+        yield ''.join(buffer)
+
+    return Response(generate(), mimetype='application/json')
@@ -0,0 +1,151 @@
+"""
+Registres d'identifiants à expiration (ex: refresh tokens actifs, nonces HMAC)
+- Chaque identifiant est enregistré avec sa date d'expiration
+- Éviction incrémentale par ordre d'expiration (tas en mémoire, index SQLite)
+- Taille maximale : plein d'identifiants non expirés, un registre refuse les nouveaux
+  (CapacityError) plutôt que d'évincer un identifiant encore valable
+- Partagé entre workers avec le backend SQLite (voir Database.registry)
+"""
+
+import time
+
+from common.expiring import CapacityError, ExpiringSet
+
+PURGE_BATCH_SIZE = 100  # Identifiants expirés supprimés au plus par opération (SQLite)
+
+
+class MemoryRegistry:
+    """Registre local au processus, sur un ExpiringSet"""
+
+    def __init__(self, name, max_size=100000, clock=time.time):
+        self.name = name
+        self._items = ExpiringSet(max_size=max_size, clock=clock)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, item_id):
+        return item_id in self._items
+
+    def add(self, item_id, expires_at):
+        """Enregistrer un identifiant actif jusqu'à `expires_at` (timestamp)
+
+        Retourne False si l'identifiant est déjà actif (non expiré), CapacityError
+        si le registre est plein.
+        """
+        return self._items.add(item_id, expires_at)
+
+    def consume(self, item_id):
+        """Retirer un identifiant actif, False s'il était absent, révoqué ou expiré"""
+        return self._items.remove(item_id)
+
+    def purge(self):
+        self._items.purge()
+
+    def stats(self):
+        size = len(self._items)
+        return {"size": size, "max_size": self._items.max_size, "saturated": size >= self._items.max_size,
+                "evictions": self._items.evictions, "rejections": self._items.rejections}
+
+
+class SQLiteRegistry:
+    """Registre partagé : table SQLite indexée sur la date d'expiration"""
+
+    # Table `registries` et compteurs `meta` créés avec le schéma du backend
+    SQL_ADD = "INSERT OR IGNORE INTO registries (registry, id, expires_at) VALUES (?, ?, ?)"
+    SQL_EXPIRED = "DELETE FROM registries WHERE registry = ? AND id = ? AND expires_at <= ?"
+    SQL_CONSUME = "DELETE FROM registries WHERE registry = ? AND id = ? AND expires_at > ?"
+    SQL_OLDEST = (
+        "DELETE FROM registries WHERE registry = ? AND id IN ("
+        "SELECT id FROM registries WHERE registry = ? AND expires_at <= ? "
+        "ORDER BY expires_at LIMIT ?)"
+    )
+    SQL_COUNTER = "INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT (key) DO UPDATE SET value = value + ?"
+    SQL_READ_COUNTER = "SELECT value FROM meta WHERE key = ?"
+
+    def __init__(self, backend, name, max_size=100000, clock=time.time):
+        self.backend = backend
+        self.name = name
+        self.max_size = max_size
+        self.clock = clock
+
+    @property
+    def conn(self):
+        return self.backend.conn
+
+    def __len__(self):
+        return self._counter("size")
+
+    def __contains__(self, item_id):
+        row = self.conn.execute(
+            "SELECT 1 FROM registries WHERE registry = ? AND id = ? AND expires_at > ?",
+            (self.name, item_id, self.clock())).fetchone()
+        return row is not None
+
+    def add(self, item_id, expires_at):
+        """Enregistrer un identifiant actif jusqu'à `expires_at` (timestamp)
+
+        Retourne False si l'identifiant est déjà actif (non expiré), CapacityError
+        si le registre est plein. Atomique entre workers : un seul appel peut
+        réussir pour un même identifiant.
+        """
+        with self.backend.transaction():
+            conn = self.conn
+            now = self.clock()
+            self._purge(conn, now, PURGE_BATCH_SIZE)
+            # Un identifiant expiré mais pas encore purgé ne bloque pas son ré-enregistrement
+            expired = conn.execute(self.SQL_EXPIRED, (self.name, item_id, now)).rowcount
+            if expired:
+                self._bump(conn, "size", -expired)
+                self._bump(conn, "evictions", expired)
+            if item_id in self:
+                return False
+            full = self._counter("size") >= self.max_size
+            if full:
+                # Plein : évincer tous les identifiants expirés, jamais un identifiant valable
+                self._purge(conn, now, -1)
+                full = self._counter("size") >= self.max_size
+            if full:
+                self._bump(conn, "rejections", 1)
+            else:
+                conn.execute(self.SQL_ADD, (self.name, item_id, expires_at))
+                self._bump(conn, "size", 1)
+        if full:
+            raise CapacityError(f"{self.max_size} active entries, none expired")
+        return True
+
+    def consume(self, item_id):
+        """Retirer un identifiant actif, False s'il était absent, révoqué ou expiré
+
+        Atomique entre workers : un seul appel peut réussir pour un même identifiant.
+        """
+        with self.backend.transaction():
+            conn = self.conn
+            consumed = conn.execute(self.SQL_CONSUME, (self.name, item_id, self.clock())).rowcount == 1
+            if consumed:
+                self._bump(conn, "size", -1)
+            self._purge(conn, self.clock(), PURGE_BATCH_SIZE)
+        return consumed
+
+    def purge(self):
+        """Évincer tous les identifiants expirés"""
+        with self.backend.transaction():
+            self._purge(self.conn, self.clock(), -1)
+
+    def stats(self):
+        size = self._counter("size")
+        return {"size": size, "max_size": self.max_size, "saturated": size >= self.max_size,
+                "evictions": self._counter("evictions"), "rejections": self._counter("rejections")}
+
+    def _purge(self, conn, before, limit):
+        evicted = conn.execute(self.SQL_OLDEST, (self.name, self.name, before, limit)).rowcount
+        if evicted:
+            self._bump(conn, "size", -evicted)
+            self._bump(conn, "evictions", evicted)
+
+    def _counter(self, counter):
+        row = self.conn.execute(self.SQL_READ_COUNTER, (f"registry:{self.name}:{counter}",)).fetchone()
+        return row[0] if row else 0
+
+    def _bump(self, conn, counter, delta):
+        conn.execute(self.SQL_COUNTER, (f"registry:{self.name}:{counter}", delta, delta))
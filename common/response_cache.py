@@ -0,0 +1,110 @@
+"""
+Cache des réponses de liste déjà sérialisées
+- Clé : route + paramètres de requête normalisés
+- Une entrée n'est servie que si les versions de ses collections sources sont
+  inchangées : seule une écriture sur ces collections (y compris par un autre
+  worker) l'invalide
+- Mémoire bornée (taille des fragments en octets), éviction LRU
+"""
+
+from collections import OrderedDict
+from functools import wraps
+import threading
+
+from flask import Response, request
+
+from common.pagination import list_body
+
+
+class ResponseCache:
+    """Fragments JSON sérialisés, indexés par clé et versionnés, en LRU borné en octets"""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()  # clé -> (versions, fragment)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, versions):
+        """Fragment en cache pour `key` s'il a été produit avec les mêmes versions"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == versions:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                self._remove(key)  # Périmé : une collection source a été modifiée
+            self.misses += 1
+            return None
+
+    def put(self, key, versions, fragment):
+        """Mémoriser un fragment, en évinçant les moins récemment utilisés si besoin"""
+        if len(fragment) > self.max_bytes:
+            return
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (versions, fragment)
+            self.size += len(fragment)
+            while self.size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self):
+        """Compteurs exposés pour dimensionner `max_bytes`"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "size_bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.evictions
+        }
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry[1])
+
+
+def cached_list(cache, *collections, envelope=None):
+    """Décorateur de vue de liste : sert le fragment déjà sérialisé si rien n'a changé
+
+    `collections` : collections dont dépend la liste.
+    `envelope` : fonction renvoyant les champs d'enveloppe recalculés à chaque
+    réponse (ex: timestamp), qui ne sont donc jamais figés par le cache.
+    Les réponses en streaming ne sont pas mises en cache.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            key = (request.endpoint, tuple(sorted(request.args.items(multi=True))))
+            versions = tuple(collection.version for collection in collections)
+
+            fragment = cache.get(key, versions)
+            if fragment is not None:
+                fields = envelope() if envelope else {}
+                return Response(list_body(fields, fragment), mimetype='application/json')
+
+            response = f(*args, **kwargs)
+            fragment = getattr(response, 'list_fragment', None)
+            if fragment is not None and response.status_code == 200:
+                cache.put(key, versions, fragment)
+            return response
+
+        return decorated_function
+
+    return decorator
@@ -0,0 +1,188 @@
+"""
+Index de recherche plein texte par trigrammes (recherche en saisie semi-automatique)
+- Texte normalisé : minuscules, accents retirés, ponctuation = séparateur de mots
+- Champs compacts (ex: téléphone) : séparateurs supprimés, "+33 1 45" -> "33145"
+- Trigrammes -> mots du vocabulaire -> documents : les candidats sont des
+  intersections d'ensembles, sans parcourir la collection
+- Termes de 1-2 caractères : recherchés en début de mot
+- Maintenu au fil des écritures via Collection.subscribe
+"""
+
+import heapq
+import re
+import threading
+import unicodedata
+
+_NON_ALNUM = re.compile(r'[^0-9a-z]+')
+
+# Palier de correspondance d'un terme (somme des termes = score du document)
+EXACT_WORD, WORD_PREFIX, SUBSTRING = 3, 2, 1
+
+
+def fold(text):
+    """Minuscules sans accents (NFKD puis suppression des diacritiques)"""
+    text = str(text)
+    if text.isascii():
+        return text.lower()  # Cas courant (emails, numéros) : rien à décomposer
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+def words(text):
+    """Mots normalisés d'un texte"""
+    return [word for word in _NON_ALNUM.split(fold(text)) if word]
+
+
+def term_grams(term):
+    """Trigrammes à trouver dans un mot contenant `term` (début de mot si court)"""
+    if len(term) < 3:
+        return {' ' + term}
+    return {term[i:i + 3] for i in range(len(term) - 2)}
+
+
+def word_grams(word):
+    """Trigrammes indexés pour un mot : sous-chaînes de 3 caractères et débuts de mot"""
+    grams = {' ' + word[:1], ' ' + word[:2]}
+    grams.update(word[i:i + 3] for i in range(len(word) - 2))
+    return grams
+
+
+class TrigramIndex:
+    """Index trigrammes des champs texte d'une collection
+
+    Deux niveaux : trigramme -> mots du vocabulaire, mot -> documents. Un terme
+    n'est comparé qu'aux mots candidats (une fois par mot, pas par document), puis
+    les documents sont combinés par opérations d'ensembles.
+    """
+
+    def __init__(self, fields, key="id", compact_fields=()):
+        self.fields = tuple(fields)
+        self.key = key
+        self.compact_fields = frozenset(compact_fields)
+        self._grams = {}      # trigramme -> {mot}
+        self._word_docs = {}  # mot -> {numéro de document}
+        self._doc_words = {}  # numéro de document -> mots normalisés
+        self._docnos = {}     # identifiant -> numéro de document (ordre d'indexation)
+        self._doc_ids = {}    # numéro de document -> identifiant
+        self._next_docno = 0
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._docnos)
+
+    def record_words(self, record):
+        """Mots normalisés des champs indexés d'un enregistrement"""
+        result = []
+        for field in self.fields:
+            value = record.get(field)
+            if not value:
+                continue
+            if field in self.compact_fields:
+                result.append(''.join(words(value)))
+            else:
+                result.extend(words(value))
+        return tuple(dict.fromkeys(word for word in result if word))
+
+    def apply(self, action, record):
+        """Abonné de collection : indexer, ré-indexer ou retirer un enregistrement"""
+        record_id = record[self.key]
+        with self._lock:
+            if action == "delete":
+                docno = self._docnos.pop(record_id, None)
+                if docno is not None:
+                    self._unlink(docno)
+                    del self._doc_ids[docno]
+                return
+            docno = self._docnos.get(record_id)
+            if docno is None:
+                # Numéro conservé lors des modifications : l'ordre d'indexation ne change pas
+                docno = self._docnos[record_id] = self._next_docno
+                self._doc_ids[docno] = record_id
+                self._next_docno += 1
+            else:
+                self._unlink(docno)
+            self._link(docno, self.record_words(record))
+
+    def search(self, query, limit=None, accept=None):
+        """Identifiants correspondant à tous les termes de `query`, les mieux classés d'abord
+
+        Classement : score décroissant puis ordre d'indexation. `accept` filtre les
+        enregistrements par identifiant. Retourne (identifiants, nombre total de résultats).
+        """
+        terms = list(dict.fromkeys(words(query)))
+        if not terms:
+            return [], 0
+        with self._lock:
+            tiers = [self._term_tiers(term) for term in terms]
+            matches = set.intersection(*(set().union(*term_tiers.values()) for term_tiers in tiers))
+            if accept is not None:
+                matches = {docno for docno in matches if accept(self._doc_ids[docno])}
+            total = len(matches)
+            if len(tiers) == 1:
+                # Un seul terme : les paliers de score sont déjà des ensembles disjoints
+                ranked = []
+                for score in (EXACT_WORD, WORD_PREFIX, SUBSTRING):
+                    if limit is not None and len(ranked) >= limit:
+                        break
+                    ranked.extend(sorted(tiers[0].get(score, set()) & matches))
+            else:
+                scored = [(-sum(_tier_of(term_tiers, docno) for term_tiers in tiers), docno)
+                          for docno in matches]
+                ranked = [docno for _, docno in (
+                    sorted(scored) if limit is None else heapq.nsmallest(limit, scored))]
+            if limit is not None:
+                ranked = ranked[:limit]
+            return [self._doc_ids[docno] for docno in ranked], total
+
+    def _term_tiers(self, term):
+        """Documents contenant `term`, par meilleur palier de correspondance -> {score: {docno}}"""
+        gram_sets = sorted((self._grams.get(gram, set()) for gram in term_grams(term)), key=len)
+        candidates = gram_sets[0].intersection(*gram_sets[1:])
+        tiers = {}
+        for word in candidates:
+            if word == term:
+                score = EXACT_WORD
+            elif word.startswith(term):
+                score = WORD_PREFIX
+            elif len(term) >= 3 and term in word:
+                score = SUBSTRING
+            else:
+                continue
+            tiers.setdefault(score, set()).update(self._word_docs[word])
+        # Un document garde son meilleur palier
+        seen = set()
+        for score in (EXACT_WORD, WORD_PREFIX, SUBSTRING):
+            if score in tiers:
+                tiers[score] -= seen
+                seen |= tiers[score]
+        return tiers
+
+    def _link(self, docno, record_words):
+        self._doc_words[docno] = record_words
+        for word in record_words:
+            docs = self._word_docs.get(word)
+            if docs is None:
+                docs = self._word_docs[word] = set()
+                for gram in word_grams(word):
+                    self._grams.setdefault(gram, set()).add(word)
+            docs.add(docno)
+
+    def _unlink(self, docno):
+        for word in self._doc_words.pop(docno, ()):
+            docs = self._word_docs[word]
+            docs.discard(docno)
+            if not docs:
+                # Mot absent de tous les documents : retiré du vocabulaire
+                del self._word_docs[word]
+                for gram in word_grams(word):
+                    words_with_gram = self._grams[gram]
+                    words_with_gram.discard(word)
+                    if not words_with_gram:
+                        del self._grams[gram]
+
+
+def _tier_of(term_tiers, docno):
+    for score, docnos in term_tiers.items():
+        if docno in docnos:
+            return score
+    return 0
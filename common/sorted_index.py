@@ -0,0 +1,65 @@
+"""
+Index trié sur la valeur d'un champ (ex: date et heure d'un rendez-vous)
+- Liste triée de (valeur, id) : requêtes d'intervalle par bisection en O(log n + k)
+- Maintenu au fil des écritures via Collection.subscribe
+"""
+
+from bisect import bisect_left, insort
+import threading
+
+
+class SortedIndex:
+    """Identifiants d'une collection triés par la valeur (convertie) d'un champ
+
+    `parse` convertit la valeur brute en clé comparable ; une valeur absente ou
+    invalide (ValueError, TypeError) n'est pas indexée.
+    """
+
+    def __init__(self, field, key="id", parse=None):
+        self.field = field
+        self.key = key
+        self.parse = parse or (lambda value: value)
+        self._entries = []  # liste triée de (valeur, id)
+        self._values = {}   # id -> valeur indexée
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def apply(self, action, record):
+        """Abonné de collection : indexer, ré-indexer ou retirer un enregistrement"""
+        record_id = record[self.key]
+        value = None
+        if action != "delete" and record.get(self.field) is not None:
+            try:
+                value = self.parse(record[self.field])
+            except (ValueError, TypeError):
+                value = None
+        with self._lock:
+            previous = self._values.pop(record_id, None)
+            if previous is not None:
+                self._entries.pop(bisect_left(self._entries, (previous, record_id)))
+            if value is not None:
+                insort(self._entries, (value, record_id))
+                self._values[record_id] = value
+
+    def value(self, record_id):
+        """Valeur indexée d'un enregistrement (None s'il n'est pas indexé)"""
+        return self._values.get(record_id)
+
+    def count(self, start=None, end=None):
+        """Nombre d'identifiants dont la valeur est dans [start, end) en O(log n)"""
+        low, high = self._bounds(start, end)
+        return max(0, high - low)
+
+    def range(self, start=None, end=None):
+        """Identifiants dont la valeur est dans [start, end), par valeur croissante"""
+        with self._lock:
+            low, high = self._bounds(start, end)
+            return [record_id for _, record_id in self._entries[low:high]]
+
+    def _bounds(self, start, end):
+        # (valeur,) est inférieur à tout (valeur, id) : bornes exactes par bisection
+        low = 0 if start is None else bisect_left(self._entries, (start,))
+        high = len(self._entries) if end is None else bisect_left(self._entries, (end,))
+        return low, high
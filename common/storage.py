@@ -0,0 +1,371 @@
+"""
+Backends de persistance des collections
+- MemoryBackend : tout reste dans le processus (comportement historique)
+- SQLiteBackend : fichier SQLite partagé (mode WAL) entre les workers gunicorn
+
+Chaque écriture reçoit une révision globale croissante. Avec SQLite, chaque worker
+garde ses collections indexées en mémoire et rattrape les écritures des autres
+workers en relisant les lignes de révision supérieure (index sur la révision),
+seulement quand `PRAGMA data_version` indique un commit d'une autre connexion.
+
+La révision sert aussi de numéro de séquence au flux de modifications
+(`changes`) : dernière version de chaque enregistrement par révision croissante,
+suppressions comprises. Les suppressions les plus anciennes sont oubliées au-delà
+de `max_tombstones` : l'horizon (`change_horizon`) avance, et un lecteur plus
+ancien que l'horizon doit tout relire.
+"""
+
+from bisect import bisect_right
+from collections import deque
+from contextlib import contextmanager
+import json
+import os
+import sqlite3
+import threading
+
+from common.registry import MemoryRegistry, SQLiteRegistry
+
+MAX_TOMBSTONES = 100000  # Suppressions gardées dans le flux de modifications
+
+
+class _FinishHooks:
+    """Rappels de fin de la transaction la plus externe, communs aux backends
+
+    Les collections y annulent leur état en mémoire quand les écritures du
+    backend sont annulées (exception dans la transaction).
+    """
+
+    def on_finish(self, callback):
+        """Appeler `callback(committed)` à la fin de la transaction en cours"""
+        self._finishers.append(callback)
+
+    def _finish(self, committed):
+        finishers, self._finishers = self._finishers, []
+        for callback in reversed(finishers):
+            callback(committed)
+
+
+class MemoryBackend(_FinishHooks):
+    """Backend sans persistance : révisions et verrou locaux au processus
+
+    Le flux de modifications est un journal en mémoire compacté par clé.
+    Une transaction qui échoue restaure les enregistrements, le journal et la
+    révision de son début.
+    """
+
+    def __init__(self, max_tombstones=MAX_TOMBSTONES):
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._finishers = []
+        self._undo = None  # Transaction en cours : [(clé, entrée précédente ou None)]
+        self._saved = None
+        self._rev = 0
+        self.max_tombstones = max_tombstones
+        # Journal (révision, clé) trié par révision ; une entrée est obsolète si
+        # la clé a été réécrite depuis
+        self._change_revs = []
+        self._change_keys = []
+        self._latest = {}  # (collection, id) -> (seq, rev, enregistrement ou None)
+        self._stale = 0
+        self._tombstones = deque()  # (rev, clé) des suppressions, les plus anciennes d'abord
+        self._horizon = 0
+
+    @contextmanager
+    def transaction(self):
+        """Transaction ré-entrante : tout est annulé si la transaction la plus externe échoue"""
+        with self._lock:
+            if self._depth == 0:
+                self._undo = []
+                self._saved = (self._rev, len(self._change_revs), self._stale, len(self._tombstones))
+            self._depth += 1
+            try:
+                yield
+            except BaseException:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._rollback()
+                    self._finish(False)
+                raise
+            self._depth -= 1
+            if self._depth == 0:
+                self._undo = None
+                self._maintain()
+                self._finish(True)
+
+    def _rollback(self):
+        """Restaurer l'état du début de la transaction (journal compacté seulement au commit)"""
+        latest = self._latest
+        for key, entry in reversed(self._undo):
+            if entry is None:
+                latest.pop(key, None)
+            else:
+                latest[key] = entry
+        self._rev, log_size, self._stale, tombstones = self._saved
+        del self._change_revs[log_size:]
+        del self._change_keys[log_size:]
+        while len(self._tombstones) > tombstones:
+            self._tombstones.pop()
+        self._undo = None
+
+    def _maintain(self):
+        """Oublier les suppressions en trop et compacter le journal (hors transaction)"""
+        self._trim_tombstones()
+        if self._stale > len(self._change_revs) // 2:
+            self._compact_changes()
+
+    def next_rev(self):
+        self._rev += 1
+        return self._rev
+
+    def next_revs(self, count):
+        """Réserver `count` révisions consécutives -> première révision"""
+        first = self._rev + 1
+        self._rev += count
+        return first
+
+    def put_many(self, collection, rows):
+        """Écrire plusieurs enregistrements : [(id, seq, rev, enregistrement)]"""
+        latest, change_revs, change_keys = self._latest, self._change_revs, self._change_keys
+        undo = self._undo
+        for record_id, seq, rev, record in rows:
+            key = (collection, record_id)
+            previous = latest.get(key)
+            if previous is not None:
+                self._stale += 1
+            if undo is not None:
+                undo.append((key, previous))
+            latest[key] = (seq, rev, record)
+            change_revs.append(rev)
+            change_keys.append(key)
+        if self._depth == 0:
+            self._maintain()
+
+    def put(self, collection, record_id, seq, rev, record):
+        key = (collection, record_id)
+        previous = self._latest.get(key)
+        if previous is not None:
+            self._stale += 1
+        if self._undo is not None:
+            self._undo.append((key, previous))
+        self._latest[key] = (seq, rev, record)
+        self._change_revs.append(rev)
+        self._change_keys.append(key)
+        if record is None:
+            self._tombstones.append((rev, key))
+        if self._depth == 0:
+            self._maintain()
+
+    def pull(self, collection, since_rev):
+        return (), None
+
+    def changes(self, since, limit):
+        """Modifications de révision > `since` -> [(collection, id, seq, rev, enregistrement ou None)]"""
+        with self._lock:
+            revs, keys, latest = self._change_revs, self._change_keys, self._latest
+            result = []
+            position = bisect_right(revs, since)
+            while position < len(revs) and len(result) < limit:
+                key = keys[position]
+                entry = latest.get(key)
+                if entry is not None and entry[1] == revs[position]:
+                    result.append((key[0], key[1]) + entry)
+                position += 1
+            return result
+
+    def change_horizon(self):
+        return self._horizon
+
+    def last_rev(self):
+        return self._rev
+
+    def _trim_tombstones(self):
+        while len(self._tombstones) > self.max_tombstones:
+            rev, key = self._tombstones.popleft()
+            entry = self._latest.get(key)
+            if entry is not None and entry[1] == rev:
+                del self._latest[key]
+                self._stale += 1
+            self._horizon = max(self._horizon, rev)
+
+    def _compact_changes(self):
+        live = [(rev, key) for rev, key in zip(self._change_revs, self._change_keys)
+                if key in self._latest and self._latest[key][1] == rev]
+        self._change_revs = [rev for rev, _ in live]
+        self._change_keys = [key for _, key in live]
+        self._stale = 0
+
+    def registry(self, name, max_size):
+        return MemoryRegistry(name, max_size=max_size)
+
+
+class SQLiteBackend(_FinishHooks):
+    """Backend SQLite : une connexion par worker, écritures sérialisées par BEGIN IMMEDIATE"""
+
+    SCHEMA = (
+        """CREATE TABLE IF NOT EXISTS records (
+            collection TEXT NOT NULL,
+            id TEXT NOT NULL,
+            seq INTEGER NOT NULL,
+            rev INTEGER NOT NULL,
+            data TEXT,
+            PRIMARY KEY (collection, id)
+        ) WITHOUT ROWID""",
+        "CREATE INDEX IF NOT EXISTS records_rev ON records (collection, rev)",
+        "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)",
+        "INSERT OR IGNORE INTO meta (key, value) VALUES ('rev', 0)",
+        """CREATE TABLE IF NOT EXISTS registries (
+            registry TEXT NOT NULL,
+            id TEXT NOT NULL,
+            expires_at REAL NOT NULL,
+            PRIMARY KEY (registry, id)
+        ) WITHOUT ROWID""",
+        "CREATE INDEX IF NOT EXISTS registries_expiry ON registries (registry, expires_at)",
+        # Flux de modifications : toutes collections par révision, suppressions à purger
+        "CREATE INDEX IF NOT EXISTS records_changes ON records (rev)",
+        "CREATE INDEX IF NOT EXISTS records_tombstones ON records (rev) WHERE data IS NULL",
+        "INSERT OR IGNORE INTO meta (key, value) VALUES ('changes_horizon', 0)",
+    )
+    TOMBSTONE_PURGE_EVERY = 100  # Suppressions d'un worker entre deux purges
+
+    # Requêtes paramétrées : préparées une fois puis réutilisées par le cache de sqlite3
+    SQL_NEXT_REV = "UPDATE meta SET value = value + 1 WHERE key = 'rev' RETURNING value"
+    SQL_NEXT_REVS = "UPDATE meta SET value = value + ? WHERE key = 'rev' RETURNING value"
+    SQL_PUT = (
+        "INSERT INTO records (collection, id, seq, rev, data) VALUES (?, ?, ?, ?, ?) "
+        "ON CONFLICT (collection, id) DO UPDATE SET rev = excluded.rev, data = excluded.data"
+    )
+    SQL_PULL = (
+        "SELECT id, seq, rev, data FROM records "
+        "WHERE collection = ? AND rev > ? ORDER BY seq"
+    )
+    SQL_LIVE_IDS = "SELECT id FROM records WHERE collection = ? AND data IS NOT NULL"
+    SQL_CHANGES = "SELECT collection, id, seq, rev, data FROM records WHERE rev > ? ORDER BY rev LIMIT ?"
+    SQL_HORIZON = "SELECT value FROM meta WHERE key = 'changes_horizon'"
+
+    def __init__(self, path, max_tombstones=MAX_TOMBSTONES):
+        self.path = path
+        self.max_tombstones = max_tombstones
+        self._deletes = 0
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._finishers = []
+        self._pid = None
+        self._conn = None
+        self._seen_versions = {}
+
+    @property
+    def conn(self):
+        # Une connexion par processus : rouverte après un fork (gunicorn --preload)
+        if self._pid != os.getpid():
+            self._conn = sqlite3.connect(self.path, timeout=30, isolation_level=None,
+                                         check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            for statement in self.SCHEMA:
+                self._conn.execute(statement)
+            self._pid = os.getpid()
+            self._seen_versions = {}
+        return self._conn
+
+    @contextmanager
+    def transaction(self):
+        """Transaction d'écriture ré-entrante (verrou d'écriture SQLite pris d'emblée)"""
+        with self._lock:
+            if self._depth == 0:
+                self.conn.execute("BEGIN IMMEDIATE")
+            self._depth += 1
+            try:
+                yield
+            except BaseException:
+                self._depth -= 1
+                if self._depth == 0:
+                    self.conn.execute("ROLLBACK")
+                    self._finish(False)
+                raise
+            self._depth -= 1
+            if self._depth == 0:
+                self.conn.execute("COMMIT")
+                self._finish(True)
+
+    def next_rev(self):
+        return self.conn.execute(self.SQL_NEXT_REV).fetchone()[0]
+
+    def next_revs(self, count):
+        """Réserver `count` révisions consécutives -> première révision"""
+        return self.conn.execute(self.SQL_NEXT_REVS, (count,)).fetchone()[0] - count + 1
+
+    def put_many(self, collection, rows):
+        """Écrire plusieurs enregistrements en une requête préparée : [(id, seq, rev, enregistrement)]"""
+        self.conn.executemany(self.SQL_PUT, (
+            (collection, record_id, seq, rev, json.dumps(record, ensure_ascii=False))
+            for record_id, seq, rev, record in rows
+        ))
+
+    def put(self, collection, record_id, seq, rev, record):
+        """Écrire la dernière version d'un enregistrement (None = supprimé)"""
+        data = None if record is None else json.dumps(record, ensure_ascii=False)
+        self.conn.execute(self.SQL_PUT, (collection, record_id, seq, rev, data))
+        if record is None:
+            self._deletes += 1
+            if self._deletes % self.TOMBSTONE_PURGE_EVERY == 0:
+                self._purge_tombstones()
+
+    def _purge_tombstones(self):
+        """Oublier les suppressions au-delà des `max_tombstones` plus récentes (dans la transaction)"""
+        row = self.conn.execute(
+            "SELECT rev FROM records WHERE data IS NULL ORDER BY rev DESC LIMIT 1 OFFSET ?",
+            (self.max_tombstones,)).fetchone()
+        if row is not None:
+            self.conn.execute("DELETE FROM records WHERE data IS NULL AND rev <= ?", row)
+            self.conn.execute("UPDATE meta SET value = MAX(value, ?) WHERE key = 'changes_horizon'", row)
+
+    def pull(self, collection, since_rev):
+        """Écritures des autres workers depuis `since_rev` -> (lignes, identifiants vivants)
+
+        Lignes (id, seq, rev, enregistrement ou None). Si des suppressions
+        postérieures à `since_rev` ont été purgées, les identifiants encore
+        présents sont aussi retournés (None sinon) pour retirer les autres.
+        """
+        with self._lock:
+            version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+            if self._depth == 0 and self._seen_versions.get(collection) == version:
+                return (), None
+            rows = self.conn.execute(self.SQL_PULL, (collection, since_rev)).fetchall()
+            live_ids = None
+            if since_rev and since_rev < self.change_horizon():
+                live_ids = {record_id for record_id, in self.conn.execute(self.SQL_LIVE_IDS, (collection,))}
+            self._seen_versions[collection] = version
+        return [
+            (record_id, seq, rev, None if data is None else json.loads(data))
+            for record_id, seq, rev, data in rows
+        ], live_ids
+
+    def changes(self, since, limit):
+        """Modifications de révision > `since` -> [(collection, id, seq, rev, enregistrement ou None)]"""
+        with self._lock:
+            rows = self.conn.execute(self.SQL_CHANGES, (since, limit)).fetchall()
+        return [
+            (collection, record_id, seq, rev, None if data is None else json.loads(data))
+            for collection, record_id, seq, rev, data in rows
+        ]
+
+    def change_horizon(self):
+        with self._lock:
+            return self.conn.execute(self.SQL_HORIZON).fetchone()[0]
+
+    def last_rev(self):
+        with self._lock:
+            return self.conn.execute("SELECT value FROM meta WHERE key = 'rev'").fetchone()[0]
+
+    def registry(self, name, max_size):
+        """Registre à expiration partagé entre les workers"""
+        return SQLiteRegistry(self, name, max_size=max_size)
+
+
+def open_backend(url=None):
+    """Ouvrir un backend depuis une URL : vide/'memory://' ou 'sqlite:///chemin.db'"""
+    if not url or url == 'memory://':
+        return MemoryBackend()
+    if url.startswith('sqlite:///'):
+        return SQLiteBackend(url[len('sqlite:///'):])
+    raise ValueError(f"Unsupported storage URL: {url}")
@@ -0,0 +1,456 @@
+"""
+Stockage en mémoire indexé
+- Index primaire par identifiant (dict, ordre d'insertion conservé)
+- Index secondaires par valeur de champ, maintenus à chaque écriture
+- Numéro de séquence par enregistrement, base des curseurs de pagination
+- Abonnés notifiés à chaque écriture (index dérivés, invalidations...)
+- Persistance optionnelle via un backend partagé (voir common/storage.py)
+- Transaction qui échoue : écritures annulées dans le backend et en mémoire
+  (abonnés notifiés des écritures inverses)
+"""
+
+from bisect import bisect_right
+from contextlib import contextmanager
+import gc
+import threading
+
+from common.storage import MemoryBackend, open_backend
+
+MISSING = object()  # Champ absent avant une modification annulée
+
+
+@contextmanager
+def paused_gc():
+    """Suspendre le ramasse-miettes cyclique pendant une création massive d'objets
+
+    Sans cela, chaque lot d'allocations déclenche un parcours des objets déjà
+    chargés : le coût d'un chargement croît plus vite que sa taille.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+class Database:
+    """Collections d'une API partageant un même backend de persistance"""
+
+    def __init__(self, url=None):
+        self.backend = open_backend(url)
+
+    def collection(self, name, key="id", indexes=()):
+        return Collection(key=key, indexes=indexes, name=name, backend=self.backend)
+
+    @contextmanager
+    def transaction(self):
+        """Regrouper les écritures de plusieurs collections (un seul commit avec SQLite)"""
+        with self.backend.transaction():
+            yield
+
+    def registry(self, name, max_size=100000):
+        """Registre d'identifiants à expiration (voir common/registry.py)"""
+        return self.backend.registry(name, max_size)
+
+
+class Collection:
+    """Collection d'enregistrements (dicts) avec index primaire et secondaires
+
+    Les index vivent en mémoire ; avec un backend partagé, les écritures des
+    autres processus sont rattrapées avant chaque lecture.
+    """
+
+    def __init__(self, key="id", indexes=(), name=None, backend=None):
+        self.key = key
+        self.name = name
+        self._backend = backend or MemoryBackend()
+        self._synced_rev = 0
+        self._records = {}
+        # champ -> valeur -> {id: None} (dict utilisé comme ensemble ordonné)
+        self._indexes = {field: {} for field in indexes}
+        # Journal d'insertion (append-only) : id et séquence en parallèle,
+        # triés par séquence pour retrouver la position d'un curseur par bisection
+        self._seqs = {}
+        self._log_ids = []
+        self._log_seqs = []
+        self._log_dead = 0  # Entrées du journal dont l'enregistrement a été supprimé
+        self.last_seq = 0
+        self._revs = {}
+        self._listeners = []
+        self._lock = threading.RLock()
+        # Écritures de la transaction en cours, rejouées à l'envers si elle échoue
+        self._undo = None
+        self._undo_state = None
+        self._sync()
+
+    def __len__(self):
+        self._sync()
+        return len(self._records)
+
+    def __contains__(self, record_id):
+        self._sync()
+        return record_id in self._records
+
+    def __iter__(self):
+        return iter(self.all())
+
+    def subscribe(self, listener):
+        """Enregistrer un abonné appelé avec (action, enregistrement) après chaque écriture
+
+        action vaut "insert", "update" ou "delete". Les enregistrements déjà
+        présents (chargés depuis le backend) sont rejoués comme des insertions.
+        """
+        with self._lock, paused_gc():
+            self._listeners.append(listener)
+            for record in list(self._records.values()):
+                listener("insert", record)
+
+    @contextmanager
+    def transaction(self):
+        """Contexte d'écriture exclusif : vérifier puis écrire sans course possible
+
+        Avec un backend partagé, la transaction verrouille aussi les autres
+        processus et commence par rattraper leurs écritures.
+        """
+        with self._backend.transaction():
+            with self._lock:
+                self._sync()
+                yield
+
+    def _sync(self):
+        """Appliquer les écritures faites par d'autres processus depuis la dernière lecture"""
+        changes, live_ids = self._backend.pull(self.name, self._synced_rev)
+        if live_ids is not None:
+            # Suppressions manquées déjà purgées du backend : retirer les absents
+            with self._lock:
+                for record_id in [record_id for record_id in self._records if record_id not in live_ids]:
+                    self._delete(record_id, self._synced_rev)
+        if not changes:
+            return
+        with self._lock:
+            for record_id, seq, rev, record in changes:
+                if record is None:
+                    self._delete(record_id, rev)
+                elif record_id in self._records:
+                    self._update(record_id, record, rev)
+                else:
+                    self._insert(record, seq, rev)
+                self._synced_rev = max(self._synced_rev, rev)
+
+    def _track(self, *entry):
+        """Noter une écriture locale (dans une transaction) pour pouvoir l'annuler"""
+        if self._undo is None:
+            self._undo = []
+            self._undo_state = (self.last_seq, self._synced_rev, len(self._log_ids))
+            self._backend.on_finish(self._finish)
+        self._undo.append(entry)
+
+    def _finish(self, committed):
+        """Fin de la transaction : annuler ses écritures en mémoire si le backend les a annulées"""
+        with self._lock:
+            undo, self._undo = self._undo, None
+            if not committed:
+                for action, *args in reversed(undo):
+                    getattr(self, f"_revert_{action}")(*args)
+                # Séquences annulées réattribuées ensuite : leurs entrées du journal sont retirées
+                self.last_seq, self._synced_rev, log_size = self._undo_state
+                del self._log_ids[log_size:]
+                del self._log_seqs[log_size:]
+                if any(action == "delete" for action, *_ in undo):
+                    # Enregistrements restaurés à leur place dans l'ordre d'insertion
+                    seqs = self._seqs
+                    self._records = dict(sorted(self._records.items(), key=lambda item: seqs[item[0]]))
+            if self._log_dead > len(self._log_ids) // 2:
+                self._compact_log()
+
+    def _revert_insert(self, record_ids):
+        for record_id in reversed(record_ids):
+            record = self._records.pop(record_id)
+            self._seqs.pop(record_id)
+            self._revs.pop(record_id)
+            for field in self._indexes:
+                try:
+                    self._index_remove(field, record.get(field), record_id)
+                except TypeError:
+                    pass  # Valeur non hashable : jamais indexée (échec de cette insertion)
+            self._notify("delete", record)
+
+    def _revert_update(self, record_id, previous, rev):
+        record = self._records[record_id]
+        for field, value in previous.items():
+            if field in self._indexes:
+                self._index_remove(field, record.get(field), record_id)
+                self._index_add(field, None if value is MISSING else value, record_id)
+            if value is MISSING:
+                record.pop(field, None)
+            else:
+                record[field] = value
+        self._revs[record_id] = rev
+        self._notify("update", record)
+
+    def _revert_delete(self, record, seq, rev):
+        # L'entrée du journal d'insertion est toujours là : pas de compactage pendant la transaction
+        record_id = record[self.key]
+        self._records[record_id] = record
+        self._seqs[record_id] = seq
+        self._revs[record_id] = rev
+        self._log_dead -= 1
+        for field in self._indexes:
+            self._index_add(field, record.get(field), record_id)
+        self._notify("insert", record)
+
+    def _notify(self, action, record):
+        for listener in self._listeners:
+            listener(action, record)
+
+    def all(self):
+        """Tous les enregistrements, dans l'ordre d'insertion"""
+        self._sync()
+        return list(self._records.values())
+
+    def get(self, record_id):
+        """Récupérer un enregistrement par identifiant (O(1))"""
+        self._sync()
+        return self._records.get(record_id)
+
+    def get_many(self, record_ids):
+        """Récupérer plusieurs enregistrements (identifiants absents ignorés)"""
+        self._sync()
+        records = self._records
+        return [records[record_id] for record_id in record_ids if record_id in records]
+
+    def find(self, field, value):
+        """Récupérer les enregistrements dont le champ indexé vaut `value`, dans l'ordre d'insertion"""
+        self._sync()
+        bucket = self._indexes[field].get(value, ())
+        return [self._records[record_id] for record_id in self._ordered(bucket)]
+
+    def count(self, field, value):
+        """Nombre d'enregistrements dont le champ indexé vaut `value` (O(1))"""
+        self._sync()
+        return len(self._indexes[field].get(value, ()))
+
+    def _ordered(self, record_ids):
+        """Identifiants triés par séquence
+
+        Un index n'est pas dans l'ordre d'insertion : une modification ajoute
+        l'enregistrement en fin de sa nouvelle entrée.
+        """
+        return sorted(record_ids, key=self._seqs.get)
+
+    def in_order(self, records):
+        """Trier des enregistrements déjà sélectionnés dans l'ordre d'insertion"""
+        self._sync()
+        seqs = self._seqs
+        return sorted(records, key=lambda record: seqs.get(record[self.key], 0))
+
+    @property
+    def version(self):
+        """Version de la collection : croît à chaque création, modification ou suppression"""
+        self._sync()
+        return self._synced_rev
+
+    def rev(self, record_id):
+        """Révision courante d'un enregistrement (None s'il n'existe pas)"""
+        self._sync()
+        return self._revs.get(record_id)
+
+    def seq(self, record_id):
+        """Numéro de séquence d'un enregistrement (None s'il n'existe pas)"""
+        self._sync()
+        return self._seqs.get(record_id)
+
+    def scan(self, after=0, upto=None):
+        """Parcourir les (seq, enregistrement) dans l'ordre d'insertion
+
+        Démarre après la séquence `after` en O(log n) et s'arrête à `upto`.
+        Les insertions concurrentes n'invalident pas le parcours.
+        """
+        self._sync()
+        log_ids, log_seqs = self._log_ids, self._log_seqs
+        position = bisect_right(log_seqs, after)
+        while position < len(log_seqs):
+            seq = log_seqs[position]
+            if upto is not None and seq > upto:
+                return
+            record_id = log_ids[position]
+            position += 1
+            record = self._records.get(record_id)
+            if record is not None and self._seqs.get(record_id) == seq:
+                yield seq, record
+
+    def entries(self, records, after=0):
+        """Associer leur séquence à des enregistrements déjà sélectionnés"""
+        for record in records:
+            seq = self._seqs.get(record[self.key])
+            if seq is not None and seq > after:
+                yield seq, record
+
+    def query(self, **filters):
+        """Combiner plusieurs filtres d'égalité sur des champs indexés
+
+        On part du plus petit ensemble d'index puis on vérifie les autres champs.
+        Résultat dans l'ordre d'insertion (curseurs de pagination par séquence).
+        """
+        filters = {field: value for field, value in filters.items() if value is not None}
+        if not filters:
+            return self.all()
+        self._sync()
+        buckets = sorted(
+            (self._indexes[field].get(value, {}) for field, value in filters.items()),
+            key=len
+        )
+        smallest, others = buckets[0], buckets[1:]
+        return [
+            self._records[record_id] for record_id in self._ordered(smallest)
+            if all(record_id in bucket for bucket in others)
+        ]
+
+    def insert(self, record):
+        """Ajouter un enregistrement et mettre à jour les index"""
+        record_id = record[self.key]
+        with self.transaction():
+            if record_id in self._records:
+                raise ValueError(f"Duplicate {self.key}: {record_id}")
+            rev = self._backend.next_rev()
+            self._backend.put(self.name, record_id, rev, rev, record)
+            self._track("insert", [record_id])
+            self._insert(record, rev, rev)
+        return record
+
+    def extend(self, records):
+        """Ajouter plusieurs enregistrements (une seule transaction)
+
+        Révisions réservées en bloc et écritures groupées dans le backend. Rien
+        n'est ajouté si un identifiant est en double (dans le lot ou la collection).
+        """
+        records = list(records)
+        key = self.key
+        with self.transaction(), paused_gc():
+            ids = [record[key] for record in records]
+            seen = set()
+            for record_id in ids:
+                if record_id in seen or record_id in self._records:
+                    raise ValueError(f"Duplicate {key}: {record_id}")
+                seen.add(record_id)
+            if not records:
+                return
+            first = self._backend.next_revs(len(records))
+            revs = range(first, first + len(records))
+            self._backend.put_many(self.name, zip(ids, revs, revs, records))
+            self._track("insert", ids)
+            self._insert_many(ids, revs, records)
+
+    def seed(self, records):
+        """Charger des données initiales si la collection est vide
+
+        Atomique : si plusieurs workers démarrent ensemble, un seul insère.
+        """
+        with self.transaction():
+            if not self._records:
+                self.extend(records)
+
+    def update(self, record_id, changes):
+        """Modifier les champs d'un enregistrement en gardant les index cohérents"""
+        with self.transaction():
+            record = self._records.get(record_id)
+            if record is None:
+                return None
+            changes = {field: value for field, value in changes.items() if field != self.key}
+            rev = self._backend.next_rev()
+            self._backend.put(self.name, record_id, self._seqs[record_id], rev,
+                              {**record, **changes})
+            self._track("update", record_id, {field: record.get(field, MISSING) for field in changes},
+                        self._revs[record_id])
+            return self._update(record_id, changes, rev)
+
+    def delete(self, record_id):
+        """Supprimer un enregistrement et ses entrées d'index"""
+        with self.transaction():
+            if record_id not in self._records:
+                return None
+            rev = self._backend.next_rev()
+            self._backend.put(self.name, record_id, self._seqs[record_id], rev, None)
+            self._track("delete", self._records[record_id], self._seqs[record_id], self._revs[record_id])
+            return self._delete(record_id, rev)
+
+    def _insert(self, record, seq, rev):
+        record_id = record[self.key]
+        self._records[record_id] = record
+        self._seqs[record_id] = seq
+        self._revs[record_id] = rev
+        self._log_ids.append(record_id)
+        self._log_seqs.append(seq)
+        self.last_seq = max(self.last_seq, seq)
+        self._synced_rev = max(self._synced_rev, rev)
+        for field in self._indexes:
+            self._index_add(field, record.get(field), record_id)
+        self._notify("insert", record)
+        return record
+
+    def _insert_many(self, ids, revs, records):
+        """_insert d'un lot d'enregistrements nouveaux (séquence = révision), structure par structure"""
+        self._records.update(zip(ids, records))
+        self._seqs.update(zip(ids, revs))
+        self._revs.update(zip(ids, revs))
+        self._log_ids.extend(ids)
+        self._log_seqs.extend(revs)
+        self.last_seq = max(self.last_seq, revs[-1])
+        self._synced_rev = max(self._synced_rev, revs[-1])
+        for field in self._indexes:
+            for record_id, record in zip(ids, records):
+                self._index_add(field, record.get(field), record_id)
+        for listener in self._listeners:
+            for record in records:
+                listener("insert", record)
+
+    def _update(self, record_id, changes, rev):
+        record = self._records[record_id]
+        for field, value in changes.items():
+            if field in self._indexes and record.get(field) != value:
+                self._index_remove(field, record.get(field), record_id)
+                self._index_add(field, value, record_id)
+            record[field] = value
+        self._revs[record_id] = rev
+        self._synced_rev = max(self._synced_rev, rev)
+        self._notify("update", record)
+        return record
+
+    def _delete(self, record_id, rev):
+        record = self._records.pop(record_id, None)
+        self._seqs.pop(record_id, None)
+        self._revs.pop(record_id, None)
+        self._synced_rev = max(self._synced_rev, rev)
+        if record is None:
+            return None
+        self._log_dead += 1
+        if self._undo is None and self._log_dead > len(self._log_ids) // 2:
+            self._compact_log()
+        for field in self._indexes:
+            self._index_remove(field, record.get(field), record_id)
+        self._notify("delete", record)
+        return record
+
+    def _compact_log(self):
+        """Reconstruire le journal sans les entrées supprimées
+
+        De nouvelles listes remplacent les anciennes : un parcours en cours
+        continue sur l'ancien journal sans être perturbé.
+        """
+        live = [(record_id, seq) for record_id, seq in zip(self._log_ids, self._log_seqs)
+                if self._seqs.get(record_id) == seq]
+        self._log_ids = [record_id for record_id, _ in live]
+        self._log_seqs = [seq for _, seq in live]
+        self._log_dead = 0
+
+    def _index_add(self, field, value, record_id):
+        self._indexes[field].setdefault(value, {})[record_id] = None
+
+    def _index_remove(self, field, value, record_id):
+        bucket = self._indexes[field].get(value)
+        if bucket is not None:
+            bucket.pop(record_id, None)
+            if not bucket:
+                del self._indexes[field][value]
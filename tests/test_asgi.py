@@ -0,0 +1,84 @@
+"""
+Adaptateur ASGI : le corps d'une requête est transmis à la vue au fil de la
+réception (wsgi.input), sans être mis entièrement en mémoire au préalable
+"""
+
+import asyncio
+import hashlib
+
+from flask import Flask, request
+
+from common.asgi import ASGIApp, BODY_PREFETCH_BYTES
+
+CHUNK = 256 * 1024
+
+
+def call(application, body_chunks, headers=()):
+    """Requête POST ASGI -> (statut, corps de la réponse, messages reçus avant la première lecture)"""
+    state = {"received": 0, "at_first_read": None}
+    messages = [{"type": "http.request", "body": chunk, "more_body": index < len(body_chunks) - 1}
+                for index, chunk in enumerate(body_chunks)]
+
+    async def receive():
+        if state["received"] < len(messages):
+            state["received"] += 1
+            return messages[state["received"] - 1]
+        await asyncio.sleep(3600)
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "POST", "path": "/upload", "query_string": b"",
+             "headers": [(b"content-type", b"application/octet-stream"), *headers]}
+    application.state = state
+    asyncio.run(application(scope, receive, send))
+    status = sent[0]["status"]
+    return status, b"".join(message.get("body", b"") for message in sent[1:])
+
+
+def make_app(max_body_bytes=64 * 1024 * 1024):
+    app = Flask(__name__)
+    application = ASGIApp(app, max_threads=2, max_body_bytes=max_body_bytes)
+
+    @app.route("/upload", methods=["POST"])
+    def upload():
+        hasher = hashlib.sha256()
+        size = 0
+        while True:
+            chunk = request.stream.read(CHUNK)
+            if application.state["at_first_read"] is None:
+                application.state["at_first_read"] = application.state["received"]
+            if not chunk:
+                break
+            hasher.update(chunk)
+            size += len(chunk)
+        return f"{size}:{hasher.hexdigest()}"
+
+    return application
+
+
+def test_large_body_is_received_as_the_view_reads():
+    chunks = [bytes([index]) * CHUNK for index in range(40)]  # 10 Mio
+    application = make_app()
+    status, body = call(application, chunks, [(b"content-length", str(40 * CHUNK).encode())])
+    expected = hashlib.sha256(b"".join(chunks)).hexdigest()
+    assert (status, body) == (200, f"{40 * CHUNK}:{expected}".encode())
+    # Seul le début du corps était lu quand la vue a commencé sa lecture
+    assert application.state["at_first_read"] <= BODY_PREFETCH_BYTES // CHUNK + 2
+
+
+def test_chunked_body_without_length():
+    chunks = [b"a" * 1000, b"b" * CHUNK, b"c" * 10]
+    status, body = call(make_app(), chunks)
+    assert body.startswith(f"{1010 + CHUNK}:".encode()) and status == 200
+
+
+def test_body_over_the_limit_is_refused():
+    chunks = [b"x" * CHUNK] * 8
+    assert call(make_app(max_body_bytes=4 * CHUNK), chunks)[0] == 413
+    # Longueur annoncée trop grande : refus sans rien lire
+    application = make_app(max_body_bytes=4 * CHUNK)
+    assert call(application, chunks, [(b"content-length", str(8 * CHUNK).encode())])[0] == 413
+    assert application.state["received"] == 0
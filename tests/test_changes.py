@@ -0,0 +1,29 @@
+"""
+Flux de modifications : un consommateur peut toujours démarrer de `since=0`,
+même quand l'horizon de rétention des suppressions a avancé
+"""
+
+from common.changes import read_changes
+from common.store import Database
+
+
+def test_bootstrap_after_horizon_moved():
+    db = Database()
+    db.backend.max_tombstones = 2
+    patients = db.collection("patients")
+    patients.extend([{"id": f"p{i}"} for i in range(6)])
+    for i in range(4):
+        patients.delete(f"p{i}")
+    horizon = db.backend.change_horizon()
+    assert horizon > 0
+
+    # Instantané complet : enregistrements vivants et suppressions encore retenues
+    page = read_changes(db, 0, 100)
+    live = {change["id"] for change in page["changes"] if change["action"] != "delete"}
+    assert live == {"p4", "p5"}
+    assert page["next_since"] == page["last_seq"] == db.backend.last_rev()
+    assert not page["has_more"]
+
+    # Un `since` non nul antérieur à l'horizon a expiré ; l'horizon lui-même reste valable
+    assert read_changes(db, horizon - 1, 100) is None
+    assert read_changes(db, horizon, 100) is not None
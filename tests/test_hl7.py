@@ -0,0 +1,97 @@
+"""
+Intégration HL7 de HealthCare Pro : rendez-vous des visites (PV1) et accusés
+MLLP, vérifiés sur les collections de l'application (base en mémoire)
+"""
+
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+APP_PATH = Path(__file__).resolve().parent.parent / "api2_healthcare_pro" / "app.py"
+
+
+@pytest.fixture(scope="module", params=["memory", "sqlite"])
+def hcp(request, monkeypatch_module, tmp_path_factory):
+    """Module de l'application chargé sur une base neuve (en mémoire ou SQLite)"""
+    if request.param == "sqlite":
+        path = tmp_path_factory.mktemp("hcp") / "healthcare_pro.db"
+        monkeypatch_module.setenv("HEALTHCARE_PRO_DATABASE_URL", f"sqlite:///{path}")
+    else:
+        monkeypatch_module.delenv("HEALTHCARE_PRO_DATABASE_URL", raising=False)
+    monkeypatch_module.delenv("HEALTHCARE_PRO_FIXTURE", raising=False)
+    spec = importlib.util.spec_from_file_location(f"healthcare_pro_app_{request.param}", APP_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(scope="module")
+def monkeypatch_module():
+    with pytest.MonkeyPatch.context() as patch:
+        yield patch
+
+
+def adt(patient_number, visit_number, event="A01", control_id="1", admitted="20240322100000"):
+    """Message ADT d'un patient et d'une visite (segments terminés par \\r)"""
+    pv1 = ["PV1", "1", "I", "ICU^101^1", "", "", "", "^Garcia^Elena^^^Dr"] + [""] * 37
+    pv1[19], pv1[44] = visit_number, admitted
+    return "\r".join([
+        f"MSH|^~\\&|APP|FAC|HEALTHCARE_PRO|HCP|20240322143000||ADT^{event}|{control_id}|P|2.4",
+        f"EVN|{event}|20240322143000",
+        f"PID|1||{patient_number}^^^HCP^MR||Dubois^Pierre||19781108|M",
+        "|".join(pv1),
+    ]).encode("utf-8")
+
+
+def ack_codes(response):
+    return [segment.split("|")[1] for segment in response.decode("utf-8").split("\r") if segment.startswith("MSA|")]
+
+
+def test_visit_is_upserted_under_its_own_namespace(hcp):
+    [ack] = hcp.acknowledge_mllp([adt("HL7-V1", "V-100")])
+    assert ack_codes(ack) == ["AA"]
+    visit = hcp.appointments_db.get("hcp-visit-V-100")
+    assert visit["visit_number"] == "V-100" and visit["datetime"] == "2024-03-22T10:00:00"
+
+    [ack] = hcp.acknowledge_mllp([adt("HL7-V1", "V-100", "A08", admitted="20240323090000")])
+    assert ack_codes(ack) == ["AA"]
+    assert hcp.appointments_db.get("hcp-visit-V-100")["datetime"] == "2024-03-23T09:00:00"
+    # Un numéro de visite égal au suffixe d'un id REST ou de fixture ne l'écrase pas
+    fixture_appointment = dict(hcp.appointments_db.get("hcp-appointment-001"))
+    [ack] = hcp.acknowledge_mllp([adt("HL7-V1", "001", admitted="20250101120000")])
+    assert ack_codes(ack) == ["AA"]
+    assert hcp.appointments_db.get("hcp-appointment-001") == fixture_appointment
+    assert hcp.appointments_db.get("hcp-visit-001")["datetime"] == "2025-01-01T12:00:00"
+
+
+def test_visit_upsert_refuses_records_of_another_origin(hcp):
+    hcp.appointments_db.insert({"appointment_id": "hcp-visit-V-200", "patient_id": "hcp-patient-001",
+                                "practitioner": "Dr. Imported", "datetime": "2024-01-01T08:00:00"})
+    [ack] = hcp.acknowledge_mllp([adt("HL7-V2", "V-200")])
+    assert ack_codes(ack) == ["AE"]
+    assert hcp.appointments_db.get("hcp-visit-V-200")["practitioner"] == "Dr. Imported"
+
+
+def test_failing_frame_does_not_block_the_others(hcp):
+    hcp.appointments_db.insert({"appointment_id": "hcp-visit-V-300", "patient_id": "hcp-patient-001",
+                                "practitioner": "Dr. Imported", "datetime": "2024-01-01T08:00:00"})
+    patients, appointments = len(hcp.patients_db), len(hcp.appointments_db)
+
+    acks = hcp.acknowledge_mllp([
+        adt("HL7-F1", "V-301", control_id="F1"),
+        adt("HL7-F2", "V-300", control_id="F2"),
+        adt("HL7-F3", "V-303", control_id="F3"),
+    ])
+
+    assert [ack_codes(ack) for ack in acks] == [["AA"], ["AE"], ["AA"]]
+    assert [b"|F%d" % number in ack for number, ack in enumerate(acks, 1)] == [True] * 3
+    # Trame en échec sans aucune écriture : ni patient créé, ni rendez-vous modifié
+    assert hcp.patients_db.find("patient_number", "HL7-F2") == []
+    assert hcp.appointments_db.get("hcp-visit-V-300")["practitioner"] == "Dr. Imported"
+    assert "hcp-visit-V-301" in hcp.appointments_db and "hcp-visit-V-303" in hcp.appointments_db
+    assert (len(hcp.patients_db), len(hcp.appointments_db)) == (patients + 2, appointments + 2)
+    # Même état dans le backend que dans les collections en mémoire
+    stored = {record_id for collection, record_id, _, _, record in hcp.db.backend.changes(0, 10 ** 6)
+              if collection == "patients" and record is not None}
+    assert stored == {patient["id"] for patient in hcp.patients_db.all()}
@@ -0,0 +1,69 @@
+"""
+Registres à expiration : un identifiant n'est enregistré qu'une fois tant qu'il
+est actif, y compris entre workers partageant le même fichier SQLite
+"""
+
+import pytest
+
+from common.expiring import CapacityError
+
+from common.registry import MemoryRegistry, SQLiteRegistry
+from common.storage import SQLiteBackend
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_registry(request, tmp_path):
+    """Fabrique de registres sur une horloge simulée (`make_registry.clock`)"""
+    clock = Clock()
+
+    def make(max_size=100):
+        if request.param == "memory":
+            return MemoryRegistry("nonces", max_size=max_size, clock=clock)
+        backend = SQLiteBackend(str(tmp_path / "registry.db"))
+        return SQLiteRegistry(backend, "nonces", max_size=max_size, clock=clock)
+
+    make.clock = clock
+    return make
+
+
+def test_add_reports_active_identifiers(make_registry):
+    registry = make_registry()
+    assert registry.add("n1", 1010)
+    assert not registry.add("n1", 1010)
+    make_registry.clock.now = 1010
+    # Expiré (même pas encore purgé) : l'identifiant peut être ré-enregistré
+    assert registry.add("n1", 1020)
+    assert len(registry) == 1
+
+
+def test_full_registry_refuses_instead_of_evicting(make_registry):
+    registry = make_registry(max_size=2)
+    assert registry.add("n1", 1010) and registry.add("n2", 1020)
+    with pytest.raises(CapacityError):
+        registry.add("n3", 1030)
+    # Aucun identifiant valable n'a été évincé pour faire de la place
+    assert "n1" in registry and "n2" in registry and "n3" not in registry
+    assert registry.stats()["rejections"] == 1
+
+    make_registry.clock.now = 1010
+    assert registry.add("n3", 1030)
+    assert not registry.add("n2", 1020)
+    assert registry.stats()["evictions"] == 1
+
+
+def test_add_is_shared_between_workers(tmp_path):
+    path = str(tmp_path / "registry.db")
+    worker_a = SQLiteBackend(path).registry("nonces", 100)
+    worker_b = SQLiteBackend(path).registry("nonces", 100)
+    assert worker_a.add("1700000000:signature", 2 ** 40)
+    assert not worker_b.add("1700000000:signature", 2 ** 40)
+    assert worker_b.consume("1700000000:signature")
+    assert not worker_a.consume("1700000000:signature")
@@ -0,0 +1,87 @@
+"""
+Collections : une transaction qui échoue ne laisse aucune trace, ni dans le
+backend ni en mémoire (enregistrements, index, séquences, abonnés)
+"""
+
+import pytest
+
+from common.store import Database
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def database_url(request, tmp_path):
+    return None if request.param == "memory" else f"sqlite:///{tmp_path / 'store.db'}"
+
+
+def backend_state(database, name):
+    """Enregistrements vivants d'une collection tels que le backend les conserve"""
+    return {record_id: record for collection, record_id, _, _, record in database.backend.changes(0, 10 ** 6)
+            if collection == name and record is not None}
+
+
+def memory_state(collection):
+    return {record[collection.key]: dict(record) for record in collection.all()}
+
+
+def assert_consistent(database, collection):
+    assert memory_state(collection) == backend_state(database, collection.name)
+    for record_id, record in memory_state(collection).items():
+        assert collection.find("date", record["date"]).count(collection.get(record_id)) == 1
+    assert [record["id"] for _, record in collection.scan()] == list(memory_state(collection))
+
+
+def test_failed_transaction_is_rolled_back(database_url):
+    db = Database(database_url)
+    appointments = db.collection("appointments", indexes=("date",))
+    seen = {}
+    appointments.subscribe(lambda action, record: seen.pop(record["id"], None) if action == "delete"
+                           else seen.__setitem__(record["id"], record["date"]))
+    appointments.extend([{"id": "a", "date": "d1"}, {"id": "b", "date": "d1"}, {"id": "c", "date": "d2"}])
+    last_seq, version = appointments.last_seq, appointments.version
+
+    with pytest.raises(TypeError):
+        with db.transaction():
+            appointments.insert({"id": "d", "date": "d2"})
+            appointments.update("a", {"date": "d2", "note": "moved"})
+            appointments.delete("b")
+            appointments.insert({"id": "e", "date": ["unhashable"]})
+
+    assert memory_state(appointments) == {
+        "a": {"id": "a", "date": "d1"}, "b": {"id": "b", "date": "d1"}, "c": {"id": "c", "date": "d2"},
+    }
+    assert_consistent(db, appointments)
+    assert [record["id"] for record in appointments.query(date="d1")] == ["a", "b"]
+    assert (appointments.last_seq, appointments.version) == (last_seq, version)
+    assert seen == {"a": "d1", "b": "d1", "c": "d2"}
+
+    # Les écritures suivantes repartent de l'état restauré
+    appointments.insert({"id": "d", "date": "d2"})
+    assert_consistent(db, appointments)
+    assert [record["id"] for record in appointments.query(date="d2")] == ["c", "d"]
+
+
+def test_failed_transaction_restores_other_workers_view(database_url):
+    if database_url is None:
+        pytest.skip("Backend partagé uniquement")
+    db = Database(database_url)
+    patients = db.collection("patients", indexes=("date",))
+    patients.insert({"id": "p1", "date": "d1"})
+    with pytest.raises(RuntimeError):
+        with patients.transaction():
+            patients.insert({"id": "p2", "date": "d1"})
+            raise RuntimeError("handler failed")
+
+    other = Database(database_url).collection("patients", indexes=("date",))
+    assert memory_state(other) == memory_state(patients) == {"p1": {"id": "p1", "date": "d1"}}
+
+
+def test_nested_failure_handled_inside_transaction_is_kept(database_url):
+    db = Database(database_url)
+    patients = db.collection("patients", indexes=("date",))
+    with db.transaction():
+        patients.insert({"id": "p1", "date": "d1"})
+        with pytest.raises(ValueError):
+            patients.insert({"id": "p1", "date": "d1"})
+        patients.insert({"id": "p2", "date": "d1"})
+    assert list(memory_state(patients)) == ["p1", "p2"]
+    assert_consistent(db, patients)